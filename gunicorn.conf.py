@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration, picked up automatically by ``gunicorn`` when run from
+the project root.
+
+    gunicorn                                    # WSGI, sync workers
+    PORTFOLIO_SERVER=asgi gunicorn              # ASGI, uvicorn workers, async views
+
+The ASGI profile needs ``uvicorn`` and ``uvicorn-worker`` (requirements.txt)
+and turns on PORTFOLIO_ASYNC_VIEWS. Without gunicorn the same profile is
+
+    PORTFOLIO_ASYNC_VIEWS=1 PORTFOLIO_RATELIMIT_BACKEND=cache \\
+        uvicorn portfolio_project.asgi:application --workers 4 --lifespan off
+
+Gunicorn's defaults are kept unless asked for: one worker (set
+WEB_CONCURRENCY for more, e.g. ``2 * cores + 1``) and no access log (set
+PORTFOLIO_ACCESS_LOG to a path, or ``-`` for stdout).
+"""
+import os
+
+server = os.environ.get('PORTFOLIO_SERVER', 'wsgi')
+
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+timeout = 30
+keepalive = 5
+accesslog = os.environ.get('PORTFOLIO_ACCESS_LOG') or None
+
+if workers > 1:
+    # The local rate limit backend keeps its buckets per process, so every
+    # worker would allow the full rate; share them through the cache instead.
+    os.environ.setdefault('PORTFOLIO_RATELIMIT_BACKEND', 'cache')
+
+if server == 'asgi':
+    wsgi_app = 'portfolio_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    os.environ.setdefault('PORTFOLIO_ASYNC_VIEWS', '1')
+else:
+    wsgi_app = 'portfolio_project.wsgi:application'
+
+
+def worker_exit(server, worker):
+    # Flush write-behind contact submissions (PORTFOLIO_CONTACT_WRITE_BEHIND)
+    # before the worker goes away; the next worker would pick them up anyway.
+    # Buffered analytics counters only live in this worker, so flush them too.
+    import sys
+    for name in ['portfolio.outbox', 'portfolio.analytics']:
+        module = sys.modules.get(name)
+        if module is not None:
+            module.shutdown()
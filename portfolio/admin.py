@@ -1,5 +1,86 @@
-from django.contrib import admin
-from .models import Profile, Education, Project, SkillCategory, Skill, Certification, ContactMessage
+import json
+from datetime import datetime, time, timedelta
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db.models import Q, Sum
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.html import format_html, format_html_join
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification, ContactMessage, PortfolioSnapshot, IngestedFile, MediaBlob, MessageArchiveSegment, ProjectDailyCount, CertificationDailyCount, PageViewDailyCount
+from . import archive, reorder
+from .export import streaming_response
+from .inbox import InboxChangeList
+
+
+@admin.action(description='Export selected as CSV')
+def export_csv(modeladmin, request, queryset):
+    return streaming_response(queryset, modeladmin.opts.model_name, 'csv')
+
+
+@admin.action(description='Export selected as JSON Lines (gzip)')
+def export_jsonl_gzip(modeladmin, request, queryset):
+    return streaming_response(queryset, modeladmin.opts.model_name, 'jsonl', compress=True)
+
+
+# Days covered by the "recent" column of the click stats.
+STATS_DAYS = 30
+
+
+def click_stats(counts, labels):
+    """
+    A small table of opens from the daily counters: ``counts`` is a queryset
+    of them, ``labels`` maps each event to its label (None: no event column).
+    One aggregate query.
+    """
+    since = timezone.localdate() - timedelta(days=STATS_DAYS - 1)
+    group = ['event'] if None not in labels else []
+    rows = counts.values(*group).annotate(recent=Sum('count', filter=Q(day__gte=since)), total=Sum('count')).order_by(*group)
+    totals = {row['event'] if group else None: row for row in rows}
+    return format_html(
+        '<table><tr><th></th><th>Last {} days</th><th>All time</th></tr>{}</table>',
+        STATS_DAYS,
+        format_html_join('', '<tr><th>{}</th><td>{}</td><td>{}</td></tr>', (
+            (label, (totals.get(event) or {}).get('recent') or 0, (totals.get(event) or {}).get('total') or 0)
+            for event, label in labels.items()
+        )),
+    )
+
+
+class ReorderableAdmin(admin.ModelAdmin):
+    """
+    Change lists whose rows can be dragged into a new order
+    (``static/js/admin_reorder.js``). The new order is posted to the
+    ``reorder/`` view as ``{"order": [pk, ...]}`` and written by
+    ``portfolio.reorder`` in one bulk UPDATE; rows must share the
+    ``reorder_scope`` fields.
+    """
+    change_list_template = 'admin/portfolio/reorderable_change_list.html'
+    reorder_scope = ()
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('reorder/', self.admin_site.admin_view(require_POST(self.reorder_view)), name='%s_%s_reorder' % info),
+        ] + super().get_urls()
+
+    def reorder_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        try:
+            pks = json.loads(request.body)['order']
+            if not isinstance(pks, list):
+                raise TypeError
+            updated = reorder.reorder(self.get_queryset(request), pks, self.reorder_scope)
+        except reorder.ReorderError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        except (ValueError, KeyError, TypeError, ValidationError):
+            return JsonResponse({'error': 'Expected {"order": [id, ...]}'}, status=400)
+        return JsonResponse({'updated': updated})
+
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -9,32 +90,182 @@ class ProfileAdmin(admin.ModelAdmin):
 class EducationAdmin(admin.ModelAdmin):
     list_display = ['degree', 'institution', 'start_year', 'end_year', 'order']
     list_editable = ['order']
+    actions = [export_csv, export_jsonl_gzip]
     
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(ReorderableAdmin):
     list_display = ['title', 'order', 'created_at']
-    list_editable = ['order']
+    actions = [export_csv, export_jsonl_gzip]
     list_filter = ['created_at']
+    readonly_fields = ['opens']
+
+    @admin.display(description='Opens')
+    def opens(self, obj):
+        return click_stats(obj.daily_counts.all(), dict(ProjectDailyCount.EVENTS)) if obj.pk else '-'
     
 @admin.register(SkillCategory)
-class SkillCategoryAdmin(admin.ModelAdmin):
+class SkillCategoryAdmin(ReorderableAdmin):
     list_display = ['name', 'order']
-    list_editable = ['order']
+    actions = [export_csv, export_jsonl_gzip]
     
 @admin.register(Skill)
-class SkillAdmin(admin.ModelAdmin):
+class SkillAdmin(ReorderableAdmin):
     list_display = ['name', 'category', 'order']
-    list_editable = ['order']
+    actions = [export_csv, export_jsonl_gzip]
     list_filter = ['category']
+    # Meta.ordering sorts by the category's order, which needs a join and a
+    # sort; grouping by the category id is served by an index.
+    ordering = ['category_id', 'order']
+    reorder_scope = ['category']
     
 @admin.register(Certification)
-class CertificationAdmin(admin.ModelAdmin):
+class CertificationAdmin(ReorderableAdmin):
     list_display = ['title', 'issuer', 'issue_date', 'order']
-    list_editable = ['order']
+    actions = [export_csv, export_jsonl_gzip]
+    readonly_fields = ['opens']
+
+    @admin.display(description='Opens')
+    def opens(self, obj):
+        return click_stats(obj.daily_counts.all(), {None: 'Certificate'}) if obj.pk else '-'
     
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'created_at', 'is_read']
     list_filter = ['is_read', 'created_at']
     readonly_fields = ['created_at']
-    list_editable = ['is_read']
+    # The inbox is paged by a (created_at, id) cursor, so it cannot be
+    # re-sorted; messages are marked read with the bulk actions instead of
+    # an editable column.
+    ordering = ['-created_at', '-id']
+    sortable_by = []
+    show_full_result_count = False
+    actions = ['mark_read', 'mark_unread', 'delete_messages', export_csv, export_jsonl_gzip]
+
+    def get_changelist(self, request, **kwargs):
+        return InboxChangeList
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('message')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Replaced by delete_messages, which does not load every message first.
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Mark selected messages as read', permissions=['change'])
+    def mark_read(self, request, queryset):
+        count = queryset.update(is_read=True)
+        self.message_user(request, f'Marked {count} messages as read.', messages.SUCCESS)
+
+    @admin.action(description='Mark selected messages as unread', permissions=['change'])
+    def mark_unread(self, request, queryset):
+        count = queryset.update(is_read=False)
+        self.message_user(request, f'Marked {count} messages as unread.', messages.SUCCESS)
+
+    @admin.action(description='Delete selected messages', permissions=['delete'])
+    def delete_messages(self, request, queryset):
+        # ContactMessage has no relations or delete signals, so this is a
+        # single DELETE statement.
+        count, _ = queryset.delete()
+        self.message_user(request, f'Deleted {count} messages.', messages.SUCCESS)
+
+@admin.register(PortfolioSnapshot)
+class PortfolioSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['key', 'built_at']
+    readonly_fields = ['key', 'data', 'built_at']
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(IngestedFile)
+class IngestedFileAdmin(admin.ModelAdmin):
+    list_display = ['source_path', 'storage_name', 'size', 'ingested_at']
+    search_fields = ['source_path', 'storage_name', 'sha256']
+    readonly_fields = ['source_path', 'sha256', 'size', 'mtime', 'storage_name', 'ingested_at']
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'refcount', 'orphaned_at', 'counted_at']
+    list_filter = ['refcount']
+    search_fields = ['name']
+    readonly_fields = ['name', 'size', 'refcount', 'orphaned_at', 'counted_at']
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(MessageArchiveSegment)
+class MessageArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ['name', 'first_created_at', 'last_created_at', 'count', 'size']
+    readonly_fields = ['name', 'first_created_at', 'last_created_at', 'first_id', 'last_id', 'count', 'size', 'sha256', 'archived_at']
+    date_hierarchy = 'last_created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('search/', self.admin_site.admin_view(self.search_view), name='portfolio_messagearchivesegment_search'),
+        ] + super().get_urls()
+
+    def search_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        query = request.GET.get('q', '').strip()
+        start, end = _day(request.GET.get('start')), _day(request.GET.get('end'), time.max)
+        results, searched = archive.search(query, start, end) if (query or start or end) else ([], 0)
+        return TemplateResponse(request, 'admin/portfolio/messagearchivesegment/search.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': 'Search archived messages',
+            'query': query,
+            'start': request.GET.get('start', ''),
+            'end': request.GET.get('end', ''),
+            'results': results,
+            'searched': searched,
+            'limit': archive.SEARCH_LIMIT,
+        })
+
+
+def _day(value, at=time.min):
+    try:
+        return timezone.make_aware(datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), at))
+    except (TypeError, ValueError):
+        return None
+
+
+class DailyCountAdmin(admin.ModelAdmin):
+    """Read-only lists of the analytics counters, written by ``portfolio.analytics``."""
+    date_hierarchy = 'day'
+    show_full_result_count = False
+    actions = [export_csv, export_jsonl_gzip]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ProjectDailyCount)
+class ProjectDailyCountAdmin(DailyCountAdmin):
+    list_display = ['day', 'project', 'event', 'count']
+    list_filter = ['event']
+    list_select_related = ['project']
+
+
+@admin.register(CertificationDailyCount)
+class CertificationDailyCountAdmin(DailyCountAdmin):
+    list_display = ['day', 'certification', 'count']
+    list_select_related = ['certification']
+
+
+@admin.register(PageViewDailyCount)
+class PageViewDailyCountAdmin(DailyCountAdmin):
+    list_display = ['day', 'count']
@@ -0,0 +1,220 @@
+"""
+Buffered page-view and outbound-click counters.
+
+``static/js/analytics.js`` sends a beacon to the ``analytics_event`` view for
+each home page view and each opened project link, project video and
+certificate. ``record()`` only increments a counter in this process's
+buffer; a flusher thread writes the buffer every
+``PORTFOLIO_ANALYTICS_FLUSH_INTERVAL`` seconds as one
+``INSERT ... ON CONFLICT DO UPDATE SET count = count + excluded.count`` per
+counter table, into ``ProjectDailyCount``, ``CertificationDailyCount`` and
+``PageViewDailyCount``. Requests never write to the database.
+
+Beacons name projects and certifications by id. ``known()`` checks the ids
+against the ones in the snapshot, so a client cannot fill the buffer with
+counters for objects that do not exist.
+
+The buffer holds at most ``PORTFOLIO_ANALYTICS_MAX_KEYS`` distinct counters;
+events for new counters beyond that are dropped (and counted in
+``dropped``) until the next flush. Workers flush on exit (``atexit`` and
+gunicorn's ``worker_exit`` hook), so only a crash loses the counts of the
+last interval.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import cache, snapshot
+from .models import Certification, CertificationDailyCount, PageViewDailyCount, Project, ProjectDailyCount
+
+logger = logging.getLogger(__name__)
+
+PROJECT_EVENTS = {event for event, label in ProjectDailyCount.EVENTS}
+# Rows per INSERT statement.
+BATCH_SIZE = 200
+
+_buffer = Counter()
+_buffer_lock = threading.Lock()
+_flusher = None
+_flusher_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+dropped = 0
+# (content version, project ids, certification ids) from the snapshot.
+_known = (None, frozenset(), frozenset())
+
+
+def parse(event):
+    """
+    ``'view'``, ``'project:<id>:<github|live|video>'`` or
+    ``'certification:<id>'`` -> a counter key, or None when it is not one.
+    """
+    parts = event.split(':')
+    try:
+        if parts == ['view']:
+            return ('view',)
+        if len(parts) == 3 and parts[0] == 'project' and parts[2] in PROJECT_EVENTS:
+            return ('project', int(parts[1]), parts[2])
+        if len(parts) == 2 and parts[0] == 'certification':
+            return ('certification', int(parts[1]))
+    except ValueError:
+        pass
+    return None
+
+
+def known(key):
+    """
+    Whether ``key`` (from ``parse()``) counts something on the page: a view,
+    or a project or certification in the snapshot. The ids are read once
+    per content version.
+    """
+    global _known
+    if key[0] == 'view':
+        return True
+    version = cache.get_content_version()
+    if _known[0] != version:
+        data = snapshot.load()
+        _known = (
+            version,
+            frozenset(project['id'] for project in data['projects']),
+            frozenset(certification['id'] for certification in data['certifications']),
+        )
+    return key[1] in (_known[1] if key[0] == 'project' else _known[2])
+
+
+def record(key, day=None):
+    """Count one event for ``key`` (from ``parse()``). Returns False when it was dropped."""
+    global dropped
+    key = (day or timezone.localdate(), *key)
+    with _buffer_lock:
+        if key not in _buffer and len(_buffer) >= settings.PORTFOLIO_ANALYTICS_MAX_KEYS:
+            dropped += 1
+            _wake.set()
+            return False
+        _buffer[key] += 1
+    start_flusher()
+    return True
+
+
+def pending():
+    """Number of distinct counters waiting to be flushed."""
+    return len(_buffer)
+
+
+def upsert(model, key_fields, rows):
+    """
+    Add ``rows`` (tuples of ``key_fields`` values followed by a count) to
+    ``model``'s counters: one INSERT per BATCH_SIZE rows, adding to the
+    count of rows that already exist.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [model._meta.get_field(field).column for field in key_fields]
+    keys = ', '.join(quote(column) for column in columns)
+    count = quote('count')
+    if connection.vendor == 'mysql':
+        conflict = f'ON DUPLICATE KEY UPDATE {count} = {count} + VALUES({count})'
+    else:
+        conflict = f'ON CONFLICT ({keys}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}'
+    day_index = key_fields.index('day')
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            values = ', '.join(['(' + ', '.join(['%s'] * (len(columns) + 1)) + ')'] * len(batch))
+            params = []
+            for row in batch:
+                row = list(row)
+                row[day_index] = connection.ops.adapt_datefield_value(row[day_index])
+                params.extend(row)
+            cursor.execute(f'INSERT INTO {table} ({keys}, {count}) VALUES {values} {conflict}', params)
+
+
+def write(counts):
+    """Write a ``{key: count}`` buffer to the counter tables in one transaction."""
+    views, projects, certifications = [], [], []
+    for (day, kind, *rest), count in counts.items():
+        if kind == 'view':
+            views.append((day, count))
+        elif kind == 'project':
+            projects.append((rest[0], rest[1], day, count))
+        else:
+            certifications.append((rest[0], day, count))
+
+    # Objects deleted since their events were recorded are left out rather
+    # than breaking the foreign keys.
+    if projects:
+        known = set(Project.objects.filter(pk__in={row[0] for row in projects}).values_list('pk', flat=True))
+        projects = [row for row in projects if row[0] in known]
+    if certifications:
+        known = set(Certification.objects.filter(pk__in={row[0] for row in certifications}).values_list('pk', flat=True))
+        certifications = [row for row in certifications if row[0] in known]
+
+    with transaction.atomic():
+        if views:
+            upsert(PageViewDailyCount, ['day'], views)
+        if projects:
+            upsert(ProjectDailyCount, ['project', 'event', 'day'], projects)
+        if certifications:
+            upsert(CertificationDailyCount, ['certification', 'day'], certifications)
+
+
+def flush():
+    """Write and empty this process's buffer. Returns the number of events written."""
+    global _buffer
+    with _buffer_lock:
+        counts, _buffer = _buffer, Counter()
+    if not counts:
+        return 0
+    try:
+        write(counts)
+    except Exception:
+        # Put the counts back for the next attempt.
+        with _buffer_lock:
+            _buffer.update(counts)
+        raise
+    return sum(counts.values())
+
+
+def _run():
+    interval = settings.PORTFOLIO_ANALYTICS_FLUSH_INTERVAL
+    while not _stop.is_set():
+        _wake.wait(interval)
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not flush the analytics counters')
+        finally:
+            close_old_connections()
+
+
+def start_flusher():
+    """Start this process's flusher thread (once); a zero interval disables it."""
+    global _flusher
+    if _flusher is not None or not settings.PORTFOLIO_ANALYTICS_FLUSH_INTERVAL:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run, name='analytics-flusher', daemon=True)
+            _flusher.start()
+            atexit.register(shutdown)
+
+
+def shutdown(timeout=10):
+    """Stop the flusher and flush what is left; called when a worker exits."""
+    global _flusher
+    _stop.set()
+    _wake.set()
+    if _flusher is not None:
+        _flusher.join(timeout)
+        _flusher = None
+    try:
+        flush()
+    except Exception:
+        logger.exception('Could not flush the analytics counters on shutdown')
+    _stop.clear()
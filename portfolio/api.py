@@ -0,0 +1,176 @@
+"""
+Read-only JSON API for the portfolio content.
+
+Payloads are built from ``portfolio.snapshot`` and cached, already
+serialized and gzipped, under the version counters of the models they
+contain, so a warm request is a cache lookup and a dictionary hit with no
+database work and no model instances.
+
+    /api/portfolio/                      every section
+    /api/portfolio/?fields=projects      only some sections
+    /api/portfolio/projects/             one section
+    /api/portfolio/projects/?fields=title,live_link
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from . import cache, snapshot
+from .middleware import accepted_encodings
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used without it.
+    orjson = None
+
+# section -> (models it contains, snapshot key)
+SECTIONS = {
+    'profile': ([Profile], 'profile'),
+    'education': ([Education], 'educations'),
+    'projects': ([Project], 'projects'),
+    'skills': ([SkillCategory, Skill], 'skill_categories'),
+    'certifications': ([Certification], 'certifications'),
+}
+
+# Internal bookkeeping that is not part of the public payload.
+PRIVATE_FIELDS = {'image_variants', 'category_id'}
+
+# Smaller payloads are not worth gzipping.
+GZIP_MIN_SIZE = 1024
+
+# Per-process copy of recently served payloads. Keys contain the model
+# versions, so entries never go stale; they only age out. Shared by the
+# threads of a worker, hence the lock.
+_local = OrderedDict()
+_local_lock = threading.Lock()
+LOCAL_SIZE = 64
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def _public(record, fields=None):
+    """Return ``record`` without private fields, file fields as URLs."""
+    if record is None:
+        return None
+    result = {}
+    for field, value in record.items():
+        if field in PRIVATE_FIELDS or (fields and field not in fields):
+            continue
+        if isinstance(value, dict) and 'url' in value:
+            value = value['url']
+        elif field == 'skills':
+            value = [_public(skill) for skill in value]
+        result[field] = value
+    return result
+
+
+def _field_names(section):
+    key = SECTIONS[section][1]
+    fields = next(fields for name, model, fields in snapshot.SOURCES if name == key)
+    names = set(fields) - PRIVATE_FIELDS
+    if section == 'skills':
+        names.add('skills')
+    return names
+
+
+def parse_fields(section, value):
+    """
+    Return the sorted tuple of requested fields, or raise ValueError naming the
+    unknown ones. For the whole-portfolio endpoint the fields are sections.
+    """
+    if not value:
+        return ()
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    allowed = set(SECTIONS) if section is None else _field_names(section)
+    unknown = fields - allowed
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}. Available: {", ".join(sorted(allowed))}')
+    return tuple(sorted(fields))
+
+
+def build_payload(section, fields):
+    """Serialize a section (or every section when ``section`` is None)."""
+    data = snapshot.load()
+    if section is None:
+        return dumps({
+            name: _public(data[key]) if name == 'profile' else [_public(record) for record in data[key]]
+            for name, (models, key) in SECTIONS.items()
+            if not fields or name in fields
+        })
+    key = SECTIONS[section][1]
+    if section == 'profile':
+        return dumps(_public(data[key], fields))
+    return dumps([_public(record, fields) for record in data[key]])
+
+
+def get_payload(section, fields):
+    """
+    Return ``(body, gzipped body or None, etag)`` for a section, from the
+    process-local copy, the portfolio cache or freshly built, in that order.
+    """
+    names = [name for name in SECTIONS if not fields or name in fields] if section is None else [section]
+    models = [model for name in names for model in SECTIONS[name][0]]
+    versions = cache.get_model_versions(models)
+    key = 'portfolio:api:%s:%s:%s:%s' % (
+        settings.PORTFOLIO_RELEASE, section or 'all', ','.join(fields),
+        ':'.join(versions[model] for model in models),
+    )
+
+    with _local_lock:
+        payload = _local.get(key)
+    if payload is None:
+        # Built outside the lock; two threads may build the same payload.
+        payload = cache.get_cache().get(key)
+        if payload is None:
+            body = build_payload(section, fields)
+            compressed = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+            payload = (body, compressed, hashlib.sha256(body).hexdigest()[:32])
+            cache.get_cache().set(key, payload, settings.PORTFOLIO_PAGE_CACHE_TIMEOUT)
+        with _local_lock:
+            _local[key] = payload
+            while len(_local) > LOCAL_SIZE:
+                _local.popitem(last=False)
+    return payload
+
+
+@require_safe
+def portfolio(request, section=None):
+    if section is not None and section not in SECTIONS:
+        raise Http404('Unknown section')
+    try:
+        fields = parse_fields(section, request.GET.get('fields'))
+    except ValueError as e:
+        return HttpResponse(dumps({'error': str(e)}), status=400, content_type='application/json')
+
+    body, compressed, etag = get_payload(section, fields)
+    # Strong ETags are per representation, so the gzipped body gets its own.
+    use_gzip = compressed is not None and 'gzip' in accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    if use_gzip:
+        body, etag = compressed, etag + '-gzip'
+    etag = f'"{etag}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    response['Cache-Control'] = settings.PORTFOLIO_API_CACHE_CONTROL
+    if settings.PORTFOLIO_API_CORS_ORIGIN:
+        response['Access-Control-Allow-Origin'] = settings.PORTFOLIO_API_CORS_ORIGIN
+    if compressed is not None:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,111 @@
+"""
+Archival of old contact messages to append-only segment files.
+
+``archive()`` moves messages older than a cutoff out of the database in
+batches. Each batch becomes one gzipped JSON Lines file in
+``PORTFOLIO_ARCHIVE_DIR``, written with the streaming exporter, and one
+``MessageArchiveSegment`` row recording its date and id range. A segment is
+renamed into place before its messages are deleted, and its name is derived
+from that range, so an interrupted run can simply be repeated. ``search()``
+uses the segment index to open only the files whose range overlaps the
+requested dates.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import export, inbox
+from .models import ContactMessage, MessageArchiveSegment
+
+BATCH_SIZE = 10000
+SEARCH_FIELDS = ['name', 'email', 'subject', 'message']
+SEARCH_LIMIT = 100
+
+
+def archive_dir():
+    return Path(settings.PORTFOLIO_ARCHIVE_DIR)
+
+
+def archive(cutoff, batch_size=BATCH_SIZE):
+    """Archive every message created before ``cutoff``. Yields each new segment."""
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    old = ContactMessage.objects.filter(created_at__lt=cutoff)
+    while True:
+        data = export.Export(export.export_queryset(old)[:batch_size], 'jsonl', compress=True)
+        sha256 = hashlib.sha256()
+        # A name of its own, so concurrent runs never write the same file.
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.segment-', suffix='.tmp', delete=False) as f:
+            tmp_path = Path(f.name)
+            try:
+                for block in data:
+                    sha256.update(block)
+                    f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                tmp_path.unlink()
+                raise
+        if not data.count:
+            tmp_path.unlink()
+            return
+
+        first_created_at, first_id = inbox.decode_cursor(data.first)
+        last_created_at, last_id = inbox.decode_cursor(data.watermark)
+        name = f'messages-{first_created_at:%Y%m%d}-{first_id}-{last_id}.jsonl.gz'
+        os.replace(tmp_path, directory / name)
+        with transaction.atomic():
+            segment, created = MessageArchiveSegment.objects.update_or_create(name=name, defaults={
+                'first_created_at': first_created_at, 'last_created_at': last_created_at,
+                'first_id': first_id, 'last_id': last_id, 'count': data.count,
+                'size': (directory / name).stat().st_size, 'sha256': sha256.hexdigest(),
+            })
+            # Everything up to and including the last archived message.
+            old.filter(
+                Q(created_at__lt=last_created_at) | Q(pk__lte=last_id), created_at__lte=last_created_at,
+            ).delete()
+        yield segment
+
+
+def read_segment(segment):
+    """Yield the archived messages of ``segment`` as dicts, oldest first."""
+    with gzip.open(archive_dir() / segment.name, 'rt', encoding='utf-8') as f:
+        for line in f:
+            message = json.loads(line)
+            message['created_at'] = datetime.fromisoformat(message['created_at'])
+            yield message
+
+
+def search(query='', start=None, end=None, limit=SEARCH_LIMIT):
+    """
+    Return ``(messages, segments searched)``: up to ``limit`` archived
+    messages created between ``start`` and ``end`` (either may be None)
+    whose name, email, subject or message contains ``query``, newest first.
+    """
+    segments = MessageArchiveSegment.objects.all()
+    if start:
+        segments = segments.filter(last_created_at__gte=start)
+    if end:
+        segments = segments.filter(first_created_at__lte=end)
+    query = query.lower()
+    results, searched = [], 0
+    for segment in segments.order_by('-last_created_at'):
+        searched += 1
+        matches = [
+            message for message in read_segment(segment)
+            if (not start or message['created_at'] >= start)
+            and (not end or message['created_at'] <= end)
+            and (not query or any(query in str(message[field]).lower() for field in SEARCH_FIELDS))
+        ]
+        results.extend(reversed(matches))
+        if len(results) >= limit:
+            break
+    return results[:limit], searched
@@ -0,0 +1,186 @@
+"""
+Timing helpers, synthetic datasets and an in-process WSGI load generator
+shared by the benchmark management commands and the tests.
+"""
+import io
+import math
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.handlers.wsgi import WSGIHandler
+
+
+def measure(fn, repeat):
+    """Call ``fn`` ``repeat`` times and return the durations in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(durations):
+    return {
+        'p50': percentile(durations, 50),
+        'p99': percentile(durations, 99),
+        'mean': sum(durations) / len(durations) if durations else 0.0,
+    }
+
+
+def response_body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def seed(scale):
+    """
+    Fill the (empty) database with a synthetic portfolio: one profile, three
+    education entries and ``scale`` projects, skills, certifications and
+    contact messages. Rows are bulk-inserted, so no signals fire; the snapshot
+    is rebuilt and the cache versions bumped afterwards.
+    """
+    from . import cache, snapshot
+    from .models import Profile, Education, Project, SkillCategory, Skill, Certification, ContactMessage
+    from .signals import PORTFOLIO_MODELS
+
+    batch_size = 1000
+    Profile.objects.create(
+        name='Bench Mark', title='Synthetic profile', bio='Generated for benchmarking. ' * 10,
+        email='bench@example.com', phone='+10000000000',
+    )
+    Education.objects.bulk_create(
+        Education(degree=f'Degree {i}', institution=f'Institution {i}', start_year=2000 + i, end_year=2004 + i, order=i)
+        for i in range(3)
+    )
+    Project.objects.bulk_create((
+        Project(
+            title=f'Project {i}', description=f'Description of project {i}. ' * 5,
+            technologies='Python, Django, PostgreSQL', github_link=f'https://github.com/example/project-{i}', order=i,
+        )
+        for i in range(scale)
+    ), batch_size=batch_size)
+    categories = SkillCategory.objects.bulk_create(
+        SkillCategory(name=f'Category {i}', order=i) for i in range(max(scale // 10, 1))
+    )
+    Skill.objects.bulk_create((
+        Skill(category=categories[i % len(categories)], name=f'Skill {i}', order=i)
+        for i in range(scale)
+    ), batch_size=batch_size)
+    Certification.objects.bulk_create((
+        Certification(title=f'Certification {i}', issuer=f'Issuer {i % 7}', order=i)
+        for i in range(scale)
+    ), batch_size=batch_size)
+    ContactMessage.objects.bulk_create((
+        ContactMessage(name=f'Visitor {i}', email=f'visitor{i}@example.com', subject=f'Subject {i}', message='Hello! ' * 20)
+        for i in range(scale)
+    ), batch_size=batch_size)
+
+    snapshot.rebuild()
+    for model in PORTFOLIO_MODELS:
+        cache.bump_model_version(model)
+    cache.bump_content_version()
+
+
+def peak_memory(fn):
+    """Run ``fn`` once and return the peak memory it allocated, in KB."""
+    tracemalloc.start()
+    try:
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+class WSGILoadGenerator:
+    """
+    Drive the Django WSGI application in-process, from several threads, with
+    no sockets involved: the full middleware stack runs, the network does not.
+    """
+
+    def __init__(self, app=None):
+        self.app = app or WSGIHandler()
+
+    def environ(self, method, path, body=b'', content_type='', headers=None):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in (headers or {}).items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+        return environ
+
+    def request(self, method, path, body=b'', content_type='', headers=None):
+        """Return ``(status code, body)``."""
+        status = []
+        result = self.app(self.environ(method, path, body, content_type, headers), lambda s, h, exc_info=None: status.append(s))
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split()[0]), content
+
+    def get(self, path, headers=None):
+        return self.request('GET', path, headers=headers)
+
+    def post(self, path, data, headers=None):
+        return self.request('POST', path, urlencode(data).encode(), 'application/x-www-form-urlencoded', headers)
+
+    def run(self, send, total, concurrency):
+        """
+        Call ``send(self)`` ``total`` times from ``concurrency`` threads.
+        Returns ``(durations in ms, elapsed seconds, {status: count})``.
+        """
+        counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+        def worker(count):
+            durations, statuses = [], Counter()
+            for _ in range(count):
+                start = time.perf_counter()
+                statuses[send(self)[0]] += 1
+                durations.append((time.perf_counter() - start) * 1000)
+            return durations, statuses
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            # Stay on the calling thread (and its database connection).
+            results = [worker(total)]
+        else:
+            with ThreadPoolExecutor(concurrency) as pool:
+                results = list(pool.map(worker, counts))
+        durations, statuses = [], Counter()
+        for worker_durations, worker_statuses in results:
+            durations.extend(worker_durations)
+            statuses.update(worker_statuses)
+        return durations, time.perf_counter() - start, statuses
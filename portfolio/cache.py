@@ -0,0 +1,157 @@
+"""
+Rendered page cache for the portfolio.
+
+Pages are stored under a key that includes the current content version.
+The signals in ``portfolio.signals`` bump that version whenever portfolio
+content is saved or deleted, so a stale page is simply never looked up
+again and nothing has to be deleted explicitly.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+
+CONTENT_VERSION_KEY = 'portfolio:content-version'
+CONTENT_MODIFIED_KEY = 'portfolio:content-modified'
+STATS = ['hit', 'miss']
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.PORTFOLIO_CACHE_ALIAS]
+
+
+def _new_version():
+    # Versions are unique tokens rather than counters so that losing the
+    # cache can never bring an old version (and its pages) back to life.
+    return format(time.time_ns(), 'x')
+
+
+def _state_from_db():
+    """
+    Derive a version and last-modified time from the tables themselves, used
+    when the cache holds no version yet. Row counts are part of the version
+    so that deletes are noticed as well as saves.
+    """
+    from .signals import PORTFOLIO_MODELS
+
+    fingerprint = []
+    modified = None
+    for model in PORTFOLIO_MODELS:
+        row = model.objects.order_by().aggregate(count=Count('pk'), modified=Max('updated_at'))
+        fingerprint.append(f"{model.__name__}:{row['count']}:{row['modified']}")
+        if row['modified'] and (modified is None or row['modified'] > modified):
+            modified = row['modified']
+    version = hashlib.md5('|'.join(fingerprint).encode()).hexdigest()[:16]
+    return version, modified.timestamp() if modified else None
+
+
+def get_content_state():
+    """
+    Return ``(version, modified)`` for the current portfolio content, where
+    ``modified`` is a POSIX timestamp or None when there is no content yet.
+    A warm cache answers this without touching the database.
+    """
+    cache = get_cache()
+    state = cache.get_many([CONTENT_VERSION_KEY, CONTENT_MODIFIED_KEY])
+    if CONTENT_VERSION_KEY in state:
+        return state[CONTENT_VERSION_KEY], state.get(CONTENT_MODIFIED_KEY)
+
+    version, modified = _state_from_db()
+    if cache.add(CONTENT_VERSION_KEY, version):
+        cache.set(CONTENT_MODIFIED_KEY, modified)
+        return version, modified
+    return get_content_state()
+
+
+def get_content_version():
+    return get_content_state()[0]
+
+
+def bump_content_version():
+    get_cache().set_many({CONTENT_VERSION_KEY: _new_version(), CONTENT_MODIFIED_KEY: time.time()})
+
+
+def _model_version_key(model):
+    return f'portfolio:model-version:{model._meta.label_lower}'
+
+
+def get_model_versions(models):
+    """Return ``{model: version}``, the version counter owned by each model."""
+    cache = get_cache()
+    keys = {model: _model_version_key(model) for model in models}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for model, key in keys.items():
+        if key not in found:
+            version = _new_version()
+            if not cache.add(key, version):
+                version = cache.get(key, version)
+            found[key] = version
+        versions[model] = found[key]
+    return versions
+
+
+def bump_model_version(model):
+    get_cache().set(_model_version_key(model), _new_version())
+
+
+def _page_key(name, version):
+    return f'portfolio:page:{name}:{version}'
+
+
+def get_page(name):
+    """
+    Return ``(version, html)`` for a cached page. ``html`` is None on a miss;
+    the caller should render the page and store it under ``version``.
+    """
+    # Read the version before the caller queries anything, so a page rendered
+    # while content is being edited is stored under the old version.
+    version = get_content_version()
+    html = get_cache().get(_page_key(name, version))
+    record_stat('hit' if html is not None else 'miss')
+    return version, html
+
+
+def set_page(name, version, html):
+    get_cache().set(_page_key(name, version), html, settings.PORTFOLIO_PAGE_CACHE_TIMEOUT)
+
+
+def record_stat(stat, delta=1):
+    """
+    Count a hit, miss or timing. Counters live in this process unless
+    PORTFOLIO_SHARED_CACHE_STATS is on: adding them up in the cache costs a
+    cache write (a file rewrite with the file backend) on every lookup.
+    """
+    if not settings.PORTFOLIO_SHARED_CACHE_STATS:
+        with _stats_lock:
+            _stats[stat] += delta
+        return
+    cache = get_cache()
+    key = f'portfolio:stats:{stat}'
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta)
+
+
+def get_stats(stats=STATS):
+    if not settings.PORTFOLIO_SHARED_CACHE_STATS:
+        with _stats_lock:
+            return {stat: _stats[stat] for stat in stats}
+    cache = get_cache()
+    values = cache.get_many([f'portfolio:stats:{stat}' for stat in stats])
+    return {stat: values.get(f'portfolio:stats:{stat}', 0) for stat in stats}
+
+
+def reset_stats(stats=STATS):
+    with _stats_lock:
+        for stat in stats:
+            _stats.pop(stat, None)
+    get_cache().delete_many([f'portfolio:stats:{stat}' for stat in stats])
@@ -0,0 +1,155 @@
+"""
+Streaming CSV / JSON Lines exports.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and encoded one at a time, optionally through an
+incremental gzip compressor, so memory use does not depend on the number
+of rows. Datasets with a ``created_at`` column are exported oldest first
+and can be resumed from a ``(created_at, id)`` watermark.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+
+from django.http import StreamingHttpResponse
+
+from . import inbox
+from .models import (
+    Profile, Education, Project, SkillCategory, Skill, Certification, ContactMessage, ProjectDailyCount,
+    CertificationDailyCount, PageViewDailyCount,
+)
+
+DATASETS = {
+    'messages': ContactMessage,
+    'profile': Profile,
+    'education': Education,
+    'projects': Project,
+    'skill_categories': SkillCategory,
+    'skills': Skill,
+    'certifications': Certification,
+    'project_opens': ProjectDailyCount,
+    'certificate_opens': CertificationDailyCount,
+    'page_views': PageViewDailyCount,
+}
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def resumable(model):
+    return any(field.name == 'created_at' for field in model._meta.concrete_fields)
+
+
+def export_queryset(queryset, watermark=None):
+    """
+    Order ``queryset`` for export; with a ``watermark`` (see
+    ``inbox.encode_cursor``) only rows after it are kept.
+    """
+    if not resumable(queryset.model):
+        return queryset.order_by('pk')
+    if watermark:
+        return inbox.newer_than(queryset, *inbox.decode_cursor(watermark))
+    return queryset.order_by('created_at', 'id')
+
+
+class Export:
+    """
+    Iterates over the encoded export of ``queryset``. After the iteration
+    ``count`` is the number of rows, ``watermark`` the cursor of the last
+    row (to resume from next time) and ``first`` that of the first row.
+    """
+
+    def __init__(self, queryset, fmt='csv', compress=False, chunk_size=CHUNK_SIZE):
+        self.queryset = queryset
+        self.fields = columns(queryset.model)
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.first = self.watermark = None
+
+    def rows(self):
+        index = {field: position for position, field in enumerate(self.fields)}
+        for row in self.queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size):
+            self.count += 1
+            if 'created_at' in index:
+                self.watermark = inbox.cursor(row[index['created_at']], row[index['id']])
+                self.first = self.first or self.watermark
+            yield row
+
+    def lines(self):
+        if self.fmt == 'csv':
+            buffer = _LineBuffer()
+            writer = csv.writer(buffer)
+            yield writer.writerow(self.fields)
+            for row in self.rows():
+                yield writer.writerow([_csv_value(value) for value in row])
+        else:
+            for row in self.rows():
+                yield json.dumps(dict(zip(self.fields, row)), default=_json_default, ensure_ascii=False) + '\n'
+
+    def __iter__(self):
+        chunks = (line.encode() for line in self.lines())
+        if self.compress:
+            chunks = gzip_stream(chunks)
+        return _batched(chunks)
+
+    def filename(self, name):
+        return f'{name}.{self.fmt}{".gz" if self.compress else ""}'
+
+
+class _LineBuffer:
+    """A file-like object for csv.writer that hands back each line."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'Cannot export {type(value).__name__}')
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container.
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+def _batched(chunks, size=64 * 1024):
+    """Join small chunks into blocks of roughly ``size`` bytes."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def streaming_response(queryset, name, fmt='csv', compress=False):
+    export = Export(export_queryset(queryset), fmt, compress)
+    filename = export.filename(name)
+    response = StreamingHttpResponse(export, content_type='application/gzip' if compress else FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,166 @@
+"""
+Section-level fragment cache for the home page.
+
+Each section of ``index.html`` is rendered from its own template and cached
+under the version counters of the models it shows, so editing a
+Certification only re-renders the certifications section. The page frame
+(head, hero, about, contact and footer) is the ``profile`` fragment: it is
+rendered with a marker where each section goes and the cached sections are
+substituted into it. Fragments are rendered from ``portfolio.snapshot``.
+"""
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import cache, metrics, snapshot
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification
+
+logger = logging.getLogger(__name__)
+
+
+# name -> (models the section shows, template, snapshot key)
+SECTIONS = {
+    'education': ([Education], 'portfolio/sections/education.html', 'educations'),
+    'projects': ([Project], 'portfolio/sections/projects.html', 'projects'),
+    'skills': ([SkillCategory, Skill], 'portfolio/sections/skills.html', 'skill_categories'),
+    'certifications': ([Certification], 'portfolio/sections/certifications.html', 'certifications'),
+}
+
+FRAME = 'profile'
+FRAMES = {FRAME: ([Profile], 'portfolio/index.html', 'profile')}
+
+
+def get_profile():
+    return snapshot.load()['profile']
+
+
+def _marker(name):
+    return f'<!-- portfolio-section:{name} -->'
+
+
+def _fragment_key(name, models, versions):
+    return f'portfolio:fragment:{name}:' + ':'.join(versions[model] for model in models)
+
+
+def stat_names():
+    return [
+        f'fragment:{name}:{stat}'
+        for name in [FRAME, *SECTIONS]
+        for stat in ['hit', 'miss', 'hit_us', 'miss_us']
+    ]
+
+
+def _lookup(names):
+    """
+    Return ``(keys, html, timings)``: the cache key of each fragment and the
+    fragments found in the cache.
+    """
+    fragments = {name: FRAMES.get(name) or SECTIONS[name] for name in names}
+    versions = cache.get_model_versions({model for models, _, _ in fragments.values() for model in models})
+    keys = {name: _fragment_key(name, models, versions) for name, (models, _, _) in fragments.items()}
+
+    start = time.perf_counter()
+    found = cache.get_cache().get_many(keys.values())
+    lookup_us = int((time.perf_counter() - start) * 1_000_000)
+
+    html = {}
+    timings = {}
+    for name, key in keys.items():
+        if key in found:
+            html[name] = found[key]
+            timings[name] = ('hit', lookup_us / 1000)
+            cache.record_stat(f'fragment:{name}:hit')
+            cache.record_stat(f'fragment:{name}:hit_us', lookup_us)
+    return keys, html, timings
+
+
+def _render_missing(keys, html, timings, data, extra_context):
+    """Render the fragments of ``keys`` missing from ``html`` and cache them."""
+    missing = {}
+    for name, key in keys.items():
+        if name in html:
+            continue
+        start = time.perf_counter()
+        models, template, data_key = FRAMES.get(name) or SECTIONS[name]
+        context = {data_key: data[data_key]}
+        if name == FRAME:
+            context['sections'] = {section: mark_safe(_marker(section)) for section in SECTIONS}
+            context.update(extra_context or {})
+        with metrics.render_timer():
+            html[name] = render_to_string(template, context)
+        missing[key] = html[name]
+        elapsed_us = int((time.perf_counter() - start) * 1_000_000)
+        timings[name] = ('miss', elapsed_us / 1000)
+        cache.record_stat(f'fragment:{name}:miss')
+        cache.record_stat(f'fragment:{name}:miss_us', elapsed_us)
+    cache.get_cache().set_many(missing, settings.PORTFOLIO_PAGE_CACHE_TIMEOUT)
+
+
+def _log(timings):
+    logger.debug('Home fragments: %s', ', '.join(f'{name} {status} {ms:.2f}ms' for name, (status, ms) in timings.items()))
+
+
+def render_fragments(names, extra_context=None):
+    """
+    Return ``({name: html}, {name: (status, ms)})`` for the requested
+    fragments. Fragments missing from the cache are rendered from the
+    portfolio snapshot, which is loaded (one query) only if something missed.
+    """
+    keys, html, timings = _lookup(names)
+    if len(html) < len(keys):
+        _render_missing(keys, html, timings, snapshot.load(), extra_context)
+    _log(timings)
+    return html, timings
+
+
+async def arender_fragments(names, extra_context=None):
+    """
+    ``render_fragments`` for async views: the snapshot is read with the async
+    ORM, cache and template work runs in a worker thread.
+    """
+    keys, html, timings = await sync_to_async(_lookup)(names)
+    if len(html) < len(keys):
+        data = await snapshot.aload()
+        await sync_to_async(_render_missing)(keys, html, timings, data, extra_context)
+    _log(timings)
+    return html, timings
+
+
+def _sections(html):
+    return {name: mark_safe(html[name]) for name in SECTIONS}
+
+
+def _page(html):
+    page = html[FRAME]
+    for name in SECTIONS:
+        page = page.replace(_marker(name), html[name])
+    return page
+
+
+def render_sections():
+    """Return ``({section: safe html}, timings)`` for every section."""
+    html, timings = render_fragments(list(SECTIONS))
+    return _sections(html), timings
+
+
+async def arender_sections():
+    html, timings = await arender_fragments(list(SECTIONS))
+    return _sections(html), timings
+
+
+def render_page(extra_context=None):
+    """
+    Assemble the full home page from cached fragments. ``extra_context`` is
+    passed to the frame only (e.g. the CSRF placeholder).
+    """
+    html, timings = render_fragments([FRAME, *SECTIONS], extra_context)
+    return _page(html), timings
+
+
+async def arender_page(extra_context=None):
+    html, timings = await arender_fragments([FRAME, *SECTIONS], extra_context)
+    return _page(html), timings
@@ -0,0 +1,149 @@
+"""
+Responsive image derivatives.
+
+Every uploaded image is re-encoded as WebP (and AVIF when Pillow supports
+it) at a handful of widths. The derivatives are stored next to the original
+and recorded in the model's ``image_variants`` field, so templates can build
+``srcset`` attributes without opening any file:
+
+    {"background_image": {
+        "source": "backgrounds/back.jpg", "width": 2400, "height": 1600,
+        "webp": [[320, "backgrounds/back.320w.3f9a1c0b7e2d.webp"], ...],
+        "avif": [[320, "backgrounds/back.320w.b41e09d2c6a8.avif"], ...]}}
+
+Derivative names include a hash of their content, so regenerated bytes
+always get a new URL and media can be served as immutable.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import Profile, Project, SkillCategory, Skill, Certification
+
+IMAGE_FIELDS = {
+    Profile: ['profile_image', 'background_image'],
+    Project: ['image', 'video_poster'],
+    SkillCategory: ['icon'],
+    Skill: ['icon'],
+    Certification: ['certificate_image'],
+}
+
+FORMATS = [
+    fmt for fmt in ['avif', 'webp']
+    if features.check(fmt)
+]
+
+QUALITY = {'avif': 50, 'webp': 75}
+
+
+def variant_widths(width):
+    """
+    Widths to generate for an image that is ``width`` pixels wide. Images are
+    never upscaled; the original width is added when it falls between buckets.
+    """
+    widths = [w for w in settings.PORTFOLIO_IMAGE_WIDTHS if w < width]
+    if width <= max(settings.PORTFOLIO_IMAGE_WIDTHS):
+        widths.append(width)
+    return widths
+
+
+def _variant_name(name, width, fmt, data):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{width}w.{hashlib.sha256(data).hexdigest()[:12]}.{fmt}'
+
+
+def build_variants(field_file):
+    """
+    Generate derivatives for ``field_file`` and return its ``image_variants``
+    entry. Touches only storage and Pillow, so it is safe to run in a thread.
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.mode in ('LA', 'PA') or 'transparency' in image.info else 'RGB')
+
+    entry = {'source': field_file.name, 'width': image.width, 'height': image.height}
+    for fmt in FORMATS:
+        entry[fmt] = []
+        for width in variant_widths(image.width):
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+            data = buffer.getvalue()
+            name = _variant_name(field_file.name, width, fmt, data)
+            # The same name means the same bytes; never overwrite a file in place.
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(data))
+            entry[fmt].append([width, name])
+    return entry
+
+
+def stale_fields(instance, force=False):
+    """
+    Return the image fields of ``instance`` whose derivatives are missing or
+    were built from a different file.
+    """
+    fields = []
+    for field_name in IMAGE_FIELDS.get(type(instance), []):
+        field_file = getattr(instance, field_name)
+        entry = instance.image_variants.get(field_name)
+        if not field_file:
+            if entry:
+                fields.append(field_name)
+        elif force or not entry or entry.get('source') != field_file.name:
+            fields.append(field_name)
+    return fields
+
+
+def variant_names(entry):
+    return {name for fmt in ['avif', 'webp'] for width, name in (entry or {}).get(fmt, [])}
+
+
+def update_variants(instance, entries):
+    """
+    Store freshly built ``entries`` (field name -> entry or None) on
+    ``instance`` without sending another post_save, then delete the
+    derivatives they replace.
+    """
+    replaced = {
+        field_name: variant_names(instance.image_variants.get(field_name)) - variant_names(entry)
+        for field_name, entry in entries.items()
+    }
+    variants = dict(instance.image_variants)
+    for field_name, entry in entries.items():
+        if entry:
+            variants[field_name] = entry
+        else:
+            variants.pop(field_name, None)
+    instance.image_variants = variants
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=variants, updated_at=timezone.now())
+    for field_name, names in replaced.items():
+        storage = getattr(instance, field_name).storage
+        for name in names:
+            storage.delete(name)
+
+
+def process_instance(instance, force=False):
+    """
+    Build any missing derivatives for ``instance``. Returns True if its
+    ``image_variants`` changed.
+    """
+    fields = stale_fields(instance, force)
+    if not fields:
+        return False
+    entries = {}
+    for field_name in fields:
+        field_file = getattr(instance, field_name)
+        entries[field_name] = build_variants(field_file) if field_file else None
+    update_variants(instance, entries)
+    return True
@@ -0,0 +1,196 @@
+"""
+Manifest-driven ingestion of media files into model file fields.
+
+A manifest is a JSON list of entries::
+
+    {"model": "portfolio.Project", "lookup": {"title": "..."}, "field": "video", "path": "demo.mp4"}
+
+``lookup`` picks the object (the first one when it is omitted) and ``path``
+is relative to the base directory. Files are streamed into storage in
+chunks on a thread pool and hashed while they are copied. The
+``IngestedFile`` ledger records every source file's size, mtime and
+SHA-256, so unchanged files are skipped and identical content already in
+storage is reused instead of stored twice. Only the copying happens on the
+worker threads; all database work stays on the calling thread.
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.apps import apps
+from django.core.files import File
+
+from .models import IngestedFile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ManifestError(Exception):
+    pass
+
+
+class HashingFile(File):
+    """A File whose ``chunks()`` also feed a SHA-256 of everything read."""
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name)
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def chunks(self, chunk_size=None):
+        for chunk in super().chunks(chunk_size or CHUNK_SIZE):
+            self.sha256.update(chunk)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+@dataclass
+class Job:
+    instance: object
+    field_name: str
+    source: Path
+    size: int
+    mtime: float
+    ledger: object = None
+    # Filled in by the worker.
+    status: str = ''
+    stored_name: str = ''
+    sha256: str = ''
+    bytes_copied: int = 0
+    seconds: float = 0.0
+    error: Exception = None
+
+
+def read_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ManifestError('A manifest is a JSON list of entries')
+    for index, entry in enumerate(entries):
+        missing = {'model', 'field', 'path'} - set(entry)
+        if missing:
+            raise ManifestError(f'Entry {index} is missing {", ".join(sorted(missing))}')
+    return entries
+
+
+def hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def plan(entries, base_dir, force=False):
+    """
+    Resolve manifest entries into jobs. Returns ``(jobs, skipped)`` where
+    ``skipped`` lists ``(entry, reason)`` for entries that need no work.
+    """
+    ledger = {
+        entry.source_path: entry
+        for entry in IngestedFile.objects.filter(source_path__in=[str((Path(base_dir) / e['path']).resolve()) for e in entries])
+    }
+    jobs, skipped = [], []
+    for entry in entries:
+        model = apps.get_model(entry['model'])
+        instance = model.objects.filter(**entry.get('lookup', {})).first()
+        if instance is None:
+            skipped.append((entry, 'no matching object'))
+            continue
+        source = (Path(base_dir) / entry['path']).resolve()
+        if not source.is_file():
+            skipped.append((entry, 'file not found'))
+            continue
+        stat = source.stat()
+        known = ledger.get(str(source))
+        current = getattr(instance, entry['field']).name
+        if (not force and known and known.size == stat.st_size and known.mtime == stat.st_mtime
+                and current == known.storage_name):
+            skipped.append((entry, 'unchanged'))
+            continue
+        jobs.append(Job(instance, entry['field'], source, stat.st_size, stat.st_mtime, known))
+    return jobs, skipped
+
+
+def run_job(job, force=False):
+    """
+    Copy one file into storage (worker thread). Sets ``job.status`` to
+    ``copied``, or ``unchanged`` when only the mtime changed and the content
+    still matches the ledger.
+    """
+    start = time.perf_counter()
+    try:
+        field_file = getattr(job.instance, job.field_name)
+        storage = field_file.storage
+        current = field_file.name
+
+        # Hash without copying first when the stored file is probably the same.
+        if (not force and job.ledger and job.ledger.size == job.size and current == job.ledger.storage_name
+                and storage.exists(current)):
+            job.sha256 = hash_file(job.source)
+            if job.sha256 == job.ledger.sha256:
+                job.status, job.stored_name = 'unchanged', current
+                return job
+
+        with open(job.source, 'rb') as f:
+            content = HashingFile(f, job.source.name)
+            name = field_file.field.generate_filename(job.instance, job.source.name)
+            job.stored_name = storage.save(name, content, max_length=field_file.field.max_length)
+        job.sha256 = content.sha256.hexdigest()
+        job.bytes_copied = content.bytes_read
+        job.status = 'copied'
+    except Exception as e:
+        job.status, job.error = 'failed', e
+    finally:
+        job.seconds = time.perf_counter() - start
+    return job
+
+
+def deduplicate(jobs):
+    """
+    Point jobs whose content is already in storage (from the ledger or an
+    earlier job of this run) at the existing file and delete their copy.
+    """
+    stored = {}
+    for sha256, name in IngestedFile.objects.values_list('sha256', 'storage_name'):
+        stored.setdefault(sha256, []).append(name)
+    for job in jobs:
+        if job.status != 'copied':
+            continue
+        storage = getattr(job.instance, job.field_name).storage
+        existing = next((name for name in stored.get(job.sha256, []) if name != job.stored_name and storage.exists(name)), None)
+        if existing:
+            storage.delete(job.stored_name)
+            job.status, job.stored_name = 'duplicate', existing
+        else:
+            stored.setdefault(job.sha256, []).append(job.stored_name)
+
+
+def ingest(entries, base_dir, workers=4, force=False):
+    """
+    Ingest manifest entries. Returns ``(jobs, skipped, elapsed seconds)``;
+    the model fields and the ledger are updated for every successful job.
+    """
+    start = time.perf_counter()
+    jobs, skipped = plan(entries, base_dir, force)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = list(pool.map(lambda job: run_job(job, force), jobs))
+    deduplicate(jobs)
+
+    for job in jobs:
+        if job.status == 'failed':
+            continue
+        field_file = getattr(job.instance, job.field_name)
+        if field_file.name != job.stored_name:
+            field_file.name = job.stored_name
+            # Saved on this thread so the model signals (image variants,
+            # video processing, cache invalidation) run as for an admin upload.
+            job.instance.save(update_fields=[job.field_name])
+        IngestedFile.objects.update_or_create(
+            source_path=str(job.source),
+            defaults={'sha256': job.sha256, 'size': job.size, 'mtime': job.mtime, 'storage_name': job.stored_name},
+        )
+    return jobs, skipped, time.perf_counter() - start
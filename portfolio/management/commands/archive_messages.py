@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from portfolio import archive
+from portfolio.models import ContactMessage
+
+class Command(BaseCommand):
+    help = 'Moves contact messages older than the retention period into compressed archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.PORTFOLIO_MESSAGE_RETENTION_DAYS, help='Keep messages newer than this in the database')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE, help='Messages per segment file')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the messages that would be archived')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = ContactMessage.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f'{count} messages are older than {options["days"]} days ({cutoff:%Y-%m-%d %H:%M})')
+            return
+
+        total = size = 0
+        for segment in archive.archive(cutoff, options['batch_size']):
+            total += segment.count
+            size += segment.size
+            self.stdout.write(f'{segment.name}: {segment.count} messages, {segment.size / 1024:.0f} KB')
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {total} messages older than {options["days"]} days to {archive.archive_dir()} ({size / 1024 / 1024:.1f} MB)'
+        ))
@@ -0,0 +1,200 @@
+import itertools
+import json
+import platform
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.crypto import get_random_string
+from portfolio import cache, ratelimit
+from portfolio.benchmarks import WSGILoadGenerator, peak_memory, seed, summarize
+from portfolio.signals import PORTFOLIO_MODELS
+
+CONTACT = {'name': 'Load Test', 'email': 'load@example.com', 'subject': 'Load test', 'message': 'Benchmark message'}
+
+# metric -> True when lower is better. Query counts must never go up.
+METRICS = {
+    'home_cold_p50_ms': True,
+    'home_cold_p99_ms': True,
+    'home_warm_p50_ms': True,
+    'home_warm_p99_ms': True,
+    'home_warm_rps': False,
+    'home_cold_queries': True,
+    'home_warm_queries': True,
+    'home_cold_memory_kb': True,
+    'home_warm_memory_kb': True,
+    'contact_p50_ms': True,
+    'contact_rps': False,
+    'public_session_writes': True,
+    'contact_flood_rps': False,
+    'contact_flood_queries': True,
+}
+EXACT_METRICS = {'home_cold_queries', 'home_warm_queries', 'public_session_writes', 'contact_flood_queries'}
+SESSION_WRITES = ('INSERT INTO "django_session"', 'UPDATE "django_session"', 'DELETE FROM "django_session"')
+
+LOCMEM_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}', 'TIMEOUT': None}
+    for alias in ['default', settings.PORTFOLIO_CACHE_ALIAS]
+}
+
+
+def _cold():
+    # New versions for every model: the page and every fragment miss.
+    for model in PORTFOLIO_MODELS:
+        cache.bump_model_version(model)
+    cache.bump_content_version()
+
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic datasets in a test database and benchmarks the home page and contact form against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='10,1000', help='Comma-separated dataset sizes, e.g. 10,1000,100000')
+        parser.add_argument('--repeat', type=int, default=200, help='Warm home requests per scale')
+        parser.add_argument('--cold-repeat', type=int, default=10, help='Cold home requests per scale')
+        parser.add_argument('--contact', type=int, default=200, help='Contact form submissions per scale')
+        parser.add_argument('--flood', type=int, default=2000, help='Posts from one client in the rate-limited flood')
+        parser.add_argument('--concurrency', type=int, default=4, help='Threads driving the WSGI app')
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'benchmark-baseline.json'), help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative slowdown before failing (0.5 = 50%%)')
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',')]
+
+        # A throwaway test database and in-memory caches, so neither the real
+        # data nor the real page cache is touched.
+        if connection.vendor == 'sqlite':
+            # A file (not the shared in-memory database) lets the load
+            # generator's threads write concurrently.
+            connection.settings_dict['TEST']['NAME'] = str(settings.BASE_DIR / 'var' / 'benchmark.sqlite3')
+            Path(connection.settings_dict['TEST']['NAME']).parent.mkdir(parents=True, exist_ok=True)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = {}
+        try:
+            with override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_SLOW_REQUEST_MS=0):
+                for scale in scales:
+                    call_command('flush', interactive=False, verbosity=0)
+                    self.stdout.write(f'Seeding {scale} rows per model...')
+                    seed(scale)
+                    results[str(scale)] = self.measure(options)
+                    self.print_results(scale, results[str(scale)])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps({'machine': platform.platform(), 'scales': results}, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline to {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            # Timings depend on the machine, so no baseline is shipped; a
+            # missing one must not pass as a successful comparison.
+            raise CommandError(f'No baseline at {baseline_path}; run with --save-baseline to create one.')
+        self.compare(json.loads(baseline_path.read_text())['scales'], results, options['tolerance'])
+
+    def measure(self, options):
+        generator = WSGILoadGenerator()
+        secret = get_random_string(CSRF_SECRET_LENGTH, CSRF_ALLOWED_CHARS)
+        csrf = {'Cookie': f'{settings.CSRF_COOKIE_NAME}={secret}', 'X-CSRFToken': secret}
+        home = lambda generator: generator.get('/')
+        # Unique messages with a form token old enough to pass the spam checks.
+        form_token = ratelimit.form_token(time.time() - 60)
+        numbers = itertools.count()
+        post = lambda: dict(CONTACT, message=f'{CONTACT["message"]} {next(numbers)}', form_token=form_token)
+        contact = lambda generator: generator.post('/contact/', post(), headers=csrf)
+
+        def cold(generator):
+            _cold()
+            return generator.get('/')
+
+        results = {}
+        durations, elapsed, statuses = generator.run(cold, options['cold_repeat'], 1)
+        self.check_statuses('home (cold)', statuses, 200)
+        stats = summarize(durations)
+        results['home_cold_p50_ms'], results['home_cold_p99_ms'] = stats['p50'], stats['p99']
+
+        generator.get('/')
+        durations, elapsed, statuses = generator.run(home, options['repeat'], options['concurrency'])
+        self.check_statuses('home (warm)', statuses, 200)
+        stats = summarize(durations)
+        results['home_warm_p50_ms'], results['home_warm_p99_ms'] = stats['p50'], stats['p99']
+        results['home_warm_rps'] = len(durations) / elapsed
+
+        _cold()
+        with CaptureQueriesContext(connection) as queries:
+            generator.get('/')
+        results['home_cold_queries'] = len(queries)
+        with CaptureQueriesContext(connection) as queries:
+            generator.get('/')
+        results['home_warm_queries'] = len(queries)
+
+        _cold()
+        results['home_cold_memory_kb'] = peak_memory(lambda: generator.get('/'))
+        results['home_warm_memory_kb'] = peak_memory(lambda: generator.get('/'))
+
+        # Every post stored: the rate limits are lifted for this part.
+        with override_settings(PORTFOLIO_CONTACT_IP_RATE='1000000/s', PORTFOLIO_CONTACT_GLOBAL_RATE='1000000/s'):
+            durations, elapsed, statuses = generator.run(contact, options['contact'], options['concurrency'])
+        self.check_statuses('contact', statuses, 302)
+        results['contact_p50_ms'] = summarize(durations)['p50']
+        results['contact_rps'] = len(durations) / elapsed
+
+        # One visit: page, form post with its flash message, token fetch.
+        ratelimit.reset()
+        with CaptureQueriesContext(connection) as queries:
+            generator.get('/')
+            contact(generator)
+            generator.get('/contact/token/', headers=csrf)
+        results['public_session_writes'] = sum(query['sql'].startswith(SESSION_WRITES) for query in queries)
+
+        # One client flooding the form: past its first few posts, everything
+        # is answered 429 from the token bucket without touching the database.
+        ratelimit.reset()
+        durations, elapsed, statuses = generator.run(contact, options['flood'], options['concurrency'])
+        results['contact_flood_rps'] = len(durations) / elapsed
+        with CaptureQueriesContext(connection) as queries:
+            generator.run(contact, 100, 1)
+        results['contact_flood_queries'] = len(queries)
+        return results
+
+    def check_statuses(self, name, statuses, expected):
+        if set(statuses) != {expected}:
+            raise CommandError(f'{name}: expected only {expected} responses, got {dict(statuses)}')
+
+    def print_results(self, scale, results):
+        self.stdout.write(self.style.SUCCESS(f'\nScale {scale}'))
+        for metric, value in results.items():
+            self.stdout.write(f'  {metric:<22} {value:>12.2f}')
+        self.stdout.write('')
+
+    def compare(self, baseline, results, tolerance):
+        regressions = []
+        self.stdout.write(f'{"Scale":>8} {"Metric":<22} {"Baseline":>12} {"Now":>12} {"Change":>8}')
+        for scale, values in results.items():
+            if scale not in baseline:
+                self.stdout.write(self.style.WARNING(f'No baseline for scale {scale}'))
+                continue
+            for metric, lower_is_better in METRICS.items():
+                before, now = baseline[scale].get(metric), values[metric]
+                if before is None:
+                    continue
+                change = (now - before) / before * 100 if before else 0
+                if metric in EXACT_METRICS:
+                    regressed = now > before
+                elif lower_is_better:
+                    regressed = now > before * (1 + tolerance)
+                else:
+                    regressed = now < before * (1 - tolerance)
+                line = f'{scale:>8} {metric:<22} {before:>12.2f} {now:>12.2f} {change:>7.1f}%'
+                self.stdout.write(self.style.ERROR(line) if regressed else line)
+                if regressed:
+                    regressions.append(f'{metric} at scale {scale}')
+        if regressions:
+            raise CommandError(f'Performance regressions: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
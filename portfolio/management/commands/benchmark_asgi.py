@@ -0,0 +1,110 @@
+import asyncio
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from portfolio import cache, urls
+from portfolio.benchmarks import summarize
+from portfolio.models import ContactMessage
+from portfolio.signals import PORTFOLIO_MODELS
+
+CONTACT = {'name': 'Benchmark', 'email': 'bench@example.com', 'subject': 'Benchmark', 'message': 'Benchmark message'}
+
+
+def _urlconf(name, async_views):
+    urlconf = types.ModuleType(name)
+    urlconf.urlpatterns = urls.build_urlpatterns(async_views)
+    return urlconf
+
+
+def _cold():
+    # A new version for every model makes every fragment miss.
+    for model in PORTFOLIO_MODELS:
+        cache.bump_model_version(model)
+    cache.bump_content_version()
+
+
+SCENARIOS = {
+    'home-warm': (None, lambda client: client.get('/')),
+    'home-cold': (_cold, lambda client: client.get('/')),
+    'contact': (None, lambda client: client.post('/contact/', CONTACT)),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compares p50/p99 latency of the sync (WSGI) and async (ASGI) home and contact views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help='Requests per scenario and mode')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once')
+        parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='Only run these scenarios')
+
+    def handle(self, *args, **options):
+        repeat, concurrency = options['repeat'], options['concurrency']
+        last_message = ContactMessage.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        self.stdout.write(f'{"Scenario":<12} {"Mode":<6} {"p50":>9} {"p99":>9} {"mean":>9} {"req/s":>8}')
+        try:
+            for name in options['scenario'] or SCENARIOS:
+                setup, request = SCENARIOS[name]
+                # The spam checks would turn most contact posts away.
+                with override_settings(ROOT_URLCONF=_urlconf('benchmark_wsgi_urls', False),
+                                       PORTFOLIO_CONTACT_SPAM_CHECKS=False):
+                    self.report(name, 'wsgi', *self.run_wsgi(setup, request, repeat, concurrency))
+                with override_settings(ROOT_URLCONF=_urlconf('benchmark_asgi_urls', True),
+                                       PORTFOLIO_CONTACT_SPAM_CHECKS=False):
+                    self.report(name, 'asgi', *self.run_asgi(setup, request, repeat, concurrency))
+        finally:
+            ContactMessage.objects.filter(pk__gt=last_message, email=CONTACT['email']).delete()
+
+    def report(self, name, mode, durations, elapsed):
+        stats = summarize(durations)
+        self.stdout.write(
+            f'{name:<12} {mode:<6} {stats["p50"]:>7.2f}ms {stats["p99"]:>7.2f}ms {stats["mean"]:>7.2f}ms '
+            f'{len(durations) / elapsed:>8.0f}'
+        )
+
+    def run_wsgi(self, setup, request, repeat, concurrency):
+        # One client per thread, like one connection per gunicorn thread.
+        def worker(count):
+            client = Client()
+            durations = []
+            for _ in range(count):
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                request(client)
+                durations.append((time.perf_counter() - start) * 1000)
+            return durations
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = pool.map(worker, self.split(repeat, concurrency))
+            durations = [duration for result in results for duration in result]
+        return durations, time.perf_counter() - start
+
+    def run_asgi(self, setup, request, repeat, concurrency):
+        async def worker(count):
+            client = AsyncClient()
+            durations = []
+            for _ in range(count):
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                await request(client)
+                durations.append((time.perf_counter() - start) * 1000)
+            return durations
+
+        async def run():
+            results = await asyncio.gather(*(worker(count) for count in self.split(repeat, concurrency)))
+            return [duration for result in results for duration in result]
+
+        start = time.perf_counter()
+        durations = async_to_sync(run)()
+        return durations, time.perf_counter() - start
+
+    def split(self, repeat, concurrency):
+        return [repeat // concurrency + (1 if i < repeat % concurrency else 0) for i in range(concurrency)]
@@ -0,0 +1,59 @@
+from django.contrib.staticfiles import views as staticfiles_views
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponseNotFound
+from django.test import RequestFactory
+from portfolio.benchmarks import measure, response_body, summarize
+from portfolio.middleware import StaticFilesMiddleware
+
+class Command(BaseCommand):
+    help = 'Compares bytes on the wire and latency of plain vs hashed, precompressed static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Requests per file and mode')
+        parser.add_argument('--encoding', default='br, gzip', help='Accept-Encoding sent for the optimized requests')
+
+    def handle(self, *args, **options):
+        manifest = getattr(staticfiles_storage, 'hashed_files', {})
+        if not manifest:
+            raise CommandError('No staticfiles manifest found. Run "python manage.py collectstatic" first.')
+
+        factory = RequestFactory()
+        middleware = StaticFilesMiddleware(lambda request: HttpResponseNotFound())
+        repeat = options['repeat']
+
+        def before(name):
+            # What DEBUG static serving does today: the unhashed file, no compression.
+            request = factory.get('/static/' + name)
+            return staticfiles_views.serve(request, name, insecure=True)
+
+        def after(hashed_name):
+            request = factory.get('/static/' + hashed_name, HTTP_ACCEPT_ENCODING=options['encoding'])
+            return middleware(request)
+
+        self.stdout.write(f'{"File":<50} {"Before":>10} {"After":>10} {"Saved":>7} {"p50 before":>11} {"p50 after":>10}  Cache-Control')
+        totals = {'before': 0, 'after': 0}
+        for name, hashed_name in sorted(manifest.items()):
+            plain = before(name)
+            optimized = after(hashed_name)
+            if optimized.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'{name}: {optimized.status_code} from middleware, skipped'))
+                continue
+            before_bytes = len(response_body(plain))
+            after_bytes = len(response_body(optimized))
+            totals['before'] += before_bytes
+            totals['after'] += after_bytes
+
+            before_time = summarize(measure(lambda: response_body(before(name)), repeat))
+            after_time = summarize(measure(lambda: response_body(after(hashed_name)), repeat))
+            saved = (1 - after_bytes / before_bytes) * 100 if before_bytes else 0
+            self.stdout.write(
+                f'{name[:50]:<50} {before_bytes:>10} {after_bytes:>10} {saved:>6.1f}% '
+                f'{before_time["p50"]:>9.2f}ms {after_time["p50"]:>8.2f}ms  {optimized.get("Cache-Control", "")}'
+            )
+
+        saved = (1 - totals['after'] / totals['before']) * 100 if totals['before'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'\nTotal: {totals["before"]} bytes before, {totals["after"]} bytes after ({saved:.1f}% smaller). '
+            'Hashed files are immutable, so repeat visits send no request for them at all.'
+        ))
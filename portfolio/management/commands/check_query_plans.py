@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from portfolio import query_plans
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the home page and admin list queries and fails if one has to sort its rows'
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, plan, sorts in query_plans.check():
+            if sorts:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: sorts without an index'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: ok'))
+            if sorts or options['verbosity'] > 1:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries sort without an index on {connection.vendor}: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'All query plans use indexes ({connection.vendor})'))
@@ -0,0 +1,22 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from portfolio import snapshot
+
+class Command(BaseCommand):
+    help = 'Compares the portfolio snapshot with the live tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the snapshot if it is out of date')
+
+    def handle(self, *args, **options):
+        problems = snapshot.diff()
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Snapshot matches the live tables'))
+            return
+
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if options['fix']:
+            call_command('rebuild_snapshot', stdout=self.stdout)
+            return
+        raise CommandError(f'Snapshot is out of date ({len(problems)} differences). Run with --fix to rebuild it.')
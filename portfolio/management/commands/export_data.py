@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from portfolio import export
+
+class Command(BaseCommand):
+    help = 'Streams contact messages or portfolio content to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(export.DATASETS), help='What to export')
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument('--output', '-o', default='-', help='Output file (default: stdout)')
+        parser.add_argument('--since', help='Only rows after this watermark (printed by the previous export)')
+        parser.add_argument('--watermark-file', help='Read --since from this file and store the new watermark in it')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **options):
+        model = export.DATASETS[options['dataset']]
+        watermark = options['since']
+        watermark_file = Path(options['watermark_file']) if options['watermark_file'] else None
+        if (watermark or watermark_file) and not export.resumable(model):
+            raise CommandError(f'{options["dataset"]} has no created_at column to resume from')
+        if watermark_file and not watermark and watermark_file.exists():
+            watermark = watermark_file.read_text().strip() or None
+
+        data = export.Export(
+            export.export_queryset(model.objects.all(), watermark),
+            options['format'], options['gzip'], options['chunk_size'],
+        )
+        # Progress goes to stderr so the export itself can go to stdout.
+        log = self.stderr if options['output'] == '-' else self.stdout
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for block in data:
+                out.write(block)
+            out.flush()
+        else:
+            with open(options['output'], 'wb') as out:
+                for block in data:
+                    out.write(block)
+
+        if data.watermark and watermark_file:
+            watermark_file.write_text(data.watermark + '\n')
+        log.write(self.style.SUCCESS(f'Exported {data.count} rows'))
+        if data.watermark:
+            log.write(f'Watermark: {data.watermark} (resume with --since {data.watermark})')
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from portfolio import outbox
+
+class Command(BaseCommand):
+    help = 'Moves queued write-behind contact submissions into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='store_true', help='Only print how many submissions are waiting')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.stdout.write(f'{outbox.pending()} submissions waiting in {settings.PORTFOLIO_OUTBOX_PATH}')
+            return
+        count = outbox.flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {count} submissions'))
@@ -0,0 +1,87 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.utils import timezone
+from portfolio.models import MediaBlob
+from portfolio.storage import BLOB_PREFIX, ContentAddressedStorage
+
+
+def count_references():
+    """Count how many file fields and image variants point at each stored name."""
+    references = Counter()
+    for model in apps.get_app_config('portfolio').get_models():
+        file_fields = [field.name for field in model._meta.get_fields() if isinstance(field, models.FileField)]
+        has_variants = any(field.name == 'image_variants' for field in model._meta.get_fields())
+        if not file_fields and not has_variants:
+            continue
+        columns = file_fields + (['image_variants'] if has_variants else [])
+        for row in model.objects.values_list(*columns):
+            references.update(name for name in row[:len(file_fields)] if name)
+            if has_variants:
+                for entry in (row[-1] or {}).values():
+                    for value in entry.values():
+                        if isinstance(value, list):
+                            references.update(name for width, name in value)
+    return references
+
+
+class Command(BaseCommand):
+    help = 'Counts references to content-addressed media blobs and deletes blobs that nothing refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=float, default=24, help='Hours a blob must stay unreferenced before it is deleted')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError('gc_media only works with content-addressed media (PORTFOLIO_MEDIA_STORAGE=cas or s3)')
+
+        now = timezone.now()
+        references = count_references()
+        stored = set(storage.blob_names())
+        known = {blob.name: blob for blob in MediaBlob.objects.filter(name__in=stored)}
+
+        new, changed = [], []
+        for name in stored:
+            refcount = references.get(name, 0)
+            blob = known.get(name)
+            if blob is None:
+                new.append(MediaBlob(name=name, size=storage.size(name), refcount=refcount, orphaned_at=None if refcount else now))
+            elif blob.refcount != refcount or (blob.orphaned_at is None) != bool(refcount):
+                blob.refcount = refcount
+                blob.orphaned_at = None if refcount else blob.orphaned_at or now
+                changed.append(blob)
+        if not options['dry_run']:
+            MediaBlob.objects.bulk_create(new)
+            MediaBlob.objects.bulk_update(changed, ['refcount', 'orphaned_at'])
+            # Rows for blobs that were removed from storage some other way.
+            MediaBlob.objects.exclude(name__in=stored).delete()
+
+        blobs = new + list(known.values())
+        expired = [
+            blob for blob in blobs
+            if not blob.refcount and blob.orphaned_at and blob.orphaned_at <= now - timedelta(hours=options['grace'])
+        ]
+        for blob in expired:
+            self.stdout.write(f'{"Would delete" if options["dry_run"] else "Deleting"} {blob.name} ({blob.size / 1024:.0f} KB)')
+            if not options['dry_run']:
+                storage.purge(blob.name)
+        if not options['dry_run']:
+            MediaBlob.objects.filter(pk__in=[blob.pk for blob in expired]).delete()
+
+        missing = set(references) - stored
+        for name in sorted(missing):
+            if name.startswith(f'{BLOB_PREFIX}/'):
+                self.stdout.write(self.style.WARNING(f'Referenced but not stored: {name}'))
+
+        orphans = [blob for blob in blobs if not blob.refcount]
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(stored)} blobs, {sum(blob.size for blob in blobs) / 1024 / 1024:.1f} MB; '
+            f'{len(orphans)} unreferenced, {len(expired)} {"to delete" if options["dry_run"] else "deleted"} '
+            f'({sum(blob.size for blob in expired) / 1024 / 1024:.1f} MB)'
+        ))
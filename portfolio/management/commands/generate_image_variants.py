@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from portfolio import images
+from portfolio.signals import models_changed
+
+class Command(BaseCommand):
+    help = 'Generates WebP/AVIF derivatives for images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives even if they are up to date')
+        parser.add_argument('--workers', type=int, default=4, help='Number of images processed in parallel')
+
+    def handle(self, *args, **options):
+        # Collect (instance, field) jobs first; the encoding itself only needs
+        # storage and Pillow, so it can run on a thread pool while all
+        # database writes stay on this thread.
+        jobs = []
+        for model in images.IMAGE_FIELDS:
+            for instance in model.objects.all():
+                for field_name in images.stale_fields(instance, options['force']):
+                    jobs.append((instance, field_name))
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('All image variants are up to date'))
+            return
+
+        self.stdout.write(f'Processing {len(jobs)} images with {options["workers"]} workers...')
+
+        def build(job):
+            instance, field_name = job
+            field_file = getattr(instance, field_name)
+            try:
+                return images.build_variants(field_file) if field_file else None
+            except Exception as e:
+                return e
+
+        entries = {}
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for (instance, field_name), entry in zip(jobs, pool.map(build, jobs)):
+                if isinstance(entry, Exception):
+                    self.stdout.write(self.style.ERROR(f'Failed {instance} {field_name}: {entry}'))
+                    continue
+                entries.setdefault(instance, {})[field_name] = entry
+                if entry:
+                    count = sum(len(entry[fmt]) for fmt in images.FORMATS)
+                    self.stdout.write(self.style.SUCCESS(f'Built {count} variants for {entry["source"]}'))
+
+        for instance, instance_entries in entries.items():
+            images.update_variants(instance, instance_entries)
+        if entries:
+            models_changed({type(instance) for instance in entries})
+
+        self.stdout.write(self.style.SUCCESS(f'\nUpdated image variants for {len(entries)} objects'))
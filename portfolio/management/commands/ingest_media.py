@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from portfolio import ingest
+
+class Command(BaseCommand):
+    help = 'Copies the media files listed in a manifest into model file fields, skipping unchanged content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='JSON manifest of {model, lookup, field, path} entries')
+        parser.add_argument('--base-dir', default=str(settings.BASE_DIR), help='Directory the manifest paths are relative to')
+        parser.add_argument('--workers', type=int, default=4, help='Files copied in parallel')
+        parser.add_argument('--force', action='store_true', help='Copy files even if the ledger says they are unchanged')
+
+    def handle(self, *args, **options):
+        try:
+            entries = ingest.read_manifest(options['manifest'])
+        except (OSError, ValueError, ingest.ManifestError) as e:
+            raise CommandError(f'Could not read {options["manifest"]}: {e}')
+
+        jobs, skipped, elapsed = ingest.ingest(entries, options['base_dir'], options['workers'], options['force'])
+
+        for entry, reason in skipped:
+            style = self.style.WARNING if reason != 'unchanged' else str
+            self.stdout.write(style(f'Skipped {entry["path"]}: {reason}'))
+        for job in jobs:
+            if job.status == 'failed':
+                self.stdout.write(self.style.ERROR(f'Failed {job.source.name}: {job.error}'))
+                continue
+            rate = job.bytes_copied / job.seconds / 1024 / 1024 if job.seconds and job.bytes_copied else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'{job.status.capitalize():<10} {job.source.name} -> {job.stored_name} '
+                f'({job.size / 1024:.0f} KB, {job.seconds * 1000:.0f} ms, {rate:.1f} MB/s)'
+            ))
+
+        copied = [job for job in jobs if job.status == 'copied']
+        total_bytes = sum(job.bytes_copied for job in jobs)
+        counts = {status: sum(1 for job in jobs if job.status == status) for status in ['copied', 'duplicate', 'unchanged', 'failed']}
+        counts['unchanged'] += sum(1 for entry, reason in skipped if reason == 'unchanged')
+        throughput = total_bytes / elapsed / 1024 / 1024 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{len(copied)} copied, {counts["duplicate"]} deduplicated, {counts["unchanged"]} unchanged, '
+            f'{counts["failed"]} failed, {len(skipped) - sum(1 for entry, reason in skipped if reason == "unchanged")} skipped. '
+            f'{total_bytes / 1024 / 1024:.1f} MB in {elapsed:.2f}s ({throughput:.1f} MB/s with {options["workers"]} workers)'
+        ))
+        if counts['failed']:
+            raise CommandError(f'{counts["failed"]} files failed')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from portfolio.models import Project
+from portfolio.video import process_project_video
+
+class Command(BaseCommand):
+    help = 'Rewrites project videos for fast start and records their duration, size and poster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Process videos that were already processed')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Starting to process videos...'))
+        
+        for project in Project.objects.exclude(video=''):
+            if process_project_video(project, force=options['force']):
+                self.stdout.write(self.style.SUCCESS(
+                    f'Processed video for {project.title}: {project.video_width}x{project.video_height}, '
+                    f'{project.video_duration or 0:.1f}s, {project.video_size} bytes'
+                ))
+        
+        self.stdout.write(self.style.SUCCESS('\nSuccessfully processed all videos!'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from portfolio import cache, snapshot
+from portfolio.signals import PORTFOLIO_MODELS
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized portfolio snapshot the home page is rendered from'
+
+    def handle(self, *args, **options):
+        built = snapshot.rebuild()
+        for model in PORTFOLIO_MODELS:
+            cache.bump_model_version(model)
+        cache.bump_content_version()
+
+        data = built.data
+        counts = ', '.join(
+            f'{len(data[name])} {name.replace("_", " ")}'
+            for name in ['educations', 'projects', 'skill_categories', 'certifications']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt snapshot at {built.built_at:%Y-%m-%d %H:%M:%S}: {counts}'))
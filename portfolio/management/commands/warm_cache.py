@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from portfolio import cache, fragments
+from portfolio.signals import PORTFOLIO_MODELS, models_changed
+from portfolio.views import cached_home_html
+
+class Command(BaseCommand):
+    help = 'Renders the home page into the page cache and reports cache hit/miss counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true', help='Start a new content version before warming')
+        parser.add_argument('--stats', action='store_true', help='Only print the hit/miss counters')
+        parser.add_argument('--reset-stats', action='store_true', help='Reset the hit/miss counters')
+
+    def handle(self, *args, **options):
+        if options['reset_stats']:
+            cache.reset_stats()
+            cache.reset_stats(fragments.stat_names())
+            self.stdout.write(self.style.SUCCESS('Reset cache counters'))
+
+        if not options['stats']:
+            if options['refresh']:
+                models_changed(PORTFOLIO_MODELS)
+            html = cached_home_html()
+            self.stdout.write(self.style.SUCCESS(
+                f'Warmed home page ({len(html)} bytes, version {cache.get_content_version()})'
+            ))
+
+        stats = cache.get_stats()
+        total = stats['hit'] + stats['miss']
+        ratio = stats['hit'] / total * 100 if total else 0
+        self.stdout.write(f"Hits: {stats['hit']}  Misses: {stats['miss']}  Hit ratio: {ratio:.1f}%")
+
+        fragment_stats = cache.get_stats(fragments.stat_names())
+        self.stdout.write(f'\n{"Fragment":<16} {"Hits":>6} {"Misses":>7} {"Avg warm":>10} {"Avg cold":>10}')
+        for name in [fragments.FRAME, *fragments.SECTIONS]:
+            hits = fragment_stats[f'fragment:{name}:hit']
+            misses = fragment_stats[f'fragment:{name}:miss']
+            warm = fragment_stats[f'fragment:{name}:hit_us'] / hits / 1000 if hits else 0
+            cold = fragment_stats[f'fragment:{name}:miss_us'] / misses / 1000 if misses else 0
+            self.stdout.write(f'{name:<16} {hits:>6} {misses:>7} {warm:>8.2f}ms {cold:>8.2f}ms')
@@ -0,0 +1,235 @@
+"""
+Serving of uploaded media files.
+
+Supports conditional requests (ETag / Last-Modified), byte ranges including
+If-Range and multipart ranges, and hands whole files or single ranges to the
+server's ``wsgi.file_wrapper`` so gunicorn can use ``os.sendfile`` for them.
+Under ASGI the same bodies are streamed through an async iterator that reads
+each block in a worker thread, so a large video is never loaded into memory.
+"""
+import mimetypes
+import os
+import re
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+BLOCK_SIZE = 64 * 1024
+MAX_RANGES = 16
+
+
+class RangeFile:
+    """
+    A read-only view of ``length`` bytes of ``file`` starting at ``start``.
+
+    The underlying file is positioned at ``start`` so that servers using
+    ``os.sendfile`` (which read the position from the file descriptor and the
+    length from Content-Length) send exactly the requested range.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    # Uploaded files are never rewritten in place by Django (a new upload gets
+    # a new name), so size and mtime are a strong enough fingerprint.
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range`` header into a list of ``(start, end)`` pairs (inclusive).
+
+    Returns None when the header should be ignored (missing, malformed or not
+    in bytes) and an empty list when no range is satisfiable.
+    """
+    if not header or '=' not in header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        match = RANGE_RE.match(part)
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # Suffix range: the last N bytes.
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+        ranges.append((start, end))
+
+    if len(ranges) > MAX_RANGES:
+        # Many tiny ranges are a cheap way to make the server do a lot of
+        # work; serve the whole file instead.
+        return None
+    return ranges
+
+
+def _if_range_passes(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        # If-Range requires a strong comparison.
+        return parse_etags(if_range) == [etag]
+    date = parse_http_date_safe(if_range)
+    return date is not None and date == last_modified
+
+
+def _set_common_headers(response, etag, last_modified, cache_control):
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+async def _aiter(iterator):
+    """Consume a blocking iterator from async code, one item per thread hop."""
+    next_item = sync_to_async(next, thread_sensitive=False)
+    sentinel = object()
+    try:
+        while (item := await next_item(iterator, sentinel)) is not sentinel:
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+
+
+def _file_response(request, filelike, content_type, status=200):
+    if isinstance(request, ASGIRequest):
+        chunks = iter(lambda: filelike.read(BLOCK_SIZE), b'')
+        response = StreamingHttpResponse(_aiter(chunks), status=status, content_type=content_type)
+        response._resource_closers.append(filelike.close)
+        return response
+    response = FileResponse(filelike, status=status, content_type=content_type)
+    response.block_size = BLOCK_SIZE
+    return response
+
+
+def _multipart(full_path, ranges, size, content_type, boundary):
+    """Yield a multipart/byteranges body for ``ranges``."""
+    with open(full_path, 'rb') as f:
+        for start, end in ranges:
+            yield _part_header(boundary, content_type, start, end, size)
+            part = RangeFile(f, start, end - start + 1)
+            while chunk := part.read(BLOCK_SIZE):
+                yield chunk
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def _part_header(boundary, content_type, start, end, size):
+    return (
+        f'\r\n--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+    ).encode()
+
+
+def serve_file(request, full_path, cache_control, content_type=None, content_encoding=None):
+    """
+    Return a response for the file at ``full_path`` honouring conditional and
+    range requests. ``content_type`` and ``content_encoding`` override the
+    values guessed from the file name.
+    """
+    stat = os.stat(full_path)
+    size = stat.st_size
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _set_common_headers(response, etag, last_modified, cache_control)
+
+    guessed_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or guessed_type or 'application/octet-stream'
+    encoding = content_encoding or encoding
+
+    ranges = None
+    if request.method == 'GET' and _if_range_passes(request, etag, last_modified):
+        ranges = parse_range_header(request.META.get('HTTP_RANGE'), size)
+
+    if ranges == []:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return _set_common_headers(response, etag, last_modified, cache_control)
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response.headers['Content-Length'] = size
+    elif ranges is None:
+        response = _file_response(request, open(full_path, 'rb'), content_type)
+        response.headers['Content-Length'] = size
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        length = end - start + 1
+        response = _file_response(request, RangeFile(open(full_path, 'rb'), start, length), content_type, status=206)
+        response.headers['Content-Length'] = length
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        boundary = uuid.uuid4().hex
+        length = sum(
+            len(_part_header(boundary, content_type, start, end, size)) + end - start + 1
+            for start, end in ranges
+        ) + len(f'\r\n--{boundary}--\r\n')
+        body = _multipart(full_path, ranges, size, content_type, boundary)
+        if isinstance(request, ASGIRequest):
+            body = _aiter(body)
+        response = StreamingHttpResponse(
+            body,
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response.headers['Content-Length'] = length
+
+    if encoding and (content_encoding or not ranges):
+        response.headers['Content-Encoding'] = encoding
+    return _set_common_headers(response, etag, last_modified, cache_control)
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+    return serve_file(request, full_path, settings.PORTFOLIO_MEDIA_CACHE_CONTROL)
@@ -0,0 +1,168 @@
+"""
+Per-request performance numbers, collected by
+``portfolio.middleware.PerformanceMiddleware``.
+
+Each request's total time, database time, query count and template render
+time are added to per-view histograms kept in process memory and exposed in
+the Prometheus text format at ``/metrics``. Every worker process keeps its
+own histograms, so scrape each worker (or run one) to see them all.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+SECONDS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+
+# name -> (help text, buckets)
+HISTOGRAMS = {
+    'portfolio_request_duration_seconds': ('Total time spent in Django per request.', SECONDS_BUCKETS),
+    'portfolio_request_db_seconds': ('Time spent executing SQL per request.', SECONDS_BUCKETS),
+    'portfolio_request_render_seconds': ('Time spent rendering templates per request.', SECONDS_BUCKETS),
+    'portfolio_request_queries': ('SQL queries per request.', QUERY_BUCKETS),
+}
+
+_lock = threading.Lock()
+# (name, view) -> [bucket counts..., sum, count]
+_histograms = {}
+
+# The RequestTimings of the request being handled, for the template hook.
+current = contextvars.ContextVar('portfolio_request_timings', default=None)
+
+
+class RequestTimings:
+    """Numbers for a single request, filled in while it is handled."""
+
+    def __init__(self, capture_sql=False):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.sql = [] if capture_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db += elapsed
+            if self.sql is not None:
+                self.sql.append((elapsed, sql, params))
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+def observe(view, timings, total):
+    values = {
+        'portfolio_request_duration_seconds': total,
+        'portfolio_request_db_seconds': timings.db,
+        'portfolio_request_render_seconds': timings.render,
+        'portfolio_request_queries': timings.queries,
+    }
+    with _lock:
+        for name, value in values.items():
+            buckets = HISTOGRAMS[name][1]
+            histogram = _histograms.get((name, view))
+            if histogram is None:
+                histogram = _histograms[(name, view)] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def export():
+    """Return every histogram in the Prometheus text exposition format."""
+    with _lock:
+        snapshot = {key: list(values) for key, values in _histograms.items()}
+
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, view), values in sorted(snapshot.items()):
+            if metric != name:
+                continue
+            view = _label(view)
+            for bound, count in zip(buckets, values):
+                lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {values[-1]}')
+            lines.append(f'{name}_sum{{view="{view}"}} {values[-2]:.6f}')
+            lines.append(f'{name}_count{{view="{view}"}} {values[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    """
+    ``/metrics``. Requires ``Authorization: Bearer <PORTFOLIO_METRICS_TOKEN>``
+    when a token is configured; without one it is only available in DEBUG.
+    """
+    token = settings.PORTFOLIO_METRICS_TOKEN
+    if token:
+        if request.headers.get('Authorization', '') != f'Bearer {token}':
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        raise Http404
+    response = HttpResponse(export(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@contextlib.contextmanager
+def render_timer():
+    """
+    Add the time spent in the block to the render time of the request in
+    ``current``. Wraps the portfolio's own template rendering only; the admin
+    and other apps' templates are not timed.
+    """
+    timings = current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.render += time.perf_counter() - start
+
+
+def _timed_execute(execute, sql, params, many, context):
+    # Installed on every connection. The request's timings come from the
+    # context, which sync_to_async carries into worker threads, so queries
+    # of async views are counted too.
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def _add_sql_timing(connection, **kwargs):
+    # At the bottom of the stack: a connection can be created inside a
+    # caller's ``with connection.execute_wrapper(...)``, whose exit pops the
+    # last wrapper.
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _timed_execute)
+
+
+def install_sql_timing():
+    """Time the SQL of the request in ``current`` on every connection. Idempotent."""
+    connection_created.connect(_add_sql_timing, dispatch_uid='portfolio.metrics.sql_timing')
+    for connection in connections.all(initialized_only=True):
+        _add_sql_timing(connection)
@@ -0,0 +1,239 @@
+import logging
+import mimetypes
+import os
+import time
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.exceptions import SessionInterrupted
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+from . import metrics
+from .media import serve_file
+
+slow_logger = logging.getLogger('portfolio.slow')
+
+# Preferred order when the client accepts several encodings.
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(header):
+    """Return the content codings a client accepts (q > 0) from Accept-Encoding."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serve collected static files from STATIC_ROOT, picking the brotli or gzip
+    variant built by ``CompressedManifestStaticFilesStorage`` when the client
+    accepts it. Files with a content hash in their name (as listed in the
+    manifest) are marked immutable.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = settings.STATIC_ROOT
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_static(self, request):
+        return request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix) and self.root
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.is_static(request):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_static(request):
+            # File system checks and the open() block; keep them off the loop.
+            response = await sync_to_async(self.serve, thread_sensitive=False)(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        if name in self.hashed_names:
+            cache_control = settings.PORTFOLIO_STATIC_CACHE_CONTROL
+        else:
+            cache_control = 'public, max-age=60'
+
+        variants = [(coding, path + suffix) for coding, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for coding, variant in variants:
+            if coding in accepted:
+                content_type = mimetypes.guess_type(path)[0]
+                response = serve_file(request, variant, cache_control, content_type=content_type, content_encoding=coding)
+                break
+        else:
+            response = serve_file(request, path, cache_control)
+
+        if variants:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Measure every request: total time, SQL query count and time (through
+    ``connection.execute_wrapper``) and the time spent rendering the
+    portfolio's templates (``metrics.render_timer``). The numbers go
+    to the per-view histograms in ``portfolio.metrics`` and, in DEBUG or
+    when PORTFOLIO_SERVER_TIMING is on, into a ``Server-Timing`` header. Requests
+    slower than PORTFOLIO_SLOW_REQUEST_MS are logged with their SQL.
+
+    Should be the first middleware so that the others are included. Works
+    in both sync and async stacks, so ASGI requests stay async throughout.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = settings.PORTFOLIO_SLOW_REQUEST_MS
+        metrics.install_sql_timing()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = metrics.RequestTimings(capture_sql=bool(self.slow_ms))
+        token = metrics.current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = metrics.RequestTimings(capture_sql=bool(self.slow_ms))
+        token = metrics.current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.total()
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.observe(view, timings, total)
+
+        if settings.PORTFOLIO_SERVER_TIMING or settings.DEBUG:
+            response['Server-Timing'] = (
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+                f'render;dur={timings.render * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+        if self.slow_ms and total * 1000 >= self.slow_ms:
+            self.log_slow(request, view, timings, total)
+        return response
+
+    def log_slow(self, request, view, timings, total):
+        statements = '\n'.join(
+            f'  {elapsed * 1000:8.2f}ms  {sql}  {params!r}'
+            for elapsed, sql, params in sorted(timings.sql, key=lambda item: item[0], reverse=True)
+        )
+        slow_logger.warning(
+            'Slow request %s %s (%s): %.1fms total, %.1fms in %d queries, %.1fms rendering\n%s',
+            request.method, request.get_full_path(), view, total * 1000,
+            timings.db * 1000, timings.queries, timings.render * 1000, statements,
+        )
+
+
+class SplitSessionMiddleware(SessionMiddleware):
+    """
+    SESSION_ENGINE (database) sessions under PORTFOLIO_DB_SESSION_PATHS (the
+    admin), PORTFOLIO_PUBLIC_SESSION_ENGINE (signed cookies) everywhere else.
+    Public sessions use their own cookie, PORTFOLIO_PUBLIC_SESSION_COOKIE_NAME,
+    so public pages neither read nor overwrite an admin login, and anonymous
+    traffic never writes to the session table.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.PublicSessionStore = import_module(settings.PORTFOLIO_PUBLIC_SESSION_ENGINE).SessionStore
+
+    def uses_db_session(self, request):
+        return request.path_info.startswith(tuple(settings.PORTFOLIO_DB_SESSION_PATHS))
+
+    def process_request(self, request):
+        if self.uses_db_session(request):
+            return super().process_request(request)
+        request.session = self.PublicSessionStore(request.COOKIES.get(settings.PORTFOLIO_PUBLIC_SESSION_COOKIE_NAME))
+
+    def process_response(self, request, response):
+        if self.uses_db_session(request):
+            return super().process_response(request, response)
+        # SessionMiddleware.process_response with the public cookie name; the
+        # other cookie settings are shared.
+        cookie = settings.PORTFOLIO_PUBLIC_SESSION_COOKIE_NAME
+        try:
+            accessed = request.session.accessed
+            modified = request.session.modified
+            empty = request.session.is_empty()
+        except AttributeError:
+            return response
+        if cookie in request.COOKIES and empty:
+            response.delete_cookie(
+                cookie, path=settings.SESSION_COOKIE_PATH, domain=settings.SESSION_COOKIE_DOMAIN,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            accessed = True
+        elif (modified or settings.SESSION_SAVE_EVERY_REQUEST) and not empty and response.status_code < 500:
+            if request.session.get_expire_at_browser_close():
+                max_age = expires = None
+            else:
+                max_age = request.session.get_expiry_age()
+                expires = http_date(time.time() + max_age)
+            try:
+                request.session.save()
+            except UpdateError:
+                raise SessionInterrupted("The request's session was deleted before the request completed.")
+            response.set_cookie(
+                cookie, request.session.session_key, max_age=max_age, expires=expires,
+                domain=settings.SESSION_COOKIE_DOMAIN, path=settings.SESSION_COOKIE_PATH,
+                secure=settings.SESSION_COOKIE_SECURE or None, httponly=settings.SESSION_COOKIE_HTTPONLY or None,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            accessed = True
+        if accessed:
+            patch_vary_headers(response, ('Cookie',))
+        return response
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='video_duration',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='video_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='video_poster',
+            field=models.ImageField(blank=True, null=True, upload_to='project_posters/'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='video_processed',
+            field=models.CharField(blank=True, editable=False, help_text='Video file the metadata was read from', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='video_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='video_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
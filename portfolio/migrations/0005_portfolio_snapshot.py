@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_project_video_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
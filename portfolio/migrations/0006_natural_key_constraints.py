@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# (model, natural key, field renamed to tell duplicates apart)
+NATURAL_KEYS = [
+    ('certification', ['title'], 'title'),
+    ('education', ['degree', 'institution'], 'degree'),
+    ('profile', ['name'], 'name'),
+    ('project', ['title'], 'title'),
+    ('skill', ['category', 'name'], 'name'),
+    ('skillcategory', ['name'], 'name'),
+]
+
+
+def rename_duplicates(apps, schema_editor):
+    """
+    Rows created in the admin may share a natural key. Keep the oldest row
+    of each group and add " (2)", " (3)", ... to the others, so the
+    constraints can be added; nothing is deleted.
+    """
+    for model_name, fields, field in NATURAL_KEYS:
+        model = apps.get_model('portfolio', model_name)
+        max_length = model._meta.get_field(field).max_length
+        groups = model.objects.values(*fields).annotate(rows=Count('pk')).filter(rows__gt=1)
+        for group in groups:
+            del group['rows']
+            number = 1
+            for row in model.objects.filter(**group).order_by('pk')[1:]:
+                value = None
+                while value is None or model.objects.filter(**{**group, field: value}).exists():
+                    number += 1
+                    suffix = f' ({number})'
+                    value = getattr(row, field)[:max_length - len(suffix)] + suffix
+                setattr(row, field, value)
+                row.save(update_fields=[field])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_portfolio_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='certification',
+            constraint=models.UniqueConstraint(fields=('title',), name='portfolio_certification_unique_title'),
+        ),
+        migrations.AddConstraint(
+            model_name='education',
+            constraint=models.UniqueConstraint(fields=('degree', 'institution'), name='portfolio_education_unique_degree'),
+        ),
+        migrations.AddConstraint(
+            model_name='profile',
+            constraint=models.UniqueConstraint(fields=('name',), name='portfolio_profile_unique_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(fields=('title',), name='portfolio_project_unique_title'),
+        ),
+        migrations.AddConstraint(
+            model_name='skill',
+            constraint=models.UniqueConstraint(fields=('category', 'name'), name='portfolio_skill_unique_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='skillcategory',
+            constraint=models.UniqueConstraint(fields=('name',), name='portfolio_skillcategory_unique_name'),
+        ),
+    ]
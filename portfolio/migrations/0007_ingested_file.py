@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_natural_key_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_path', models.CharField(max_length=500, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('mtime', models.FloatField()),
+                ('storage_name', models.CharField(max_length=255)),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
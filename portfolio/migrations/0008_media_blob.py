@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_ingested_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('orphaned_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('counted_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
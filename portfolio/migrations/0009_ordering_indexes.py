@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certification',
+            index=models.Index(fields=['order', '-issue_date', '-id'], name='portfolio_cert_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at', '-id'], name='portfolio_msg_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at', '-id'], name='portfolio_msg_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['-end_year', '-start_year', '-id'], name='portfolio_edu_years_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at', '-id'], name='portfolio_project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['category', 'order', '-id'], name='portfolio_skill_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillcategory',
+            index=models.Index(fields=['order', '-id'], name='portfolio_skillcat_order_idx'),
+        ),
+    ]
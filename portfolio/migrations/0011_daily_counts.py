@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_message_archive_segment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageViewDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificationDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('certification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='portfolio.certification')),
+            ],
+            options={
+                'ordering': ['-day', 'certification_id'],
+                'indexes': [models.Index(fields=['-day', 'certification'], name='portfolio_cert_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('certification', 'day'), name='portfolio_cert_count_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('github', 'GitHub link'), ('live', 'Live demo'), ('video', 'Video played')], max_length=10)),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='portfolio.project')),
+            ],
+            options={
+                'ordering': ['-day', 'project_id', 'event'],
+                'indexes': [models.Index(fields=['-day', 'project', 'event'], name='portfolio_project_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'event', 'day'), name='portfolio_project_count_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_daily_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certification',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='skill',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='skillcategory',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import URLValidator
 
 class Profile(models.Model):
@@ -12,9 +13,12 @@ class Profile(models.Model):
     github_url = models.URLField(blank=True)
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
     background_image = models.ImageField(upload_to='backgrounds/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Profile"
+        constraints = [models.UniqueConstraint(fields=['name'], name='portfolio_profile_unique_name')]
     
     def __str__(self):
         return self.name
@@ -26,10 +30,13 @@ class Education(models.Model):
     end_year = models.IntegerField(blank=True, null=True)
     description = models.TextField(blank=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-end_year', '-start_year']
+        indexes = [models.Index(fields=['-end_year', '-start_year', '-id'], name='portfolio_edu_years_idx')]
         verbose_name_plural = "Education"
+        constraints = [models.UniqueConstraint(fields=['degree', 'institution'], name='portfolio_education_unique_degree')]
     
     def __str__(self):
         return f"{self.degree} - {self.institution}"
@@ -41,12 +48,22 @@ class Project(models.Model):
     github_link = models.URLField(blank=True)
     live_link = models.URLField(blank=True)
     video = models.FileField(upload_to='project_videos/', blank=True, null=True)
+    video_poster = models.ImageField(upload_to='project_posters/', blank=True, null=True)
+    video_duration = models.FloatField(blank=True, null=True, editable=False)
+    video_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    video_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    video_size = models.BigIntegerField(blank=True, null=True, editable=False)
+    video_processed = models.CharField(max_length=255, blank=True, editable=False, help_text="Video file the metadata was read from")
     image = models.ImageField(upload_to='project_images/', blank=True, null=True)
-    order = models.IntegerField(default=0)
+    order = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [models.Index(fields=['order', '-created_at', '-id'], name='portfolio_project_order_idx')]
+        constraints = [models.UniqueConstraint(fields=['title'], name='portfolio_project_unique_title')]
     
     def __str__(self):
         return self.title
@@ -54,11 +71,15 @@ class Project(models.Model):
 class SkillCategory(models.Model):
     name = models.CharField(max_length=100)
     icon = models.ImageField(upload_to='skill_icons/', blank=True, null=True)
-    order = models.IntegerField(default=0)
+    order = models.FloatField(default=0)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order']
+        indexes = [models.Index(fields=['order', '-id'], name='portfolio_skillcat_order_idx')]
         verbose_name_plural = "Skill Categories"
+        constraints = [models.UniqueConstraint(fields=['name'], name='portfolio_skillcategory_unique_name')]
     
     def __str__(self):
         return self.name
@@ -67,10 +88,14 @@ class Skill(models.Model):
     category = models.ForeignKey(SkillCategory, on_delete=models.CASCADE, related_name='skills')
     name = models.CharField(max_length=100)
     icon = models.ImageField(upload_to='skill_icons/', blank=True, null=True)
-    order = models.IntegerField(default=0)
+    order = models.FloatField(default=0)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['category', 'order']
+        indexes = [models.Index(fields=['category', 'order', '-id'], name='portfolio_skill_order_idx')]
+        constraints = [models.UniqueConstraint(fields=['category', 'name'], name='portfolio_skill_unique_name')]
     
     def __str__(self):
         return f"{self.category.name} - {self.name}"
@@ -81,11 +106,15 @@ class Certification(models.Model):
     certificate_image = models.ImageField(upload_to='certificates/', blank=True, null=True)
     certificate_file = models.FileField(upload_to='certificates/', blank=True, null=True)
     issue_date = models.DateField(blank=True, null=True)
-    order = models.IntegerField(default=0)
+    order = models.FloatField(default=0)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', '-issue_date']
+        indexes = [models.Index(fields=['order', '-issue_date', '-id'], name='portfolio_cert_order_idx')]
         verbose_name_plural = "Certifications"
+        constraints = [models.UniqueConstraint(fields=['title'], name='portfolio_certification_unique_title')]
     
     def __str__(self):
         return self.title
@@ -100,6 +129,124 @@ class ContactMessage(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='portfolio_msg_created_idx'),
+            # The inbox is mostly read filtered to unread messages.
+            models.Index(fields=['-created_at', '-id'], name='portfolio_msg_unread_idx', condition=models.Q(is_read=False)),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+class PortfolioSnapshot(models.Model):
+    """
+    The whole home page content, assembled and serialized into one row so the
+    page can be rendered from a single query. Rebuilt by ``portfolio.snapshot``
+    whenever portfolio content changes.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.built_at:%Y-%m-%d %H:%M:%S})"
+
+class IngestedFile(models.Model):
+    """
+    Ledger of files copied into media storage by ``ingest_media``: which
+    source file, its content hash, and the stored file it became.
+    """
+    source_path = models.CharField(max_length=500, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    mtime = models.FloatField()
+    storage_name = models.CharField(max_length=255)
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_path} -> {self.storage_name}"
+
+
+class MediaBlob(models.Model):
+    """
+    A blob in content-addressed media storage and the number of model fields
+    that refer to it, as last counted by ``gc_media``. Blobs that stay
+    unreferenced for the grace period are deleted.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    orphaned_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    counted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class MessageArchiveSegment(models.Model):
+    """
+    A gzipped JSON Lines file of archived contact messages. Segments are
+    written once and never changed; the date range lets a search open only
+    the segments that can match.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    count = models.PositiveIntegerField()
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-last_created_at']
+        indexes = [models.Index(fields=['-last_created_at', 'first_created_at'], name='portfolio_segment_range_idx')]
+
+    def __str__(self):
+        return self.name
+
+
+class ProjectDailyCount(models.Model):
+    """Opens of a project's links and video per day, written in batches by ``portfolio.analytics``."""
+    EVENTS = [('github', 'GitHub link'), ('live', 'Live demo'), ('video', 'Video played')]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_counts')
+    event = models.CharField(max_length=10, choices=EVENTS)
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'project_id', 'event']
+        constraints = [models.UniqueConstraint(fields=['project', 'event', 'day'], name='portfolio_project_count_unique')]
+        indexes = [models.Index(fields=['-day', 'project', 'event'], name='portfolio_project_count_idx')]
+
+    def __str__(self):
+        return f"{self.project} {self.event} on {self.day}: {self.count}"
+
+
+class CertificationDailyCount(models.Model):
+    """Certificate opens per day."""
+    certification = models.ForeignKey(Certification, on_delete=models.CASCADE, related_name='daily_counts')
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'certification_id']
+        constraints = [models.UniqueConstraint(fields=['certification', 'day'], name='portfolio_cert_count_unique')]
+        indexes = [models.Index(fields=['-day', 'certification'], name='portfolio_cert_count_idx')]
+
+    def __str__(self):
+        return f"{self.certification} on {self.day}: {self.count}"
+
+
+class PageViewDailyCount(models.Model):
+    """Home page views per day."""
+    day = models.DateField(unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.day}: {self.count}"
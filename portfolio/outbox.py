@@ -0,0 +1,155 @@
+"""
+Write-behind queue for contact form submissions.
+
+With ``PORTFOLIO_CONTACT_WRITE_BEHIND`` on, ``contact_submit`` appends each
+valid submission to a small SQLite outbox file (``PORTFOLIO_OUTBOX_PATH``)
+and returns as soon as that append is on disk, instead of waiting for the
+main database. A flusher thread in every worker moves submissions into
+``ContactMessage`` with ``bulk_create`` in batches.
+
+Delivery is at-least-once: a batch is claimed for ``LEASE_SECONDS``, inserted,
+and only then removed from the outbox, so a worker that dies mid-batch
+leaves it to be retried by another one. When more than
+``PORTFOLIO_OUTBOX_MAX_PENDING`` submissions are waiting, ``enqueue()``
+raises ``OutboxFull`` and the view answers 503. Workers flush on exit
+(``atexit`` and gunicorn's ``worker_exit`` hook); ``manage.py flush_outbox``
+drains the queue by hand.
+"""
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 60
+FIELDS = ['name', 'email', 'subject', 'message']
+
+_local = threading.local()
+_flusher = None
+_flusher_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+
+
+class OutboxFull(Exception):
+    pass
+
+
+def _connect():
+    path = str(settings.PORTFOLIO_OUTBOX_PATH)
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=10, isolation_level=None)
+        # WAL lets workers append while a flusher reads; FULL makes every
+        # commit durable before enqueue() returns.
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=FULL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY, payload TEXT NOT NULL, enqueued_at REAL NOT NULL, '
+            'claim TEXT, claimed_at REAL)'
+        )
+        _local.connection, _local.path = connection, path
+    return connection
+
+
+def pending(limit=None):
+    """Number of queued submissions (counting stops at ``limit``)."""
+    sql = 'SELECT COUNT(*) FROM outbox' if limit is None else 'SELECT COUNT(*) FROM (SELECT 1 FROM outbox LIMIT ?)'
+    return _connect().execute(sql, () if limit is None else (limit,)).fetchone()[0]
+
+
+def enqueue(fields):
+    """Durably queue a submission (a dict of ``FIELDS``)."""
+    limit = settings.PORTFOLIO_OUTBOX_MAX_PENDING
+    waiting = pending(limit)
+    if waiting >= limit:
+        raise OutboxFull(f'{limit} submissions are already waiting')
+    payload = json.dumps({field: fields[field] for field in FIELDS})
+    _connect().execute('INSERT INTO outbox (payload, enqueued_at) VALUES (?, ?)', (payload, time.time()))
+    start_flusher()
+    if waiting + 1 >= settings.PORTFOLIO_OUTBOX_BATCH_SIZE:
+        # A full batch is waiting: flush now rather than at the next tick.
+        _wake.set()
+
+
+def _claim(batch_size):
+    connection = _connect()
+    claim, now = uuid.uuid4().hex, time.time()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute(
+            'UPDATE outbox SET claim = ?, claimed_at = ? WHERE id IN ('
+            'SELECT id FROM outbox WHERE claim IS NULL OR claimed_at < ? ORDER BY id LIMIT ?)',
+            (claim, now, now - LEASE_SECONDS, batch_size),
+        )
+        rows = connection.execute('SELECT id, payload FROM outbox WHERE claim = ? ORDER BY id', (claim,)).fetchall()
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    return claim, rows
+
+
+def flush(batch_size=None):
+    """Move queued submissions into the database. Returns how many were moved."""
+    batch_size = batch_size or settings.PORTFOLIO_OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        claim, rows = _claim(batch_size)
+        if not rows:
+            return total
+        ContactMessage.objects.bulk_create(ContactMessage(**json.loads(payload)) for id, payload in rows)
+        _connect().execute('DELETE FROM outbox WHERE claim = ?', (claim,))
+        total += len(rows)
+
+
+def _run():
+    interval = settings.PORTFOLIO_OUTBOX_FLUSH_INTERVAL
+    while not _stop.is_set():
+        _wake.wait(interval)
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception('Could not flush the contact outbox')
+        finally:
+            close_old_connections()
+
+
+def start_flusher():
+    """Start this process's flusher thread (once); a zero interval disables it."""
+    global _flusher
+    if _flusher is not None or not settings.PORTFOLIO_OUTBOX_FLUSH_INTERVAL:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run, name='contact-outbox', daemon=True)
+            _flusher.start()
+            atexit.register(shutdown)
+
+
+def shutdown(timeout=10):
+    """Stop the flusher and flush what is left; called when a worker exits."""
+    global _flusher
+    _stop.set()
+    _wake.set()
+    if _flusher is not None:
+        _flusher.join(timeout)
+        _flusher = None
+    try:
+        flush()
+    except Exception:
+        logger.exception('Could not flush the contact outbox on shutdown')
+    _stop.clear()
@@ -0,0 +1,90 @@
+"""
+EXPLAIN checks for the queries behind the home page and the admin lists.
+
+Each hot query is explained on the current database, and a plan that
+sorts its rows (SQLite's ``USE TEMP B-TREE FOR ORDER BY``, a PostgreSQL
+``Sort`` node) is reported: it means the ordering is not served by an
+index, so the query reads and sorts the whole table. On PostgreSQL
+sequential scans and sorts are disabled while explaining, so the planner
+picks an index whenever one fits, however small the tables are.
+"""
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from . import inbox, snapshot
+from .models import (
+    Certification, CertificationDailyCount, ContactMessage, Education, PageViewDailyCount, PortfolioSnapshot, Project,
+    ProjectDailyCount, Skill, SkillCategory,
+)
+
+# (model, changelist query string) for the admin lists that are checked.
+ADMIN_LISTS = [
+    (ContactMessage, {}),
+    (ContactMessage, {'is_read__exact': '0'}),
+    (ContactMessage, {'is_read__exact': '1'}),
+    (Project, {}),
+    (Certification, {}),
+    (Education, {}),
+    (SkillCategory, {}),
+    (Skill, {}),
+    (ProjectDailyCount, {}),
+    (CertificationDailyCount, {}),
+    (PageViewDailyCount, {}),
+]
+
+SORT_MARKERS = {
+    'sqlite': ['USE TEMP B-TREE FOR'],
+    'postgresql': ['Sort  (', 'Sort Key:'],
+}
+
+
+class Superuser(AnonymousUser):
+    is_active = is_staff = is_superuser = True
+
+    def has_perm(self, perm, obj=None):
+        return True
+
+
+def changelist_queryset(model, params):
+    """The ordered queryset the admin changelist of ``model`` pages through."""
+    request = RequestFactory().get('/', params)
+    request.user = Superuser()
+    return admin.site._registry[model].get_changelist_instance(request).queryset
+
+
+def hot_queries():
+    """Yield ``(name, queryset)`` for every query that is checked."""
+    yield 'home: snapshot', PortfolioSnapshot.objects.filter(key=snapshot.KEY)
+    for name, queryset in snapshot.querysets():
+        yield f'snapshot: {name}', queryset
+    for model, params in ADMIN_LISTS:
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        yield f'admin: {model._meta.model_name}{"?" + query if query else ""}', changelist_queryset(model, params)
+    for params, query in [({}, ''), ({'is_read__exact': '0'}, 'is_read__exact=0&')]:
+        queryset = changelist_queryset(ContactMessage, params)
+        yield f'admin: contactmessage?{query}after=<cursor>', inbox.older_than(queryset, timezone.now(), 0)
+        yield f'admin: contactmessage?{query}before=<cursor>', inbox.newer_than(queryset, timezone.now(), 0)
+
+
+def explain(queryset):
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+
+def check():
+    """Return ``(name, plan, sorts)`` per hot query; ``sorts`` is a list of offending plan lines."""
+    markers = SORT_MARKERS.get(connection.vendor, [])
+    results = []
+    for name, queryset in hot_queries():
+        plan = explain(queryset)
+        sorts = [line.strip() for line in plan.splitlines() if any(marker in line for marker in markers)]
+        results.append((name, plan, sorts))
+    return results
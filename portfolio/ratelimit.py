@@ -0,0 +1,221 @@
+"""
+Cheap screening of contact form posts, run before anything touches the ORM.
+
+In order:
+
+- token buckets: one per client IP (PORTFOLIO_CONTACT_IP_RATE) and one for
+  the whole site (PORTFOLIO_CONTACT_GLOBAL_RATE); an empty bucket answers 429
+- a honeypot field that people never see and bots fill in
+- a signed form token holding the time the form was served; posts sooner
+  than PORTFOLIO_CONTACT_MIN_SECONDS after it, or with no valid token, are
+  rejected
+- a fingerprint of the email, subject and message; the same message again
+  within PORTFOLIO_CONTACT_DUPLICATE_SECONDS is dropped; the view calls
+  ``forget()`` when it could not store a message, so a retry goes through
+
+Honeypot hits and duplicates are answered like a successful post, so the
+sender learns nothing. Bucket and fingerprint state lives in this process
+(``local``) or, with PORTFOLIO_RATELIMIT_BACKEND = ``cache``, in the
+portfolio cache so that the limits hold across workers and hosts.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+HONEYPOT_FIELD = 'website'
+TOKEN_FIELD = 'form_token'
+TOKEN_SALT = 'portfolio.contact-form'
+# Most keys (client IPs, fingerprints) the local backend remembers; the
+# least recently used are forgotten first.
+MAX_KEYS = 100000
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@dataclass
+class Verdict:
+    store: bool
+    status: int = 200
+    message: str = ''
+    retry_after: int = 0
+
+
+ACCEPT = Verdict(True)
+# Looks like a successful post to the sender; nothing is stored.
+DROP = Verdict(False)
+
+
+def parse_rate(rate):
+    """``'5/m'`` -> ``(5, 60.0)``: at most 5 in a burst, refilled over a minute."""
+    count, _, period = rate.partition('/')
+    return int(count), float(PERIODS[period])
+
+
+class LocalBackend:
+    """Token buckets and fingerprints in a dict, shared by the threads of one process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+        self.seen_until = OrderedDict()
+
+    def _remember(self, store, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        if len(store) > MAX_KEYS:
+            store.popitem(last=False)
+
+    def take(self, key, burst, period):
+        """Take a token. Returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        refill = burst / period
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                self._remember(self.buckets, key, (tokens - 1, now))
+                return 0
+            self._remember(self.buckets, key, (tokens, now))
+            return (1 - tokens) / refill
+
+    def seen(self, key, ttl):
+        """Whether ``key`` was seen in the last ``ttl`` seconds; records it."""
+        now = time.monotonic()
+        with self.lock:
+            if self.seen_until.get(key, 0) > now:
+                return True
+            self._remember(self.seen_until, key, now + ttl)
+            return False
+
+    def forget(self, key):
+        """Undo ``seen()`` for ``key``."""
+        with self.lock:
+            self.seen_until.pop(key, None)
+
+
+class CacheBackend:
+    """
+    The same in the portfolio cache. Caches have no compare-and-swap, so a
+    bucket is approximated by a counter per window of ``period`` seconds
+    (``add`` + ``incr``, atomic on Redis and Memcached) allowing ``burst``
+    posts per window.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.PORTFOLIO_CACHE_ALIAS]
+
+    def take(self, key, burst, period):
+        now = time.time()
+        window = int(now // period)
+        cache_key = f'ratelimit:{key}:{window}'
+        self.cache.add(cache_key, 0, timeout=math.ceil(period) + 1)
+        try:
+            count = self.cache.incr(cache_key)
+        except ValueError:
+            # Expired between add() and incr().
+            self.cache.add(cache_key, 1, timeout=math.ceil(period) + 1)
+            count = 1
+        if count <= burst:
+            return 0
+        return (window + 1) * period - now
+
+    def seen(self, key, ttl):
+        return not self.cache.add(f'ratelimit:seen:{key}', 1, timeout=ttl)
+
+    def forget(self, key):
+        self.cache.delete(f'ratelimit:seen:{key}')
+
+
+_backends = {}
+
+
+def get_backend():
+    name = settings.PORTFOLIO_RATELIMIT_BACKEND
+    if name not in _backends:
+        _backends[name] = CacheBackend() if name == 'cache' else LocalBackend()
+    return _backends[name]
+
+
+def reset():
+    """Forget all local state (tests)."""
+    _backends.clear()
+
+
+def client_ip(request):
+    """
+    The client address. Behind PORTFOLIO_TRUSTED_PROXIES proxies, each of
+    which appends to X-Forwarded-For, it is the entry that many from the end.
+    """
+    proxies = settings.PORTFOLIO_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def form_token(issued=None):
+    """A signed token holding the time the form was served (``issued``, default now)."""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(int(time.time() if issued is None else issued)))
+
+
+def form_age(token):
+    """Seconds since ``token`` was issued, or None when it is not valid."""
+    try:
+        issued = int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+    return time.time() - issued
+
+
+def fingerprint(fields):
+    text = '\x00'.join(' '.join(fields[field].lower().split()) for field in ('email', 'subject', 'message'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def limit(request):
+    """A 429 verdict when the client's or the site's bucket is empty, else None."""
+    backend = get_backend()
+    for key, rate in [(f'ip:{client_ip(request)}', settings.PORTFOLIO_CONTACT_IP_RATE),
+                      ('global', settings.PORTFOLIO_CONTACT_GLOBAL_RATE)]:
+        wait = backend.take(key, *parse_rate(rate))
+        if wait:
+            return Verdict(False, 429, 'Too many messages. Please try again later.', math.ceil(wait))
+    return None
+
+
+def screen(request, fields):
+    """
+    Decide what to do with a contact form post. ``fields`` are the submitted
+    fields, or None when some are missing (the caller rejects those).
+    """
+    if not settings.PORTFOLIO_CONTACT_SPAM_CHECKS:
+        return ACCEPT
+    limited = limit(request)
+    if limited:
+        return limited
+    if request.POST.get(HONEYPOT_FIELD):
+        return DROP
+    age = form_age(request.POST.get(TOKEN_FIELD, ''))
+    if age is None or age > settings.PORTFOLIO_CONTACT_TOKEN_MAX_AGE:
+        return Verdict(False, 400, 'Please reload the page and send your message again.')
+    if age < settings.PORTFOLIO_CONTACT_MIN_SECONDS:
+        return Verdict(False, 400, 'Please wait a moment and send your message again.')
+    if fields and get_backend().seen(fingerprint(fields), settings.PORTFOLIO_CONTACT_DUPLICATE_SECONDS):
+        return DROP
+    return ACCEPT
+
+
+def forget(fields):
+    """
+    Forget the fingerprint ``screen()`` recorded for ``fields``: the message
+    was not stored, so sending it again must not count as a duplicate.
+    """
+    if settings.PORTFOLIO_CONTACT_SPAM_CHECKS:
+        get_backend().forget(fingerprint(fields))
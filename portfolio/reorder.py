@@ -0,0 +1,151 @@
+"""
+Reordering rows by their fractional ``order`` key.
+
+``reorder()`` takes the primary keys of some rows in their new order (the
+rows of one admin page, say) and rewrites as few ``order`` values as it
+can. The longest run of rows that are already in increasing order keeps its
+keys; every other row gets a key between its new neighbours, e.g. the
+midpoint for a row dropped between two others. Moving one row therefore
+changes one row. Only when floats run out of room between two keys is the
+whole scope renumbered 1, 2, 3, ... All changes go out in one
+``bulk_update`` inside a transaction, followed by one ``models_changed``.
+"""
+from bisect import bisect_left
+
+from django.db import transaction
+
+from .signals import models_changed
+
+FIELD = 'order'
+
+
+class ReorderError(Exception):
+    pass
+
+
+def increasing_run(keys):
+    """Indexes of a longest strictly increasing subsequence of ``keys``."""
+    tails, tail_indexes, previous = [], [], [None] * len(keys)
+    for index, key in enumerate(keys):
+        position = bisect_left(tails, key)
+        if position == len(tails):
+            tails.append(key)
+            tail_indexes.append(index)
+        else:
+            tails[position] = key
+            tail_indexes[position] = index
+        previous[index] = tail_indexes[position - 1] if position else None
+    run = []
+    index = tail_indexes[-1] if tail_indexes else None
+    while index is not None:
+        run.append(index)
+        index = previous[index]
+    return run[::-1]
+
+
+def between(low, high, count):
+    """``count`` increasing keys strictly between ``low`` and ``high`` (either may be None)."""
+    if low is None and high is None:
+        return [float(i + 1) for i in range(count)]
+    if low is None:
+        return [high - (count - i) for i in range(count)]
+    if high is None:
+        return [low + i + 1 for i in range(count)]
+    step = (high - low) / (count + 1)
+    return [low + step * (i + 1) for i in range(count)]
+
+
+def new_keys(keys, low=None, high=None):
+    """
+    New keys for rows whose current ``keys`` are listed in their new order,
+    all strictly between ``low`` and ``high``. Returns None when floats
+    cannot fit them.
+    """
+    kept = {index for index in increasing_run(keys) if (low is None or keys[index] > low) and (high is None or keys[index] < high)}
+    result = list(keys)
+    index = 0
+    while index < len(keys):
+        if index in kept:
+            index += 1
+            continue
+        end = index
+        while end < len(keys) and end not in kept:
+            end += 1
+        before = result[index - 1] if index else low
+        after = result[end] if end < len(keys) else high
+        result[index:end] = between(before, after, end - index)
+        index = end
+    bounded = [low, *result, high]
+    bounded = [key for key in bounded if key is not None]
+    if any(a >= b for a, b in zip(bounded, bounded[1:])):
+        return None
+    return result
+
+
+def reorder(queryset, pks, scope=()):
+    """
+    Put the rows of ``queryset`` with primary keys ``pks`` in that order.
+    Rows must share the values of the ``scope`` fields (e.g. a skill's
+    category). Returns the number of rows written.
+    """
+    model = queryset.model
+    pks = [model._meta.pk.to_python(pk) for pk in pks]
+    if len(set(pks)) != len(pks):
+        raise ReorderError('Each row may appear only once')
+    with transaction.atomic():
+        rows = {obj.pk: obj for obj in queryset.select_for_update().filter(pk__in=pks).only('pk', FIELD, *scope)}
+        if len(rows) != len(pks):
+            raise ReorderError('Some rows do not exist')
+        objects = [rows[pk] for pk in pks]
+        scopes = {tuple(getattr(obj, model._meta.get_field(field).attname) for field in scope) for obj in objects}
+        if len(scopes) > 1:
+            raise ReorderError(f'All rows must have the same {", ".join(scope)}')
+        if not objects:
+            return 0
+        scope_filter = {model._meta.get_field(field).attname: value for field, value in zip(scope, scopes.pop())}
+        siblings = queryset.filter(**scope_filter).exclude(pk__in=pks)
+
+        # The new keys must stay between the rows just outside this set.
+        keys = [getattr(obj, FIELD) for obj in objects]
+        low = siblings.filter(**{f'{FIELD}__lt': min(keys)}).order_by(f'-{FIELD}').values_list(FIELD, flat=True).first()
+        high = siblings.filter(**{f'{FIELD}__gt': max(keys)}).order_by(FIELD).values_list(FIELD, flat=True).first()
+        if siblings.filter(**{f'{FIELD}__gte': min(keys), f'{FIELD}__lte': max(keys)}).exists():
+            # Other rows are interleaved with these (another page, a filter):
+            # keys cannot be fitted around them without renumbering.
+            planned = None
+        else:
+            planned = new_keys(keys, low, high)
+
+        if planned is None:
+            return renumber(queryset.filter(**scope_filter), pks)
+        changed = [obj for obj, key in zip(objects, planned) if getattr(obj, FIELD) != key]
+        for obj, key in zip(objects, planned):
+            setattr(obj, FIELD, key)
+        if changed:
+            model.objects.bulk_update(changed, [FIELD])
+            models_changed([model])
+        return len(changed)
+
+
+def renumber(queryset, pks):
+    """
+    Number the whole scope 1, 2, 3, ... with ``pks`` in the given order at
+    the position of the first of them, and the other rows where they were.
+    """
+    model = queryset.model
+    objects = list(queryset.select_for_update().only('pk', FIELD))
+    moving = {pk: index for index, pk in enumerate(pks)}
+    others = [obj for obj in objects if obj.pk not in moving]
+    moved = sorted((obj for obj in objects if obj.pk in moving), key=lambda obj: moving[obj.pk])
+    first = min(getattr(obj, FIELD) for obj in moved)
+    position = sum(1 for obj in others if getattr(obj, FIELD) < first)
+    sequence = others[:position] + moved + others[position:]
+    changed = []
+    for number, obj in enumerate(sequence, start=1):
+        if getattr(obj, FIELD) != number:
+            setattr(obj, FIELD, float(number))
+            changed.append(obj)
+    if changed:
+        model.objects.bulk_update(changed, [FIELD])
+        models_changed([model])
+    return len(changed)
@@ -0,0 +1,151 @@
+"""
+Declarative seed data for the portfolio.
+
+The seed file (JSON, or TOML on Python 3.11+) lists the profile, education,
+skill categories with their skills, projects and certifications; see
+``seed_data/portfolio.json``. ``load()`` upserts it in one transaction with
+``bulk_create(update_conflicts=True)`` on each model's natural key, so the
+number of queries does not depend on the number of rows: one read and at
+most one write per model.
+
+Loading again resets every seeded field of existing rows to the seed value,
+including ``order``, which the admin's drag-and-drop reordering changes.
+Pass the fields to leave alone on existing rows as ``keep``.
+"""
+import json
+from pathlib import Path
+
+from django.db import models, transaction
+
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification
+from .signals import models_changed
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11; only JSON seed files can be read.
+    tomllib = None
+
+SEED_DIR = Path(__file__).resolve().parent / 'seed_data'
+DEFAULT_SEED = SEED_DIR / 'portfolio.json'
+
+# Fields that identify a row; each has a unique constraint.
+NATURAL_KEYS = {
+    Profile: ['name'],
+    Education: ['degree', 'institution'],
+    SkillCategory: ['name'],
+    Skill: ['category', 'name'],
+    Project: ['title'],
+    Certification: ['title'],
+}
+
+
+class SeedError(Exception):
+    pass
+
+
+def read_seed(path=DEFAULT_SEED):
+    path = Path(path)
+    if path.suffix == '.toml':
+        if tomllib is None:
+            raise SeedError('Reading TOML seed files needs Python 3.11 or newer')
+        with path.open('rb') as f:
+            return tomllib.load(f)
+    with path.open(encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _value(value):
+    return value.pk if isinstance(value, models.Model) else value
+
+
+def upsert(model, rows, keep=()):
+    """
+    Insert or update ``rows`` (dicts of field values) on the model's natural
+    key. Rows identical to what is stored are left alone, and so are the
+    ``keep`` fields of rows that already exist. Returns
+    ``({natural key: pk}, {'created': n, 'updated': n, 'unchanged': n})``.
+    """
+    unique_fields = NATURAL_KEYS[model]
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    update_fields = [field for field in fields if field not in unique_fields and field not in keep]
+    # Every row sets every field, so a field missing from one row is reset to
+    # its default rather than keeping whatever an earlier load stored.
+    defaults = {field: model._meta.get_field(field).get_default() for field in fields}
+    rows = [{**defaults, **row} for row in rows]
+
+    def key(row):
+        return tuple(_value(row[field]) for field in unique_fields)
+
+    lookup = unique_fields[0]
+    existing = {
+        key(row): row
+        for row in model.objects.filter(**{f'{lookup}__in': {_value(row[lookup]) for row in rows}})
+        .values('pk', *unique_fields, *update_fields)
+    }
+
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+    pks = {}
+    changed = []
+    for row in rows:
+        stored = existing.get(key(row))
+        if stored is None:
+            counts['created'] += 1
+        elif any(stored[field] != _value(row[field]) for field in update_fields):
+            counts['updated'] += 1
+        else:
+            counts['unchanged'] += 1
+            pks[key(row)] = stored['pk']
+            continue
+        changed.append(model(**row))
+
+    if changed:
+        write_fields = update_fields + [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        objects = model.objects.bulk_create(changed, update_conflicts=True, unique_fields=unique_fields, update_fields=write_fields)
+        if any(obj.pk is None for obj in objects):
+            # Databases that cannot return the ids of upserted rows (MySQL).
+            pks.update({
+                key(row): row['pk']
+                for row in model.objects.filter(**{f'{lookup}__in': {_value(getattr(obj, lookup)) for obj in objects}})
+                .values('pk', *unique_fields)
+            })
+        else:
+            pks.update({tuple(_value(getattr(obj, field)) for field in unique_fields): obj.pk for obj in objects})
+    return pks, counts
+
+
+@transaction.atomic
+def load(data, keep=()):
+    """
+    Upsert a parsed seed file, leaving the ``keep`` fields of existing rows
+    alone. Returns ``{model: counts}`` in load order.
+    """
+    report = {}
+
+    def run(model, rows):
+        if not rows:
+            return {}
+        pks, report[model] = upsert(model, rows, keep)
+        return pks
+
+    if data.get('profile'):
+        run(Profile, [data['profile']])
+    run(Education, data.get('education', []))
+
+    categories = data.get('skill_categories', [])
+    category_pks = run(SkillCategory, [
+        {field: value for field, value in category.items() if field != 'skills'} for category in categories
+    ])
+    run(Skill, [
+        {'category': SkillCategory(pk=category_pks[(category['name'],)]), 'name': skill, 'order': order}
+        for category in categories
+        for order, skill in enumerate(category.get('skills', []), start=1)
+    ])
+
+    run(Project, data.get('projects', []))
+    run(Certification, data.get('certifications', []))
+
+    changed = [model for model, counts in report.items() if counts['created'] or counts['updated']]
+    if changed:
+        # bulk_create sends no signals.
+        models_changed(changed)
+    return report
@@ -0,0 +1,122 @@
+import logging
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from . import cache, images, snapshot, video
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification
+
+logger = logging.getLogger(__name__)
+
+# Models rendered on the home page. ContactMessage is left out on purpose:
+# it never appears on the page, and every contact form submission would
+# otherwise throw the page cache away.
+PORTFOLIO_MODELS = [Profile, Education, Project, SkillCategory, Skill, Certification]
+
+
+# Models changed since the last successful snapshot rebuild.
+_unbuilt = set()
+_unbuilt_lock = threading.Lock()
+
+
+def rebuild(models):
+    """
+    Rebuild the snapshot, then start new cache versions for ``models``.
+
+    When the rebuild fails the versions are left alone: the cache keeps the
+    pages of the snapshot that is still stored instead of caching its stale
+    content under new versions. The next rebuild that succeeds starts new
+    versions for these models as well.
+    """
+    with _unbuilt_lock:
+        _unbuilt.update(models)
+    try:
+        snapshot.rebuild()
+    except Exception:
+        logger.exception('Could not rebuild the portfolio snapshot')
+        return
+    with _unbuilt_lock:
+        models = set(_unbuilt)
+        _unbuilt.clear()
+    for model in models:
+        cache.bump_model_version(model)
+    cache.bump_content_version()
+
+
+class PendingRebuild:
+    """The models changed in one transaction, rebuilt by a single on_commit callback."""
+
+    def __init__(self):
+        self.models = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        rebuild(self.models)
+
+
+def models_changed(models, using=None):
+    """
+    Rebuild the snapshot once the current transaction commits, and only then
+    start new cache versions for ``models``, so nothing renders the old
+    snapshot under them. For changes that bypass the signals (bulk_create,
+    QuerySet.update).
+
+    All calls in one transaction share one rebuild: saving N rows (an admin
+    bulk edit, a seed load) rebuilds the snapshot once, not N times.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        rebuild(set(models))
+        return
+    pending = getattr(connection, 'portfolio_pending_rebuild', None)
+    # A rolled back transaction or savepoint discards its callback; start
+    # a new one then.
+    if pending is None or pending.done or not any(func is pending for sids, func, robust in connection.run_on_commit):
+        pending = connection.portfolio_pending_rebuild = PendingRebuild()
+        transaction.on_commit(pending, using)
+    pending.models.update(models)
+
+
+def content_changed(sender, using=None, **kwargs):
+    models_changed([sender], using)
+
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    if raw or not images.stale_fields(instance):
+        return
+
+    def process():
+        try:
+            changed = images.process_instance(instance)
+        except Exception:
+            logger.exception('Could not build image variants for %r', instance)
+            return
+        if changed:
+            content_changed(sender)
+
+    transaction.on_commit(process)
+
+
+def project_video_saved(sender, instance, raw=False, **kwargs):
+    if raw or not instance.video or instance.video_processed == instance.video.name:
+        return
+
+    def process():
+        try:
+            video.process_project_video(instance)
+        except Exception:
+            logger.exception('Could not process video for %r', instance)
+
+    transaction.on_commit(process)
+
+
+for model in PORTFOLIO_MODELS:
+    post_save.connect(content_changed, sender=model, dispatch_uid=f'portfolio_content_save_{model.__name__}')
+    post_delete.connect(content_changed, sender=model, dispatch_uid=f'portfolio_content_delete_{model.__name__}')
+
+for model in images.IMAGE_FIELDS:
+    post_save.connect(image_saved, sender=model, dispatch_uid=f'portfolio_image_save_{model.__name__}')
+
+post_save.connect(project_video_saved, sender=Project, dispatch_uid='portfolio_project_video_save')
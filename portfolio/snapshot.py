@@ -0,0 +1,170 @@
+"""
+Denormalized snapshot of the home page content.
+
+``rebuild()`` reads every portfolio table with ``values()`` projections and
+stores the assembled result in one ``PortfolioSnapshot`` row; ``load()``
+reads it back with a single query on the unique ``key`` index. The content
+signals rebuild the snapshot after every committed change.
+"""
+import asyncio
+import json
+from datetime import date
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .models import Profile, Education, Project, SkillCategory, Skill, Certification, PortfolioSnapshot
+
+KEY = 'home'
+
+# (snapshot key, model, fields) in the order they are read.
+SOURCES = [
+    ('profile', Profile, ['id', 'name', 'title', 'bio', 'profile_image', 'email', 'phone', 'linkedin_url',
+                          'github_url', 'resume', 'background_image', 'image_variants']),
+    ('educations', Education, ['id', 'degree', 'institution', 'start_year', 'end_year', 'description']),
+    ('projects', Project, ['id', 'title', 'description', 'technologies', 'github_link', 'live_link', 'video',
+                           'video_poster', 'video_width', 'video_height', 'image', 'image_variants']),
+    ('skill_categories', SkillCategory, ['id', 'name', 'icon', 'image_variants']),
+    ('skills', Skill, ['id', 'category_id', 'name', 'icon', 'image_variants']),
+    ('certifications', Certification, ['id', 'title', 'issuer', 'certificate_image', 'certificate_file',
+                                       'issue_date', 'image_variants']),
+]
+
+# Skill's Meta.ordering follows the category foreign key into a join on
+# SkillCategory; the snapshot only needs skills grouped by category, which
+# the (category, order) index returns without sorting. Profile has no
+# Meta.ordering; the page shows the first one by primary key.
+ORDERING = {Profile: ['pk'], Skill: ['category_id', 'order']}
+
+FILE_FIELDS = {'profile_image', 'resume', 'background_image', 'video', 'video_poster', 'image', 'icon',
+               'certificate_image', 'certificate_file'}
+DATE_FIELDS = {'issue_date'}
+
+
+def _assemble(rows):
+    skills = {}
+    for skill in rows.pop('skills'):
+        skills.setdefault(skill['category_id'], []).append(skill)
+    for category in rows['skill_categories']:
+        category['skills'] = skills.get(category['id'], [])
+
+    profiles = rows.pop('profile')
+    rows['profile'] = profiles[0] if profiles else None
+    # Round-trip through JSON so the result compares equal to what is stored.
+    return json.loads(json.dumps(rows, cls=DjangoJSONEncoder))
+
+
+def querysets():
+    """The ``(snapshot key, queryset)`` pairs the snapshot is built from."""
+    for name, model, fields in SOURCES:
+        queryset = model.objects.values(*fields)
+        if model in ORDERING:
+            queryset = queryset.order_by(*ORDERING[model])
+        yield name, queryset
+
+
+def build_data():
+    """Assemble the snapshot from the live tables (six queries)."""
+    return _assemble({name: list(queryset) for name, queryset in querysets()})
+
+
+async def _arows(queryset):
+    return [row async for row in queryset]
+
+
+async def abuild_data():
+    """``build_data`` for async callers, awaiting the six queries together."""
+    sources = list(querysets())
+    results = await asyncio.gather(*(_arows(queryset) for name, queryset in sources))
+    return _assemble({name: rows for (name, queryset), rows in zip(sources, results)})
+
+
+def rebuild():
+    with transaction.atomic():
+        data = build_data()
+        snapshot, created = PortfolioSnapshot.objects.update_or_create(key=KEY, defaults={'data': data})
+    return snapshot
+
+
+async def arebuild():
+    # The concurrent reads cannot share a transaction, unlike rebuild(); the
+    # content signals always use rebuild().
+    data = await abuild_data()
+    snapshot, created = await PortfolioSnapshot.objects.aupdate_or_create(key=KEY, defaults={'data': data})
+    return snapshot
+
+
+def _hydrate(record):
+    """
+    Turn stored values back into what the templates expect: file names become
+    ``{'name', 'url'}`` dicts (or None) and dates become ``date`` objects.
+    """
+    if record is None:
+        return None
+    for field, value in record.items():
+        if field in FILE_FIELDS:
+            record[field] = {'name': value, 'url': default_storage.url(value)} if value else None
+        elif field in DATE_FIELDS and value:
+            record[field] = date.fromisoformat(value)
+        elif field == 'skills':
+            for skill in value:
+                _hydrate(skill)
+    return record
+
+
+def _hydrate_all(data):
+    data['profile'] = _hydrate(data['profile'])
+    for name in ['educations', 'projects', 'skill_categories', 'certifications']:
+        data[name] = [_hydrate(record) for record in data[name]]
+    return data
+
+
+def load():
+    """
+    Return the snapshot content ready for the templates, building it first if
+    it does not exist yet.
+    """
+    data = PortfolioSnapshot.objects.filter(key=KEY).values_list('data', flat=True).first()
+    if data is None:
+        data = rebuild().data
+    return _hydrate_all(data)
+
+
+async def aload():
+    data = await PortfolioSnapshot.objects.filter(key=KEY).values_list('data', flat=True).afirst()
+    if data is None:
+        data = (await arebuild()).data
+    return _hydrate_all(data)
+
+
+def diff():
+    """
+    Compare the stored snapshot with the live tables. Returns a list of
+    human-readable differences; empty when they agree.
+    """
+    stored = PortfolioSnapshot.objects.filter(key=KEY).values_list('data', flat=True).first()
+    if stored is None:
+        return ['No snapshot has been built yet']
+    live = build_data()
+
+    problems = []
+    for name in live:
+        if stored.get(name) == live[name]:
+            continue
+        if name == 'profile':
+            problems.append('profile differs')
+            continue
+        stored_rows = {row['id']: row for row in stored.get(name) or []}
+        live_rows = {row['id']: row for row in live[name]}
+        for pk in sorted(live_rows.keys() - stored_rows.keys()):
+            problems.append(f'{name}: id {pk} is missing from the snapshot')
+        for pk in sorted(stored_rows.keys() - live_rows.keys()):
+            problems.append(f'{name}: id {pk} no longer exists')
+        for pk in sorted(live_rows.keys() & stored_rows.keys()):
+            if live_rows[pk] != stored_rows[pk]:
+                fields = sorted(field for field in live_rows[pk] if live_rows[pk][field] != stored_rows[pk].get(field))
+                problems.append(f'{name}: id {pk} differs in {", ".join(fields)}')
+        if stored_rows == live_rows:
+            problems.append(f'{name}: order differs')
+    return problems
@@ -0,0 +1,312 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; only .gz files are built without it.
+    brotli = None
+
+try:
+    import boto3
+except ImportError:  # Only needed for the s3 media backend.
+    boto3 = None
+
+# Formats that are already compressed gain nothing from gzip/brotli.
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.ttf', '.otf', '.eot'}
+
+# Content-addressed media: blobs live under this prefix, named by SHA-256.
+BLOB_PREFIX = 'blobs'
+CHUNK_SIZE = 1024 * 1024
+# Uploads up to this size are hashed in memory before they are stored.
+SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes ``.gz`` and ``.br`` variants of every
+    compressible file during ``collectstatic``, for
+    ``portfolio.middleware.StaticFilesMiddleware`` to serve.
+    """
+
+    # Fall back to the plain name instead of failing when a file has not been
+    # collected yet (e.g. running the tests without collectstatic).
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in paths:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            hashed_name = self.hashed_files.get(self.hash_key(self.clean_name(name)))
+            for target in {name, hashed_name} - {None}:
+                self.compress(target)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            # Only keep variants that are worth the extra Content-Encoding.
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class FileSystemBlobs:
+    """Blobs stored as files under ``location``."""
+
+    def __init__(self, location):
+        self.location = os.path.abspath(location)
+
+    def path(self, key):
+        return safe_join(self.location, key)
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def put(self, key, file, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name and rename, so a reader never sees a
+        # partial blob under its final (immutable) name.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(file, f, CHUNK_SIZE)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def modified_time(self, key):
+        return datetime.fromtimestamp(os.path.getmtime(self.path(key)), timezone.utc)
+
+    def list(self, prefix):
+        root = self.path(prefix)
+        for directory, _, files in os.walk(root):
+            for name in files:
+                if not name.startswith('.upload-'):
+                    yield os.path.relpath(os.path.join(directory, name), self.location).replace(os.sep, '/')
+
+
+class S3Blobs:
+    """
+    Blobs stored in an S3-compatible bucket. ``client`` is anything with the
+    boto3 S3 client methods used here (``put_object``, ``get_object``,
+    ``head_object``, ``delete_object`` and ``list_objects_v2``), such as
+    ``boto3.client('s3')`` or ``LocalS3Client``.
+    """
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def exists(self, key):
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=key, MaxKeys=1)
+        return any(item['Key'] == key for item in response.get('Contents', []))
+
+    def put(self, key, file, content_type=None):
+        extra = {'ContentType': content_type} if content_type else {}
+        self.client.put_object(
+            Bucket=self.bucket, Key=key, Body=file,
+            CacheControl=settings.PORTFOLIO_MEDIA_CACHE_CONTROL, **extra,
+        )
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def size(self, key):
+        return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+
+    def modified_time(self, key):
+        return self.client.head_object(Bucket=self.bucket, Key=key)['LastModified']
+
+    def list(self, prefix):
+        kwargs = {'Bucket': self.bucket, 'Prefix': prefix}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            for item in response.get('Contents', []):
+                yield item['Key']
+            if not response.get('IsTruncated'):
+                return
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+
+class LocalS3Client:
+    """
+    A stand-in for ``boto3.client('s3')`` that keeps every bucket in a
+    directory under ``root``, for running ``S3Blobs`` without a bucket.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _blobs(self, bucket):
+        return FileSystemBlobs(os.path.join(self.root, bucket))
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._blobs(Bucket).put(Key, Body)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': self._blobs(Bucket).open(Key)}
+
+    def head_object(self, Bucket, Key):
+        blobs = self._blobs(Bucket)
+        return {'ContentLength': blobs.size(Key), 'LastModified': blobs.modified_time(Key)}
+
+    def delete_object(self, Bucket, Key):
+        self._blobs(Bucket).delete(Key)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', MaxKeys=1000, ContinuationToken=None):
+        directory = os.path.dirname(Prefix)
+        keys = sorted(key for key in self._blobs(Bucket).list(directory) if key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {'Contents': [{'Key': key} for key in page], 'IsTruncated': start + MaxKeys < len(keys)}
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = str(start + MaxKeys)
+        return response
+
+
+def _s3_client(endpoint_url=None):
+    if boto3 is None:
+        raise ImproperlyConfigured('The s3 media backend needs boto3 (pip install boto3)')
+    return boto3.client('s3', endpoint_url=endpoint_url)
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Media storage that names every file after the SHA-256 of its content,
+    ``blobs/ab/abcdef....png``: identical uploads share one blob and a URL
+    never changes what it points to, so it can be cached as immutable.
+
+    Blobs are shared, so ``delete()`` is a no-op: nothing is reclaimed when
+    a file is replaced or its object deleted (including the duplicate copies
+    ``ingest_media`` drops). The old blob stays in storage until the next
+    ``gc_media`` run, which scans every file field, counts the references
+    and removes blobs nothing points to any more. Schedule it to keep
+    storage from growing with every replaced upload.
+    """
+
+    def __init__(self, backend='filesystem', location=None, base_url=None, bucket=None, endpoint_url=None, client=None):
+        self.backend = backend
+        self.base_url = base_url if base_url is not None else settings.MEDIA_URL
+        if backend == 's3':
+            self.blobs = S3Blobs(client or _s3_client(endpoint_url), bucket)
+        else:
+            self.blobs = FileSystemBlobs(location or settings.MEDIA_ROOT)
+
+    def blob_name(self, sha256, name):
+        ext = os.path.splitext(name)[1].lower()
+        return f'{BLOB_PREFIX}/{sha256[:2]}/{sha256}{ext}'
+
+    def get_available_name(self, name, max_length=None):
+        # The real name is only known once the content is hashed in _save().
+        return name
+
+    def _save(self, name, content):
+        sha256 = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks(CHUNK_SIZE):
+                sha256.update(chunk)
+                spool.write(chunk)
+            key = self.blob_name(sha256.hexdigest(), name)
+            if not self.blobs.exists(key):
+                spool.seek(0)
+                self.blobs.put(key, spool, mimetypes.guess_type(name)[0])
+        return key
+
+    def _open(self, name, mode='rb'):
+        return File(self.blobs.open(name), name)
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name):
+        """Remove a blob for good; only ``gc_media`` should call this."""
+        self.blobs.delete(name)
+
+    def exists(self, name):
+        return self.blobs.exists(name)
+
+    def size(self, name):
+        return self.blobs.size(name)
+
+    def get_modified_time(self, name):
+        return self.blobs.modified_time(name)
+
+    def path(self, name):
+        if self.backend == 's3':
+            return super().path(name)
+        return self.blobs.path(name)
+
+    def url(self, name):
+        return urljoin(self.base_url, filepath_to_uri(name))
+
+    def listdir(self, path):
+        path = path.strip('/')
+        directories, files = set(), []
+        for key in self.blobs.list(path):
+            rest = key[len(path):].lstrip('/') if path else key
+            if '/' in rest:
+                directories.add(rest.split('/', 1)[0])
+            else:
+                files.append(rest)
+        return sorted(directories), files
+
+    def blob_names(self):
+        return self.blobs.list(BLOB_PREFIX)
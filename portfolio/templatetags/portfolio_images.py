@@ -0,0 +1,108 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+def _lookup(obj, name):
+    # Works for model instances and for the dicts of ``portfolio.snapshot``.
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _file(obj, field_name):
+    """Return ``(name, url, storage)`` for a file field, or None when empty."""
+    field_file = _lookup(obj, field_name)
+    if not field_file:
+        return None
+    if isinstance(field_file, dict):
+        return field_file['name'], field_file['url'], default_storage
+    return field_file.name, field_file.url, field_file.storage
+
+
+def _variants(obj, field_name):
+    """
+    Return the ``image_variants`` entry for ``field_name`` if it was built
+    from the file currently stored in that field.
+    """
+    file = _file(obj, field_name)
+    if not file:
+        return None
+    entry = (_lookup(obj, 'image_variants') or {}).get(field_name)
+    if not entry or entry.get('source') != file[0]:
+        return None
+    return entry
+
+
+def _srcset(storage, variants):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def responsive_image(obj, field_name, alt='', css_class='', sizes='100vw', loading='lazy', title=''):
+    """
+    Render ``<picture>`` with AVIF/WebP ``srcset`` sources for an image field,
+    falling back to a plain ``<img>`` of the original upload. ``title`` adds
+    a tooltip to the ``<img>``.
+
+        {% responsive_image project 'image' alt=project.title sizes='(min-width: 992px) 33vw, 100vw' %}
+    """
+    file = _file(obj, field_name)
+    if not file:
+        return ''
+    name, url, storage = file
+    entry = _variants(obj, field_name)
+
+    dimensions = ''
+    if entry:
+        dimensions = format_html(' width="{}" height="{}"', entry['width'], entry['height'])
+    tooltip = format_html(' title="{}"', title) if title else ''
+    img = format_html(
+        '<img src="{}" alt="{}" class="{}"{} loading="{}" decoding="async"{}>',
+        url, alt, css_class, tooltip, loading, dimensions,
+    )
+    if not entry:
+        return img
+
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, _srcset(storage, entry[fmt]), sizes) for fmt in ['avif', 'webp'] if entry.get(fmt)),
+    )
+    return format_html('<picture>{}{}</picture>', sources, img)
+
+
+@register.simple_tag
+def responsive_background(obj, field_name, selector='body'):
+    """
+    Render CSS rules that swap the background of ``selector`` for the smallest
+    derivative that still covers the viewport. Meant for use inside ``<style>``
+    after the rule that sets the original image.
+    """
+    entry = _variants(obj, field_name)
+    if not entry:
+        return ''
+    storage = _file(obj, field_name)[2]
+
+    # Variants are (width -> {format: url}), largest first so that the rules
+    # for smaller viewports come later and win.
+    by_width = {}
+    for fmt in ['avif', 'webp']:
+        for width, name in entry.get(fmt, []):
+            by_width.setdefault(width, {})[fmt] = storage.url(name)
+
+    rules = []
+    for index, width in enumerate(sorted(by_width, reverse=True)):
+        urls = by_width[width]
+        image_set = ', '.join(f'url("{url}") type("image/{fmt}")' for fmt, url in urls.items())
+        fallback = urls.get('webp') or next(iter(urls.values()))
+        declarations = f'background-image: url("{fallback}"); background-image: image-set({image_set});'
+        if index == 0:
+            rules.append(f'{selector} {{ {declarations} }}')
+        else:
+            # background-size: cover scales the image to fill both dimensions.
+            height = round(entry['height'] * width / entry['width'])
+            rules.append(f'@media (max-width: {width}px) and (max-height: {height}px) {{ {selector} {{ {declarations} }} }}')
+    return mark_safe('\n'.join(rules))
@@ -1,3 +1,1105 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import itertools
+import json
+import math
+import os
+import re
+import struct
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.files.base import ContentFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from . import (
+    analytics, api, archive, cache, export, fragments, images, ingest, media, metrics, outbox, query_plans, ratelimit, reorder,
+    snapshot, urls, video, views,
+)
+from . import seed as seed_file
+from .admin import ContactMessageAdmin
+from .benchmarks import WSGILoadGenerator, seed
+from .middleware import StaticFilesMiddleware
+from .models import (
+    Certification, CertificationDailyCount, ContactMessage, Education, IngestedFile, MediaBlob, MessageArchiveSegment,
+    PageViewDailyCount, Project, ProjectDailyCount, Skill, SkillCategory,
+)
+from .signals import PORTFOLIO_MODELS, models_changed
+from .storage import ContentAddressedStorage, LocalS3Client, brotli
+
+LOCMEM_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'tests-{alias}', 'TIMEOUT': None}
+    for alias in ['default', settings.PORTFOLIO_CACHE_ALIAS]
+}
+
+
+_messages = itertools.count()
+
+
+def contact(**fields):
+    """A contact form post that passes the spam checks: unique, with a form token a minute old."""
+    return {
+        'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Hi', 'message': f'Hello {next(_messages)}',
+        'form_token': ratelimit.form_token(time.time() - 60),
+        **fields,
+    }
+
+
+def cold_cache():
+    for model in PORTFOLIO_MODELS:
+        cache.bump_model_version(model)
+    cache.bump_content_version()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HomeQueryCountTests(TestCase):
+    """The number of queries behind the home page must not grow with the data."""
+
+    def assertHomeQueries(self, cold, warm):
+        cold_cache()
+        with self.assertNumQueries(cold):
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        with self.assertNumQueries(warm):
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+    def test_small_dataset(self):
+        seed(10)
+        self.assertHomeQueries(cold=1, warm=0)
+
+    def test_larger_dataset(self):
+        seed(300)
+        self.assertHomeQueries(cold=1, warm=0)
+
+    def test_edit_rerenders_only_its_section(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(10)
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            certification = Certification.objects.first()
+            certification.title = 'Renamed certification'
+            certification.save()
+        cache.reset_stats(fragments.stat_names())
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Renamed certification')
+        stats = cache.get_stats(fragments.stat_names())
+        self.assertEqual([name for name in [fragments.FRAME, *fragments.SECTIONS] if stats[f'fragment:{name}:miss']], ['certifications'])
+        self.assertEqual(sum(stats[f'fragment:{name}:hit'] for name in [fragments.FRAME, *fragments.SECTIONS]), 4)
+
+    def test_warm_cache_fills_the_page_and_fragments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+        cold_cache()
+        cache.reset_stats()
+        output = io.StringIO()
+        call_command('warm_cache', stdout=output)
+        version = cache.get_content_version()
+        self.assertIn(f'version {version})', output.getvalue())
+        self.assertIsNotNone(cache.get_cache().get(f'portfolio:page:home:{version}'))
+        keys, html, timings = fragments._lookup([fragments.FRAME, *fragments.SECTIONS])
+        self.assertEqual(set(html), {fragments.FRAME, *fragments.SECTIONS})
+
+        call_command('warm_cache', stdout=output)
+        self.assertIn('Hits: 1  Misses: 1', output.getvalue())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+        # A content save starts a new version, which the page is not cached under yet.
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.first().save()
+        self.assertNotEqual(cache.get_content_version(), version)
+        self.assertIsNone(cache.get_page('home')[1])
+
+    def test_hit_counters_stay_in_process(self):
+        seed(1)
+        cold_cache()
+        cache.reset_stats()
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+        self.assertEqual(cache.get_stats(), {'hit': 1, 'miss': 1})
+        self.assertIsNone(cache.get_cache().get('portfolio:stats:hit'))
+
+    def test_one_rebuild_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(10)
+        versions = cache.get_model_versions([Project, Certification, Education])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for project in Project.objects.all():
+                project.save()
+            Certification.objects.first().save()
+        self.assertEqual(len(callbacks), 1)
+        after = cache.get_model_versions([Project, Certification, Education])
+        self.assertNotEqual(after[Project], versions[Project])
+        self.assertNotEqual(after[Certification], versions[Certification])
+        self.assertEqual(after[Education], versions[Education])
+
+    def test_failed_rebuild_keeps_the_cache_versions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+        versions = cache.get_model_versions([Project, Education])
+        content = cache.get_content_version()
+        with mock.patch('portfolio.snapshot.rebuild', side_effect=DatabaseError), self.assertLogs('portfolio.signals', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                Project.objects.first().save()
+        self.assertEqual(cache.get_model_versions([Project, Education]), versions)
+        self.assertEqual(cache.get_content_version(), content)
+
+        # The next rebuild catches up on the project change too.
+        with self.captureOnCommitCallbacks(execute=True):
+            Education.objects.first().save()
+        after = cache.get_model_versions([Project, Education])
+        self.assertNotEqual(after[Project], versions[Project])
+        self.assertNotEqual(after[Education], versions[Education])
+
+    def test_check_snapshot_reports_edits_that_bypass_the_signals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+        call_command('check_snapshot', stdout=io.StringIO())
+        project = Project.objects.first()
+        Project.objects.filter(pk=project.pk).update(title='Edited in SQL')
+        self.assertEqual(snapshot.diff(), [f'projects: id {project.pk} differs in title'])
+        with self.assertRaisesMessage(CommandError, '1 differences'):
+            call_command('check_snapshot', stdout=io.StringIO())
+        call_command('check_snapshot', fix=True, stdout=io.StringIO())
+        self.assertEqual(snapshot.diff(), [])
+
+    def test_unchanged_page_revalidates_without_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(10)
+        # The first response sets the CSRF cookie, which is part of the ETag.
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('home'), headers={'If-None-Match': etag}).status_code, 304)
+        # A date alone cannot revalidate a page that embeds the CSRF token.
+        self.assertEqual(self.client.get(reverse('home'), headers={'If-Modified-Since': http_date()}).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.first()
+            project.title = 'Renamed project'
+            project.save()
+        response = self.client.get(reverse('home'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+
+    @override_settings(DEBUG=True)
+    def test_asgi_stack_is_not_adapted(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_counts_queries_of_async_requests(self):
+        await sync_to_async(seed)(1)
+        await sync_to_async(cold_cache)()
+        response = await self.async_client.get(reverse('home'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_times_only_portfolio_templates(self):
+        seed(1)
+        cold_cache()
+        timing = self.client.get(reverse('home'))['Server-Timing']
+        self.assertGreater(float(timing.split('render;dur=')[1].split(',')[0]), 0)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        timing = self.client.get(reverse('admin:index'))['Server-Timing']
+        self.assertIn('render;dur=0.00,', timing)
+
+    @override_settings(PORTFOLIO_SERVER_TIMING=False)
+    def test_no_server_timing_in_production(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('home')))
+
+    def test_sql_timing_stays_below_other_wrappers(self):
+        def wrapper(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        new = connections.create_connection('default')
+        self.addCleanup(new.close)
+        with new.execute_wrapper(wrapper):
+            # Opening the connection installs the timing wrapper.
+            new.ensure_connection()
+            self.assertEqual(new.execute_wrappers, [metrics._timed_execute, wrapper])
+        self.assertEqual(new.execute_wrappers, [metrics._timed_execute])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ApiTests(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+
+    def test_local_copies_are_shared_by_threads(self):
+        requests = [(section, ()) for section in api.SECTIONS] + [(None, (section,)) for section in api.SECTIONS]
+        # Built once here, so the threads only read the cache.
+        payloads = {request: api.get_payload(*request) for request in requests}
+        api._local.clear()
+        with mock.patch.object(api, 'LOCAL_SIZE', 2), ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda request: (request, api.get_payload(*request)), requests * 50))
+        self.assertTrue(all(payload == payloads[request] for request, payload in results))
+        self.assertEqual(len(api._local), 2)
+
+    def test_revalidates_by_section_version(self):
+        url = reverse('api_portfolio_section', args=['projects'])
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()), 3)
+        projects_etag = response['ETag']
+        certifications_etag = self.client.get(reverse('api_portfolio_section', args=['certifications']))['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': projects_etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Certification.objects.update(issuer='Renamed')
+            models_changed([Certification])
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': projects_etag}).status_code, 304)
+        response = self.client.get(reverse('api_portfolio_section', args=['certifications']))
+        self.assertNotEqual(response['ETag'], certifications_etag)
+        self.assertEqual({record['issuer'] for record in response.json()}, {'Renamed'})
+
+    def test_gzip_is_a_separate_representation(self):
+        url = reverse('api_portfolio')
+        plain = self.client.get(url)
+        compressed = self.client.get(url, headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], plain['ETag'][:-1] + '-gzip"')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(plain['Vary'], 'Accept-Encoding')
+
+    def test_field_selection(self):
+        response = self.client.get(reverse('api_portfolio'), {'fields': 'projects,skills'})
+        self.assertEqual(set(response.json()), {'projects', 'skills'})
+        response = self.client.get(reverse('api_portfolio_section', args=['projects']), {'fields': 'title,live_link'})
+        self.assertEqual([set(record) for record in response.json()], [{'title', 'live_link'}] * 3)
+        response = self.client.get(reverse('api_portfolio_section', args=['projects']), {'fields': 'title,image_variants'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown fields: image_variants', response.json()['error'])
+        self.assertEqual(self.client.get(reverse('api_portfolio_section', args=['secrets'])).status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactSubmitTests(TestCase):
+
+    def setUp(self):
+        ratelimit.reset()
+
+    def test_valid_submission_is_stored(self):
+        response = self.client.post(reverse('contact_submit'), contact())
+        self.assertRedirects(response, reverse('home'))
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_missing_fields_are_rejected(self):
+        response = self.client.post(reverse('contact_submit'), contact(email='', subject='', message=''), follow=True)
+        self.assertContains(response, 'Please fill in all fields.')
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_submission_does_not_invalidate_the_page_cache(self):
+        seed(10)
+        self.client.get(reverse('home'))
+        self.client.post(reverse('contact_submit'), contact())
+        with self.assertNumQueries(0):
+            # A second client has no flash message waiting, so it gets the cached page.
+            self.client_class().get(reverse('home'))
+
+
+SYNC_URLS = types.ModuleType('portfolio_sync_urls')
+SYNC_URLS.urlpatterns = urls.build_urlpatterns(False)
+ASYNC_URLS = types.ModuleType('portfolio_async_urls')
+ASYNC_URLS.urlpatterns = urls.build_urlpatterns(True)
+TOKENS = re.compile(r'name="(csrfmiddlewaretoken|form_token)" value="[^"]*"')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncViewTests(TestCase):
+    """ahome and acontact_submit answer like home and contact_submit."""
+
+    def setUp(self):
+        ratelimit.reset()
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+        secret = 'a' * 32
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = secret
+        self.async_client.cookies[settings.CSRF_COOKIE_NAME] = secret
+
+    def request(self, async_views, method, path, *args, **kwargs):
+        with self.settings(ROOT_URLCONF=ASYNC_URLS if async_views else SYNC_URLS):
+            if async_views:
+                return async_to_sync(getattr(self.async_client, method))(path, *args, **kwargs)
+            return getattr(self.client, method)(path, *args, **kwargs)
+
+    def test_home(self):
+        sync, response = [self.request(async_views, 'get', '/') for async_views in (False, True)]
+        self.assertEqual(response.status_code, 200)
+        for header in ['ETag', 'Cache-Control']:
+            self.assertEqual(response[header], sync[header])
+        self.assertEqual(TOKENS.sub('', response.content.decode()), TOKENS.sub('', sync.content.decode()))
+        with self.assertNumQueries(0):
+            response = self.request(True, 'get', '/', headers={'If-None-Match': sync['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_contact_and_flash_messages(self):
+        for async_views in (False, True):
+            with self.subTest(async_views=async_views):
+                response = self.request(async_views, 'post', '/contact/', contact())
+                self.assertEqual((response.status_code, response['Location']), (302, '/'))
+                response = self.request(async_views, 'get', '/')
+                self.assertContains(response, views.CONTACT_SENT)
+                self.assertNotIn('ETag', response)
+                # The message is shown once.
+                self.assertNotContains(self.request(async_views, 'get', '/'), views.CONTACT_SENT)
+
+                response = self.request(async_views, 'post', '/contact/', contact(message=''), headers={'Accept': 'application/json'})
+                self.assertEqual((response.status_code, response.json()['message']), (400, views.CONTACT_INVALID))
+        self.assertEqual(ContactMessage.objects.filter(name='Visitor').count(), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_ANONYMOUS_HOME=True)
+class AnonymousHomeTests(TestCase):
+
+    def test_home_is_shared_cacheable_and_the_form_still_needs_a_token(self):
+        seed(10)
+        response = self.client.get(reverse('home'))
+        self.assertIn('public', response.headers['Cache-Control'])
+        self.assertNotIn('Vary', response.headers)
+        self.assertFalse(response.cookies)
+
+        ratelimit.reset()
+        client = self.client_class(enforce_csrf_checks=True)
+        fields = contact()
+        self.assertEqual(client.post(reverse('contact_submit'), fields, HTTP_ACCEPT='application/json').status_code, 403)
+        token = client.get(reverse('contact_token')).json()['csrf_token']
+        response = client.post(reverse('contact_submit'), fields, HTTP_ACCEPT='application/json', HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.json()['level'], 'success')
+        self.assertTrue(ContactMessage.objects.filter(name='Visitor').exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SessionTests(TestCase):
+
+    def test_public_traffic_never_touches_the_session_table(self):
+        seed(10)
+        ratelimit.reset()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('contact_submit'), contact(email=''), follow=True)
+        self.assertContains(response, 'Please fill in all fields.')
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+        self.assertFalse(Session.objects.exists())
+
+    def test_admin_logins_use_database_sessions(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.post(reverse('admin:login'), {'username': 'admin', 'password': 'password'})
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+        self.client.get(reverse('home'))
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_CONTACT_WRITE_BEHIND=True, PORTFOLIO_OUTBOX_FLUSH_INTERVAL=0, PORTFOLIO_OUTBOX_MAX_PENDING=2)
+class WriteBehindContactTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PORTFOLIO_OUTBOX_PATH=f'{directory.name}/outbox.sqlite3')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ratelimit.reset()
+
+    def submit(self):
+        return self.client.post(reverse('contact_submit'), contact())
+
+    def test_submissions_are_queued_then_flushed_in_a_batch(self):
+        self.assertRedirects(self.submit(), reverse('home'))
+        self.assertRedirects(self.submit(), reverse('home'))
+        self.assertFalse(ContactMessage.objects.exists())
+        with self.assertNumQueries(1):
+            self.assertEqual(outbox.flush(), 2)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(outbox.pending(), 0)
+
+    def test_full_outbox_answers_503(self):
+        self.submit()
+        self.submit()
+        response = self.submit()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '60')
+
+    def test_retry_after_503_is_stored(self):
+        self.submit()
+        self.submit()
+        fields = contact()
+        self.assertEqual(self.client.post(reverse('contact_submit'), fields).status_code, 503)
+        outbox.flush()
+        self.assertRedirects(self.client.post(reverse('contact_submit'), fields), reverse('home'), fetch_redirect_response=False)
+        outbox.flush()
+        self.assertTrue(ContactMessage.objects.filter(message=fields['message']).exists())
+
+    def test_retry_after_a_failed_insert_is_stored(self):
+        fields = contact()
+        with override_settings(PORTFOLIO_CONTACT_WRITE_BEHIND=False), \
+                mock.patch.object(ContactMessage.objects, 'create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('contact_submit'), fields)
+        with override_settings(PORTFOLIO_CONTACT_WRITE_BEHIND=False):
+            self.client.post(reverse('contact_submit'), fields)
+        self.assertTrue(ContactMessage.objects.filter(message=fields['message']).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_CONTACT_IP_RATE='3/h')
+class ContactScreeningTests(TestCase):
+
+    def setUp(self):
+        ratelimit.reset()
+
+    def test_junk_is_rejected_without_queries(self):
+        url = reverse('contact_submit')
+        fresh = ratelimit.form_token()
+        with self.assertNumQueries(0):
+            for fields in [contact(website='http://spam.example'), contact(form_token=fresh), contact(form_token='forged')]:
+                self.assertRedirects(self.client.post(url, fields), reverse('home'), fetch_redirect_response=False)
+            response = self.client.post(url, contact())
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_duplicates_are_dropped(self):
+        fields = contact()
+        self.client.post(reverse('contact_submit'), fields)
+        self.client.post(reverse('contact_submit'), {**fields, 'message': fields['message'].upper() + '  '})
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_cache_backend_shares_the_buckets(self):
+        cache.get_cache().clear()
+        with override_settings(PORTFOLIO_RATELIMIT_BACKEND='cache'):
+            statuses = [self.client.post(reverse('contact_submit'), contact()).status_code for _ in range(4)]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PORTFOLIO_ANALYTICS_FLUSH_INTERVAL=0)
+class AnalyticsTests(TestCase):
+
+    def setUp(self):
+        ratelimit.reset()
+        analytics.flush()
+        with self.captureOnCommitCallbacks(execute=True):
+            seed(3)
+
+    def beacon(self, events):
+        return self.client.post(reverse('analytics_event'), events, content_type='text/plain')
+
+    def test_beacons_are_buffered_then_added_to_daily_counters(self):
+        project, certification = Project.objects.first(), Certification.objects.first()
+        # Reads the snapshot's ids for this content version.
+        self.assertTrue(analytics.known(('project', project.pk, 'github')))
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                self.assertEqual(self.beacon(f'view project:{project.pk}:github').status_code, 204)
+            self.beacon(f'certification:{certification.pk} project:{project.pk}:bogus project:999999:live')
+        analytics.flush()
+        self.beacon(f'project:{project.pk}:github')
+        analytics.flush()
+
+        self.assertEqual(PageViewDailyCount.objects.get().count, 3)
+        self.assertEqual(list(ProjectDailyCount.objects.values_list('project', 'event', 'count')), [(project.pk, 'github', 4)])
+        self.assertEqual(CertificationDailyCount.objects.get().count, 1)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:portfolio_project_change', args=[project.pk]))
+        self.assertContains(response, '<tr><th>GitHub link</th><td>4</td><td>4</td></tr>', html=True)
+
+    def test_ids_missing_from_the_snapshot_are_not_buffered(self):
+        self.beacon(' '.join(f'project:{pk}:live certification:{pk}' for pk in range(100000, 100050)))
+        self.assertEqual(analytics.pending(), 0)
+        self.assertEqual(analytics.dropped, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(title='New project', description='New')
+        self.beacon(f'project:{project.pk}:live')
+        self.assertEqual(analytics.pending(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SeedTests(TestCase):
+
+    def test_loading_twice_changes_nothing(self):
+        data = seed_file.read_seed()
+        first = seed_file.load(data)
+        self.assertTrue(all(counts['created'] for counts in first.values()))
+        rows = {model: model.objects.count() for model in first}
+        with self.captureOnCommitCallbacks() as callbacks:
+            second = seed_file.load(data)
+        self.assertEqual(second, {
+            model: {'created': 0, 'updated': 0, 'unchanged': sum(counts.values())} for model, counts in first.items()
+        })
+        self.assertEqual({model: model.objects.count() for model in first}, rows)
+        self.assertEqual(callbacks, [])
+
+    def test_keep_order_leaves_admin_reordering_alone(self):
+        call_command('populate_data', stdout=io.StringIO())
+        project = Project.objects.order_by('order').first()
+        Project.objects.filter(pk=project.pk).update(order=99, description='Edited')
+
+        call_command('populate_data', keep_order=True, stdout=io.StringIO())
+        project.refresh_from_db()
+        self.assertEqual(project.order, 99)
+        self.assertNotEqual(project.description, 'Edited')
+
+        call_command('populate_data', stdout=io.StringIO())
+        project.refresh_from_db()
+        self.assertNotEqual(project.order, 99)
+
+
+class LoadGeneratorTests(TestCase):
+
+    def test_drives_the_wsgi_app(self):
+        seed(10)
+        durations, elapsed, statuses = WSGILoadGenerator().run(lambda generator: generator.get('/'), 5, 1)
+        self.assertEqual(statuses, {200: 5})
+        self.assertEqual(len(durations), 5)
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+    # The commands drive the app from other threads, which must see the
+    # seeded rows.
+
+    def test_asgi_benchmark_runs(self):
+        seed(2)
+        out = io.StringIO()
+        call_command('benchmark_asgi', repeat=2, concurrency=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1 + 2 * 3)
+
+
+class InboxAdminTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f'Visitor {i}', email='visitor@example.com', subject='Hi', message='Hello')
+            for i in range(ContactMessageAdmin.list_per_page + 5)
+        )
+        self.url = reverse('admin:portfolio_contactmessage_changelist')
+
+    def test_keyset_pages_cover_every_message(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url + first.context['cl'].older_url)
+        seen = [obj.pk for obj in first.context['cl'].result_list] + [obj.pk for obj in second.context['cl'].result_list]
+        self.assertEqual(sorted(seen, reverse=True), list(ContactMessage.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+        self.assertIsNone(second.context['cl'].older_url)
+        newer = self.client.get(self.url + second.context['cl'].newer_url)
+        self.assertEqual(list(newer.context['cl'].result_list), list(first.context['cl'].result_list))
+
+    def test_bulk_actions_are_single_statements(self):
+        selected = ContactMessage.objects.values_list('pk', flat=True)[:1]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'action': 'mark_read', 'select_across': '1', 'index': '0', '_selected_action': selected})
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "portfolio_contactmessage"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(ContactMessage.objects.filter(is_read=False).exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url + '?is_read__exact=1', {'action': 'delete_messages', 'select_across': '1', 'index': '0', '_selected_action': selected})
+        deletes = [query for query in queries if query['sql'].startswith('DELETE FROM "portfolio_contactmessage"')]
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(ContactMessage.objects.exists())
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f'Visitor {i}', email='visitor@example.com', subject='Hi, "there"', message='Line 1\nLine 2')
+            for i in range(5)
+        )
+
+    def test_admin_action_streams_gzipped_jsonl(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.post(reverse('admin:portfolio_contactmessage_changelist'), {
+            'action': 'export_jsonl_gzip', 'select_across': '1', 'index': '0', '_selected_action': ['1'],
+        })
+        self.assertTrue(response.streaming)
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], [f'Visitor {i}' for i in range(5)])
+
+    def test_export_resumes_from_the_watermark(self):
+        first = export.Export(export.export_queryset(ContactMessage.objects.all()))
+        rows = list(csv.reader(io.StringIO(b''.join(first).decode())))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'Hi, "there"')
+        ContactMessage.objects.create(name='Later', email='visitor@example.com', subject='Hi', message='Hello')
+        second = export.Export(export.export_queryset(ContactMessage.objects.all(), first.watermark), 'jsonl')
+        self.assertEqual([json.loads(line)['name'] for line in b''.join(second).decode().splitlines()], ['Later'])
+
+
+class ReorderTests(TestCase):
+
+    def setUp(self):
+        self.projects = Project.objects.bulk_create(
+            Project(title=f'Project {i}', description='-', technologies='-', order=i) for i in range(1, 6)
+        )
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def pks(self):
+        return list(Project.objects.values_list('pk', flat=True))
+
+    def test_moving_one_row_writes_one_row(self):
+        first, *rest = [project.pk for project in self.projects]
+        order = rest[:2] + [first] + rest[2:]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('admin:portfolio_project_reorder'), {'order': order}, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertEqual([query['sql'].startswith('UPDATE "portfolio_project"') for query in queries].count(True), 1)
+        self.assertEqual(self.pks(), order)
+        self.assertEqual(Project.objects.get(pk=first).order, 3.5)
+
+    def test_keys_between_equal_and_adjacent_values(self):
+        Project.objects.update(order=0)
+        order = [project.pk for project in self.projects][::-1]
+        self.assertEqual(reorder.reorder(Project.objects.all(), order), 4)
+        self.assertEqual(self.pks(), order)
+        self.assertEqual(reorder.reorder(Project.objects.all(), order[:2]), 0)
+        # No float between 1 and the next one up: the list is renumbered.
+        for pk, key in zip(order, [1, math.nextafter(1, 2), 3, 4, 5]):
+            Project.objects.filter(pk=pk).update(order=key)
+        self.assertEqual(reorder.reorder(Project.objects.all(), [order[0], order[2], order[1]]), 2)
+        self.assertEqual(self.pks(), [order[0], order[2], order[1], order[3], order[4]])
+
+    def test_rows_must_share_the_scope(self):
+        skills = Skill.objects.bulk_create(
+            Skill(category=SkillCategory.objects.create(name=name), name=name) for name in ['Backend', 'Frontend']
+        )
+        response = self.client.post(reverse('admin:portfolio_skill_reorder'), {'order': [skill.pk for skill in skills]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PORTFOLIO_ARCHIVE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name=f'Visitor {i}', email='visitor@example.com', subject='Needle' if i == 3 else 'Hi', message='Hello')
+            for i in range(10)
+        )
+        ContactMessage.objects.filter(pk__lte=ContactMessage.objects.order_by('pk')[6].pk).update(
+            created_at=timezone.now() - timedelta(days=400),
+        )
+
+    def test_old_messages_move_to_searchable_segments(self):
+        call_command('archive_messages', days=180, batch_size=3, stdout=io.StringIO())
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(list(MessageArchiveSegment.objects.order_by('first_id').values_list('count', flat=True)), [3, 3, 1])
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:portfolio_messagearchivesegment_search'), {'q': 'needle'})
+        self.assertEqual([message['name'] for message in response.context['results']], ['Visitor 3'])
+        start = (timezone.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('admin:portfolio_messagearchivesegment_search'), {'start': start})
+        self.assertEqual(response.context['searched'], 0)
+
+    def test_runs_do_not_share_a_temporary_file(self):
+        directory = Path(settings.PORTFOLIO_ARCHIVE_DIR)
+        # Another run's segment, still being written.
+        other = directory / '.segment-other.tmp'
+        other.write_bytes(b'partial')
+        segments = list(archive.archive(timezone.now() - timedelta(days=180)))
+        self.assertEqual([segment.count for segment in segments], [7])
+        self.assertEqual(other.read_bytes(), b'partial')
+        self.assertEqual(sorted(path.name for path in directory.iterdir()), [other.name, segments[0].name])
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_do_not_sort(self):
+        seed(10)
+        for name, plan, sorts in query_plans.check():
+            with self.subTest(name):
+                self.assertEqual(sorts, [], plan)
+
+
+def atom(kind, *payload):
+    body = b''.join(payload)
+    return struct.pack('>I4s', 8 + len(body), kind) + body
+
+
+def mp4(chunks, stco_offsets=None, co64_offsets=None, moov_first=False):
+    """
+    A minimal MP4: ftyp, mdat holding ``chunks`` and a moov with a 5 s
+    duration and one 1920x1080 track rotated by 90 degrees. The chunk offset
+    tables point at the chunks unless given.
+    """
+    ftyp = atom(b'ftyp', b'isom', b'\0\0\0\0')
+    mvhd = atom(b'mvhd', b'\0' * 12, struct.pack('>II', 1000, 5000), b'\0' * 80)
+    rotated = struct.pack('>9i', 0, 0x10000, 0, -0x10000, 0, 0, 0, 0, 0x40000000)
+    tkhd = atom(b'tkhd', b'\0' * 40, rotated, struct.pack('>II', 1920 << 16, 1080 << 16))
+
+    def moov_atom(mdat_start):
+        starts = [mdat_start + 8 + sum(map(len, chunks[:i])) for i in range(len(chunks))]
+        stco = stco_offsets if stco_offsets is not None else starts
+        co64 = co64_offsets if co64_offsets is not None else starts
+        stbl = atom(b'stbl',
+                    atom(b'stco', b'\0' * 4, struct.pack(f'>I{len(stco)}I', len(stco), *stco)),
+                    atom(b'co64', b'\0' * 4, struct.pack(f'>I{len(co64)}Q', len(co64), *co64)))
+        return atom(b'moov', mvhd, atom(b'trak', tkhd, atom(b'mdia', atom(b'minf', stbl))))
+
+    mdat = atom(b'mdat', *chunks)
+    if moov_first:
+        moov = moov_atom(len(ftyp) + len(moov_atom(0)))
+        return ftyp + moov + mdat
+    return ftyp + mdat + moov_atom(len(ftyp))
+
+
+def chunk_offsets(data):
+    moov = next(data[offset:offset + size] for kind, offset, header, size in video.iter_atoms(io.BytesIO(data), 0, len(data)) if kind == b'moov')
+    offsets = {}
+    for path, offset, header, size in video._walk(moov, 0, len(moov)):
+        if path[-1] in (b'stco', b'co64'):
+            count = struct.unpack_from('>I', moov, offset + header + 4)[0]
+            offsets[path[-1]] = struct.unpack_from(f'>{count}{"I" if path[-1] == b"stco" else "Q"}', moov, offset + header + 8)
+    return offsets
+
+
+class FaststartTests(SimpleTestCase):
+    chunks = [b'first chunk', b'second', b'third chunk!']
+
+    def faststart(self, data):
+        dst = io.BytesIO()
+        rewritten, metadata = video.faststart(io.BytesIO(data), dst)
+        return rewritten, metadata, dst.getvalue()
+
+    def test_moves_moov_before_mdat_and_shifts_chunk_offsets(self):
+        data = mp4(self.chunks)
+        rewritten, metadata, output = self.faststart(data)
+        self.assertTrue(rewritten)
+        self.assertEqual(len(output), len(data))
+        kinds = [kind for kind, *rest in video.iter_atoms(io.BytesIO(output), 0, len(output))]
+        self.assertEqual(kinds, [b'ftyp', b'moov', b'mdat'])
+        moov_size = len(data) - data.index(b'moov') + 4
+        before, after = chunk_offsets(data), chunk_offsets(output)
+        for kind in (b'stco', b'co64'):
+            self.assertEqual(after[kind], tuple(offset + moov_size for offset in before[kind]))
+            self.assertEqual([output[offset:offset + len(chunk)] for offset, chunk in zip(after[kind], self.chunks)], self.chunks)
+
+    def test_refuses_stco_overflow(self):
+        with self.assertRaises(video.VideoError):
+            self.faststart(mp4(self.chunks, stco_offsets=[0xFFFFFFFF - 10]))
+        # co64 has room for the same offsets.
+        self.assertTrue(self.faststart(mp4(self.chunks, stco_offsets=[], co64_offsets=[0xFFFFFFFF - 10]))[0])
+
+    def test_leaves_faststart_files_alone(self):
+        data = mp4(self.chunks, moov_first=True)
+        rewritten, metadata, output = self.faststart(data)
+        self.assertFalse(rewritten)
+        self.assertEqual(output, b'')
+        self.assertEqual(metadata['duration'], 5)
+
+    def test_reads_duration_and_rotated_size(self):
+        data = mp4(self.chunks)
+        moov = data[data.index(b'moov') - 4:]
+        self.assertEqual(video.read_metadata(moov), {'duration': 5.0, 'width': 1080, 'height': 1920})
+
+
+class StaticFilesTests(SimpleTestCase):
+    css = b'body { color: #333; }\n' * 200
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        source = Path(root.name, 'source')
+        (source / 'css').mkdir(parents=True)
+        (source / 'css' / 'site.css').write_bytes(self.css)
+        (source / 'logo.png').write_bytes(png(10, 10).read())
+        static = override_settings(
+            STATICFILES_DIRS=[source], STATIC_ROOT=Path(root.name, 'static'),
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        static.enable()
+        self.addCleanup(static.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse(status=404))
+
+    def get(self, name, encodings=''):
+        response = self.middleware(RequestFactory().get(f'/static/{name}', headers={'Accept-Encoding': encodings}))
+        self.addCleanup(response.close)
+        return response
+
+    def test_collectstatic_writes_compressed_variants(self):
+        root = Path(settings.STATIC_ROOT)
+        for name in ['css/site.css', staticfiles_storage.stored_name('css/site.css')]:
+            self.assertEqual(gzip.decompress((root / f'{name}.gz').read_bytes()), self.css)
+            # Brotli is optional; without it only .gz files are written.
+            if brotli:
+                self.assertEqual(brotli.decompress((root / f'{name}.br').read_bytes()), self.css)
+        # Already compressed formats are left alone.
+        self.assertFalse((root / 'logo.png.gz').exists())
+
+    def test_picks_the_encoding_the_client_accepts(self):
+        cases = [('gzip, deflate, br', 'br' if brotli else 'gzip'), ('gzip', 'gzip'), ('br;q=0, gzip', 'gzip'), ('', None)]
+        for encodings, coding in cases:
+            with self.subTest(encodings):
+                response = self.get('css/site.css', encodings)
+                self.assertEqual(response.get('Content-Encoding'), coding)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(response['Content-Type'], 'text/css')
+                body = b''.join(response.streaming_content)
+                decompress = {'br': brotli and brotli.decompress, 'gzip': gzip.decompress}.get(coding, bytes)
+                self.assertEqual(decompress(body), self.css)
+        self.assertNotIn('Vary', self.get('logo.png', 'gzip, br'))
+
+    def test_only_hashed_names_are_immutable(self):
+        hashed = staticfiles_storage.stored_name('css/site.css')
+        self.assertNotEqual(hashed, 'css/site.css')
+        self.assertEqual(self.get(hashed)['Cache-Control'], settings.PORTFOLIO_STATIC_CACHE_CONTROL)
+        self.assertEqual(self.get('css/site.css')['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(self.get('missing.css').status_code, 404)
+
+
+class MediaRangeTests(SimpleTestCase):
+    content = bytes(range(100))
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        with open(f'{root.name}/clip.mp4', 'wb') as f:
+            f.write(self.content)
+        media_root = override_settings(MEDIA_ROOT=root.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def get(self, path='clip.mp4', **headers):
+        response = media.serve(RequestFactory().get(f'/media/{path}', headers=headers), path)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_parses_ranges(self):
+        parse = media.parse_range_header
+        self.assertEqual(parse('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(parse('bytes=-200', 100), [(0, 99)])
+        self.assertEqual(parse('bytes=50-', 100), [(50, 99)])
+        self.assertEqual(parse('bytes=0-0, 98-200', 100), [(0, 0), (98, 99)])
+        self.assertEqual(parse('bytes=100-', 100), [])
+        self.assertIsNone(parse('bytes=5-2', 100))
+        self.assertIsNone(parse('items=0-1', 100))
+        self.assertIsNone(parse('bytes=' + ','.join(f'{i}-{i}' for i in range(media.MAX_RANGES + 1)), 100))
+
+    def test_single_range(self):
+        response = self.get(Range='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 90-99/100')
+        self.assertEqual(self.body(response), self.content[90:])
+
+    def test_multipart_ranges(self):
+        response = self.get(Range='bytes=0-1,50-')
+        self.assertEqual(response.status_code, 206)
+        boundary = response['Content-Type'].split('boundary=')[1]
+        body = self.body(response)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        parts = body.split(f'--{boundary}'.encode())
+        self.assertEqual(parts[-1], b'--\r\n')
+        self.assertIn(b'Content-Range: bytes 0-1/100\r\n\r\n' + self.content[:2] + b'\r\n', parts[1])
+        self.assertIn(b'Content-Range: bytes 50-99/100\r\n\r\n' + self.content[50:] + b'\r\n', parts[2])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_too_many_ranges_get_the_whole_file(self):
+        response = self.get(Range='bytes=' + ','.join(f'{i}-{i}' for i in range(media.MAX_RANGES + 1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range=etag).status_code, 206)
+        response = self.get(Range='bytes=0-9', If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_paths_outside_media_root_are_not_found(self):
+        for path in ['../settings.py', '/etc/passwd', 'missing.mp4']:
+            with self.subTest(path), self.assertRaises(Http404):
+                media.serve(RequestFactory().get('/media/x'), path)
+
+
+def png(width, height, color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, format='PNG')
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        media_root = override_settings(MEDIA_ROOT=root.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def save(self, category):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            category.save()
+        category.refresh_from_db()
+        return callbacks
+
+    def test_builds_variants_once_per_upload(self):
+        category = SkillCategory(name='Web')
+        category.icon.save('web.png', png(1000, 500), save=False)
+        self.save(category)
+        entry = category.image_variants['icon']
+        self.assertEqual((entry['source'], entry['width'], entry['height']), (category.icon.name, 1000, 500))
+        for fmt in images.FORMATS:
+            self.assertEqual([width for width, name in entry[fmt]], [320, 640, 960, 1000])
+            for width, name in entry[fmt]:
+                with category.icon.storage.open(name) as f, Image.open(f) as image:
+                    self.assertEqual((image.format.lower(), image.size), (fmt, (width, round(500 * width / 1000))))
+
+        # Saving without a new upload builds nothing.
+        self.assertEqual(images.stale_fields(category), [])
+        category.icon.save('web2.png', png(200, 200, 'blue'), save=False)
+        self.save(category)
+        self.assertEqual(category.image_variants['icon']['source'], category.icon.name)
+        self.assertEqual([width for width, name in category.image_variants['icon'][images.FORMATS[0]]], [200])
+
+        category.icon = None
+        self.save(category)
+        self.assertNotIn('icon', category.image_variants)
+
+    def test_new_bytes_get_new_names(self):
+        category = SkillCategory(name='Web')
+        category.icon.save('web.png', png(400, 400), save=False)
+        self.save(category)
+        storage = category.icon.storage
+        first = images.variant_names(category.image_variants['icon'])
+
+        # Rebuilding the same image reuses the same files.
+        images.process_instance(category, force=True)
+        self.assertEqual(images.variant_names(category.image_variants['icon']), first)
+        self.assertTrue(all(storage.exists(name) for name in first))
+
+        # Different bytes under the same upload name: new names, old files removed.
+        storage.delete(category.icon.name)
+        storage.save(category.icon.name, png(400, 400, 'blue'))
+        images.process_instance(category, force=True)
+        second = images.variant_names(category.image_variants['icon'])
+        self.assertFalse(first & second)
+        self.assertFalse(any(storage.exists(name) for name in first))
+        self.assertTrue(all(storage.exists(name) for name in second))
+
+    def test_skill_icons_have_a_tooltip(self):
+        skill = {'name': 'Python', 'icon': {'name': 'skill_icons/python.png', 'url': '/media/skill_icons/python.png'}}
+        html = render_to_string('portfolio/sections/skills.html', {'skill_categories': [{'name': 'Languages', 'skills': [skill]}]})
+        self.assertInHTML(
+            '<img src="/media/skill_icons/python.png" alt="Python" class="skill-icon" title="Python" loading="lazy" decoding="async">',
+            html,
+        )
+
+    def test_widths_never_upscale(self):
+        self.assertEqual(images.variant_widths(5000), [320, 640, 960, 1280, 1920])
+        self.assertEqual(images.variant_widths(640), [320, 640])
+        self.assertEqual(images.variant_widths(100), [100])
+
+
+class IngestTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(MEDIA_ROOT=os.path.join(self.root.name, 'media'), CACHES=LOCMEM_CACHES)
+        override.enable()
+        self.addCleanup(override.disable)
+        seed(2)
+        self.source = Path(self.root.name, 'source')
+        self.source.mkdir()
+
+    def manifest(self, *paths):
+        return [
+            {'model': 'portfolio.Certification', 'lookup': {'pk': certification.pk}, 'field': 'certificate_file', 'path': path}
+            for certification, path in zip(Certification.objects.order_by('pk'), paths)
+        ]
+
+    def test_identical_content_is_stored_once(self):
+        for name in ['a.pdf', 'b.pdf']:
+            (self.source / name).write_bytes(b'the same certificate')
+        jobs, skipped, elapsed = ingest.ingest(self.manifest('a.pdf', 'b.pdf'), self.source, workers=2)
+        self.assertEqual(sorted(job.status for job in jobs), ['copied', 'duplicate'])
+        names = {certification.certificate_file.name for certification in Certification.objects.all()}
+        self.assertEqual(len(names), 1)
+        storage = Certification.objects.first().certificate_file.storage
+        self.assertEqual(storage.listdir('certificates')[1], [names.pop().split('/')[-1]])
+        self.assertEqual(IngestedFile.objects.values('sha256').distinct().count(), 1)
+
+        # A second run finds everything unchanged and copies nothing.
+        jobs, skipped, elapsed = ingest.ingest(self.manifest('a.pdf', 'b.pdf'), self.source, workers=2)
+        self.assertEqual(jobs, [])
+        self.assertEqual([reason for entry, reason in skipped], ['unchanged', 'unchanged'])
+
+    def test_touched_file_is_rehashed_not_copied(self):
+        path = self.source / 'a.pdf'
+        path.write_bytes(b'certificate')
+        ingest.ingest(self.manifest('a.pdf'), self.source)
+        os.utime(path, (time.time() + 60, time.time() + 60))
+        [job], skipped, elapsed = ingest.ingest(self.manifest('a.pdf'), self.source)
+        self.assertEqual((job.status, job.bytes_copied), ('unchanged', 0))
+        self.assertEqual(IngestedFile.objects.get().mtime, path.stat().st_mtime)
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def test_identical_content_is_stored_once(self):
+        storage = ContentAddressedStorage(backend='s3', bucket='media', client=LocalS3Client(self.root.name), base_url='/media/')
+        first = storage.save('certificates/a.pdf', ContentFile(b'certificate'))
+        second = storage.save('skill_icons/b.PDF', ContentFile(b'certificate'))
+        self.assertEqual(first, second)
+        self.assertIn(first.split('/')[-1].split('.')[0], storage.url(first))
+        self.assertEqual(list(storage.blob_names()), [first])
+        storage.delete(first)
+        self.assertTrue(storage.exists(first))
+
+    def test_gc_deletes_unreferenced_blobs(self):
+        storages = {**settings.STORAGES, 'default': {
+            'BACKEND': 'portfolio.storage.ContentAddressedStorage', 'OPTIONS': {'location': self.root.name},
+        }}
+        with override_settings(STORAGES=storages, CACHES=LOCMEM_CACHES):
+            seed(1)
+            certification = Certification.objects.get()
+            certification.certificate_file.save('a.pdf', ContentFile(b'kept'))
+            orphan = certification.certificate_file.storage.save('b.pdf', ContentFile(b'orphan'))
+            call_command('gc_media', grace=0, stdout=io.StringIO())
+            storage = certification.certificate_file.storage
+            self.assertTrue(storage.exists(certification.certificate_file.name))
+            self.assertFalse(storage.exists(orphan))
+            self.assertEqual(MediaBlob.objects.get().refcount, 1)
@@ -1,10 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, metrics, views
 
-urlpatterns = [
-    path('', views.home, name='home'),
-    path('contact/', views.contact_submit, name='contact_submit'),
-    path('setup-data/', views.setup_data, name='setup_data'),
-]
 
+def build_urlpatterns(async_views):
+    """The app's routes, with the async home and contact views when ``async_views``."""
+    return [
+        path('', views.ahome if async_views else views.home, name='home'),
+        path('contact/', views.acontact_submit if async_views else views.contact_submit, name='contact_submit'),
+        path('contact/token/', views.contact_token, name='contact_token'),
+        path('analytics/', views.analytics_event, name='analytics_event'),
+        path('setup-data/', views.setup_data, name='setup_data'),
+        path('api/portfolio/', api.portfolio, name='api_portfolio'),
+        path('api/portfolio/<slug:section>/', api.portfolio, name='api_portfolio_section'),
+        path('metrics', metrics.metrics, name='metrics'),
+    ]
 
+
+urlpatterns = build_urlpatterns(settings.PORTFOLIO_ASYNC_VIEWS)
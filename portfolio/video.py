@@ -0,0 +1,232 @@
+"""
+Post-upload processing for project videos.
+
+MP4 and QuickTime files are a sequence of atoms (boxes). Phones usually
+write the ``moov`` atom, which holds the index the player needs before it
+can start, after the media data in ``mdat``, so the browser has to fetch the
+whole file before playback begins. ``faststart`` moves ``moov`` in front of
+``mdat`` and patches the chunk offset tables (``stco`` / ``co64``) by the
+number of bytes the media data moved. While walking ``moov`` we also read
+the duration and display size, which are stored on the Project so the
+template never has to open the file.
+"""
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# Atoms whose payload is a list of child atoms, on the path to the tables we
+# need to read or patch.
+CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf'}
+COPY_CHUNK = 1024 * 1024
+
+
+class VideoError(Exception):
+    pass
+
+
+def iter_atoms(f, start, end):
+    """Yield ``(type, offset, header_size, size)`` for atoms in ``[start, end)``."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise VideoError(f'Corrupt atom {kind!r} at {offset}')
+        yield kind, offset, header, size
+        offset += size
+
+
+def _walk(data, start, end, path=()):
+    """Yield ``(path, offset, header_size, size)`` for atoms nested in ``data``."""
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise VideoError(f'Corrupt atom {kind!r} in moov')
+        yield path + (kind,), offset, header, size
+        if kind in CONTAINERS:
+            yield from _walk(data, offset + header, offset + size, path + (kind,))
+        offset += size
+
+
+def read_metadata(moov):
+    """Return duration (seconds), width and height from a ``moov`` atom."""
+    metadata = {'duration': None, 'width': None, 'height': None}
+    for path, offset, header, size in _walk(moov, 0, len(moov)):
+        body = offset + header
+        if path == (b'moov', b'mvhd'):
+            version = moov[body]
+            if version == 1:
+                timescale, duration = struct.unpack_from('>IQ', moov, body + 20)
+            else:
+                timescale, duration = struct.unpack_from('>II', moov, body + 12)
+            if timescale:
+                metadata['duration'] = duration / timescale
+        elif path == (b'moov', b'trak', b'tkhd') and metadata['width'] is None:
+            version = moov[body]
+            matrix = body + (52 if version == 1 else 40)
+            a, b = struct.unpack_from('>ii', moov, matrix)
+            width, height = struct.unpack_from('>II', moov, matrix + 36)
+            width, height = width >> 16, height >> 16
+            if width and height:
+                # A 90 or 270 degree rotation in the display matrix (typical
+                # for portrait phone recordings) swaps the displayed size.
+                if a == 0 and b != 0:
+                    width, height = height, width
+                metadata['width'], metadata['height'] = width, height
+    return metadata
+
+
+def _shift_chunk_offsets(moov, delta):
+    """Return a copy of ``moov`` with every stco/co64 entry moved by ``delta``."""
+    moov = bytearray(moov)
+    for path, offset, header, size in _walk(moov, 0, len(moov)):
+        kind = path[-1]
+        if kind not in (b'stco', b'co64'):
+            continue
+        body = offset + header
+        count = struct.unpack_from('>I', moov, body + 4)[0]
+        table = body + 8
+        if kind == b'stco':
+            offsets = struct.unpack_from(f'>{count}I', moov, table)
+            if offsets and max(offsets) + delta > 0xFFFFFFFF:
+                raise VideoError('Chunk offsets would overflow stco')
+            struct.pack_into(f'>{count}I', moov, table, *(o + delta for o in offsets))
+        else:
+            offsets = struct.unpack_from(f'>{count}Q', moov, table)
+            struct.pack_into(f'>{count}Q', moov, table, *(o + delta for o in offsets))
+    return bytes(moov)
+
+
+def _copy_range(src, dst, offset, length):
+    src.seek(offset)
+    while length:
+        chunk = src.read(min(COPY_CHUNK, length))
+        if not chunk:
+            raise VideoError('Unexpected end of file')
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def faststart(src, dst):
+    """
+    Read an MP4/MOV from ``src`` and write it to ``dst`` with ``moov`` ahead
+    of ``mdat``. Returns ``(rewritten, metadata)``; when the file is already
+    fast-start nothing is written and ``rewritten`` is False.
+    """
+    src.seek(0, os.SEEK_END)
+    end = src.tell()
+    atoms = list(iter_atoms(src, 0, end))
+    moov = next((atom for atom in atoms if atom[0] == b'moov'), None)
+    mdat = next((atom for atom in atoms if atom[0] == b'mdat'), None)
+    if moov is None:
+        raise VideoError('No moov atom')
+
+    src.seek(moov[1])
+    moov_data = src.read(moov[3])
+    metadata = read_metadata(moov_data)
+    if mdat is None or moov[1] < mdat[1]:
+        return False, metadata
+
+    # Everything from the first mdat up to the old moov position moves later
+    # in the file by the size of moov; chunk offsets all point into that region.
+    moov_data = _shift_chunk_offsets(moov_data, moov[3])
+    for kind, offset, header, size in atoms:
+        if offset == mdat[1]:
+            dst.write(moov_data)
+        if offset != moov[1]:
+            _copy_range(src, dst, offset, size)
+    return True, metadata
+
+
+def extract_poster(path):
+    """
+    Grab a frame one second in with ffmpeg. Returns the JPEG bytes, or None
+    when ffmpeg is not installed or fails.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', '1', '-i', path, '-frames:v', '1', '-f', 'image2', '-c:v', 'mjpeg', '-'],
+            capture_output=True, timeout=60, check=True,
+        )
+    except (subprocess.SubprocessError, OSError):
+        logger.warning('ffmpeg could not extract a poster from %s', path)
+        return None
+    return result.stdout or None
+
+
+def process_project_video(project, force=False):
+    """
+    Make ``project.video`` fast-start, record its metadata and poster, and
+    save the project. Returns False if there was nothing to do.
+    """
+    video = project.video
+    if not video or (project.video_processed == video.name and not force):
+        return False
+
+    storage = video.storage
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, 'source')
+        output_path = os.path.join(tmp, 'faststart')
+        with video.open('rb') as src, open(source_path, 'wb') as local:
+            shutil.copyfileobj(src, local, COPY_CHUNK)
+
+        metadata = {'duration': None, 'width': None, 'height': None}
+        try:
+            with open(source_path, 'rb') as src, open(output_path, 'wb') as dst:
+                rewritten, metadata = faststart(src, dst)
+        except (VideoError, struct.error) as e:
+            logger.warning('Could not parse %s: %s', video.name, e)
+            rewritten = False
+
+        if rewritten:
+            # Store under a new name: media is served as immutable, so the
+            # old URL must never start returning different bytes.
+            old_name = video.name
+            root, ext = os.path.splitext(old_name)
+            with open(output_path, 'rb') as f:
+                video.name = storage.save(f'{root}_faststart{ext}', File(f))
+            storage.delete(old_name)
+            playable_path = output_path
+        else:
+            playable_path = source_path
+
+        poster = extract_poster(playable_path)
+        update_fields = ['video', 'video_duration', 'video_width', 'video_height', 'video_size', 'video_processed', 'updated_at']
+        if poster:
+            if project.video_poster:
+                project.video_poster.delete(save=False)
+            name = os.path.splitext(os.path.basename(video.name))[0] + '.jpg'
+            project.video_poster.save(name, ContentFile(poster), save=False)
+            update_fields.append('video_poster')
+
+    project.video_duration = metadata['duration']
+    project.video_width = metadata['width']
+    project.video_height = metadata['height']
+    project.video_size = video.size
+    project.video_processed = video.name
+    project.save(update_fields=update_fields)
+    return True
@@ -1,48 +1,265 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import HttpResponse
-from .models import Profile, Education, Project, SkillCategory, Skill, Certification, ContactMessage
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST, require_safe
+from .models import Profile, ContactMessage
+from . import analytics, cache, fragments, metrics, outbox, ratelimit, seed, snapshot
+from datetime import datetime, timezone
+import hashlib
 import os
+import time
 
+# Rendered into cached pages in place of the per-visitor CSRF token and the
+# contact form's timing token, and swapped for real ones when the page is
+# served.
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-9f3c1a'
+FORM_TOKEN_PLACEHOLDER = 'form-token-placeholder-5d72e0'
+PLACEHOLDERS = {'csrf_token': CSRF_PLACEHOLDER, 'form_token': FORM_TOKEN_PLACEHOLDER}
+
+def cached_home_html():
+    """
+    Return the rendered home page, using the page cache when possible and
+    the section fragment cache otherwise. The returned HTML still contains
+    the PLACEHOLDERS.
+    """
+    version, html = cache.get_page('home')
+    if html is None:
+        html, timings = fragments.render_page(PLACEHOLDERS)
+        cache.set_page('home', version, html)
+    return html
+
+async def acached_home_html():
+    version, html = await sync_to_async(cache.get_page)('home')
+    if html is None:
+        html, timings = await fragments.arender_page(PLACEHOLDERS)
+        await sync_to_async(cache.set_page)('home', version, html)
+    return html
+
+def home_etag(request):
+    # Pages carrying flash messages are never revalidated.
+    if not settings.PORTFOLIO_ANONYMOUS_HOME and messages.get_messages(request):
+        return None
+    version, modified = cache.get_content_state()
+    # The page embeds the visitor's CSRF token, so a new CSRF cookie must
+    # produce a new ETag; so must a deploy that changes the templates. The
+    # day keeps revalidated pages from holding form tokens that expired.
+    if settings.PORTFOLIO_ANONYMOUS_HOME:
+        visitor = ''
+    else:
+        visitor = f'{request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")}:{int(time.time() // 86400)}'
+    key = f'{settings.PORTFOLIO_RELEASE}:{version}:{visitor}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+def home_last_modified(request):
+    # The personalized page embeds the visitor's CSRF token, which a date
+    # cannot vouch for: If-Modified-Since alone would revalidate a page
+    # holding a rotated token. That page is revalidated by ETag only.
+    if not settings.PORTFOLIO_ANONYMOUS_HOME:
+        return None
+    version, modified = cache.get_content_state()
+    if modified is not None:
+        return datetime.fromtimestamp(modified, tz=timezone.utc)
+    return None
+
+def personalize(html, request):
+    return html.replace(CSRF_PLACEHOLDER, get_token(request)).replace(FORM_TOKEN_PLACEHOLDER, ratelimit.form_token())
+
+def anonymous_home_response(html):
+    """
+    The cached page with no per-visitor state: no token, no session or
+    messages lookup, so no cookies and no ``Vary: Cookie``. Shared caches
+    may keep it.
+    """
+    response = HttpResponse(html.replace(CSRF_PLACEHOLDER, '').replace(FORM_TOKEN_PLACEHOLDER, ''))
+    patch_cache_control(response, public=True, max_age=settings.PORTFOLIO_HOME_MAX_AGE)
+    return response
+
+def render_with_messages(request, profile, sections):
+    """The home page around cached ``sections``, rendered for one visitor's flash messages."""
+    with metrics.render_timer():
+        return render(request, 'portfolio/index.html', {
+            'profile': profile, 'sections': sections, 'form_token': ratelimit.form_token(),
+        })
+
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
 def home(request):
-    try:
-        profile = Profile.objects.first()
-    except:
-        profile = None
-    
-    educations = Education.objects.all()
-    projects = Project.objects.all()
-    skill_categories = SkillCategory.objects.prefetch_related('skills').all()
-    certifications = Certification.objects.all()
+    if settings.PORTFOLIO_ANONYMOUS_HOME:
+        return anonymous_home_response(cached_home_html())
+
+    # Flash messages belong to a single visitor, so those pages are not cached.
+    if messages.get_messages(request):
+        sections, timings = fragments.render_sections()
+        return render_with_messages(request, fragments.get_profile(), sections)
     
-    context = {
-        'profile': profile,
-        'educations': educations,
-        'projects': projects,
-        'skill_categories': skill_categories,
-        'certifications': certifications,
-    }
-    return render(request, 'portfolio/index.html', context)
+    html = cached_home_html()
+    response = HttpResponse(personalize(html, request))
+    # Let browsers keep the page but check back every time; an unchanged page
+    # costs a 304 without any database work.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def home_validators(request):
+    """Return ``(has_messages, etag, last_modified)`` for ``ahome``."""
+    if not settings.PORTFOLIO_ANONYMOUS_HOME and messages.get_messages(request):
+        return True, None, None
+    last_modified = home_last_modified(request)
+    return False, quote_etag(home_etag(request)), int(last_modified.timestamp()) if last_modified else None
+
+async def ahome(request):
+    """
+    Async version of ``home`` for ASGI servers (PORTFOLIO_ASYNC_VIEWS).
+    Session and cache work runs in a worker thread; on a fragment miss the
+    snapshot is read with the async ORM.
+    """
+    has_messages, etag, last_modified = await sync_to_async(home_validators)(request)
+    if has_messages:
+        sections, timings = await fragments.arender_sections()
+        profile = (await snapshot.aload())['profile']
+        return await sync_to_async(render_with_messages)(request, profile, sections)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        html = await acached_home_html()
+        if settings.PORTFOLIO_ANONYMOUS_HOME:
+            response = anonymous_home_response(html)
+        else:
+            response = HttpResponse(personalize(html, request))
+            patch_cache_control(response, private=True, no_cache=True)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+CONTACT_SENT = 'Thank you for your message! I will get back to you soon.'
+CONTACT_INVALID = 'Please fill in all fields.'
+CONTACT_BUSY = 'Too many messages are being sent right now. Please try again in a minute.'
+
+# Set next to a flash message when the home page is anonymous, so the page
+# script knows to fetch it from contact_token.
+FLASH_COOKIE = 'portfolio_flash'
+
+def wants_json(request):
+    # Sent by static/js/contact.js; browsers' default Accept also matches
+    # */*, so request.accepts() cannot tell the two apart.
+    return 'application/json' in request.headers.get('Accept', '')
+
+def contact_fields(request):
+    fields = {field: request.POST.get(field) for field in outbox.FIELDS}
+    return fields if all(fields.values()) else None
+
+def contact_result(request, level, text, status=200, retry_after=None):
+    """A JSON result for the page script, or a flash message and a redirect."""
+    if wants_json(request):
+        response = JsonResponse({'level': level, 'message': text}, status=status)
+    elif retry_after:
+        response = HttpResponse(text, status=status, content_type='text/plain')
+    else:
+        messages.add_message(request, messages.SUCCESS if level == 'success' else messages.ERROR, text)
+        response = redirect('home')
+        if settings.PORTFOLIO_ANONYMOUS_HOME:
+            response.set_cookie(FLASH_COOKIE, '1', max_age=300, samesite='Lax')
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def rejected(request, verdict):
+    """The answer to a post that ``ratelimit.screen`` did not let through."""
+    if verdict.status == 200:
+        return contact_result(request, 'success', CONTACT_SENT)
+    return contact_result(request, 'error', verdict.message, status=verdict.status, retry_after=verdict.retry_after)
 
 def contact_submit(request):
-    if request.method == 'POST':
-        name = request.POST.get('name')
-        email = request.POST.get('email')
-        subject = request.POST.get('subject')
-        message = request.POST.get('message')
-        
-        if name and email and subject and message:
-            ContactMessage.objects.create(
-                name=name,
-                email=email,
-                subject=subject,
-                message=message
-            )
-            messages.success(request, 'Thank you for your message! I will get back to you soon.')
+    if request.method != 'POST':
+        return redirect('home')
+    fields = contact_fields(request)
+    verdict = ratelimit.screen(request, fields)
+    if not verdict.store:
+        return rejected(request, verdict)
+    if fields is None:
+        return contact_result(request, 'error', CONTACT_INVALID, status=400)
+    try:
+        if settings.PORTFOLIO_CONTACT_WRITE_BEHIND:
+            outbox.enqueue(fields)
         else:
-            messages.error(request, 'Please fill in all fields.')
-    
-    return redirect('home')
+            ContactMessage.objects.create(**fields)
+    except outbox.OutboxFull:
+        # Backpressure from the write-behind outbox: ask the client to retry,
+        # and let the retry through the duplicate check.
+        ratelimit.forget(fields)
+        return contact_result(request, 'error', CONTACT_BUSY, status=503, retry_after=60)
+    except Exception:
+        ratelimit.forget(fields)
+        raise
+    return contact_result(request, 'success', CONTACT_SENT)
+
+async def acontact_submit(request):
+    """Async version of ``contact_submit``; the insert uses the async ORM."""
+    if request.method != 'POST':
+        return redirect('home')
+    fields = contact_fields(request)
+    verdict = await sync_to_async(ratelimit.screen)(request, fields)
+    if not verdict.store:
+        return await sync_to_async(rejected)(request, verdict)
+    if fields is None:
+        return await sync_to_async(contact_result)(request, 'error', CONTACT_INVALID, status=400)
+    try:
+        if settings.PORTFOLIO_CONTACT_WRITE_BEHIND:
+            await sync_to_async(outbox.enqueue, thread_sensitive=False)(fields)
+        else:
+            await ContactMessage.objects.acreate(**fields)
+    except outbox.OutboxFull:
+        ratelimit.forget(fields)
+        return await sync_to_async(contact_result)(request, 'error', CONTACT_BUSY, status=503, retry_after=60)
+    except Exception:
+        ratelimit.forget(fields)
+        raise
+    return await sync_to_async(contact_result)(request, 'success', CONTACT_SENT)
+
+@never_cache
+@require_safe
+def contact_token(request):
+    """
+    The visitor's CSRF token, a fresh form timing token and pending flash
+    messages, for the script on the anonymous (shared-cacheable) home page.
+    """
+    response = JsonResponse({
+        'csrf_token': get_token(request),
+        'form_token': ratelimit.form_token(),
+        'messages': [{'level': message.tags, 'message': str(message)} for message in messages.get_messages(request)],
+    })
+    response.delete_cookie(FLASH_COOKIE, samesite='Lax')
+    return response
+
+# Events one analytics beacon may carry.
+ANALYTICS_MAX_EVENTS = 20
+
+@csrf_exempt
+@require_POST
+def analytics_event(request):
+    """
+    Count beacons from static/js/analytics.js: one event per line, see
+    ``analytics.parse``. Events for ids that are not in the snapshot are
+    ignored. Counting only touches the in-memory buffer. The
+    view is CSRF-exempt (the anonymous page has no token) and rate limited
+    per client.
+    """
+    if settings.PORTFOLIO_ANALYTICS:
+        allowed = not ratelimit.get_backend().take(
+            f'analytics:{ratelimit.client_ip(request)}', *ratelimit.parse_rate(settings.PORTFOLIO_ANALYTICS_IP_RATE),
+        )
+        if allowed:
+            for event in request.body[:2048].decode('utf-8', 'replace').split()[:ANALYTICS_MAX_EVENTS]:
+                key = analytics.parse(event)
+                if key and analytics.known(key):
+                    analytics.record(key)
+    return HttpResponse(status=204)
 
 def setup_data(request):
     """
@@ -61,168 +278,10 @@ def setup_data(request):
         return HttpResponse('Data already exists! If you want to reset, delete existing data first from admin panel.', status=200)
     
     try:
-        # Create Profile
-        profile, created = Profile.objects.get_or_create(
-            name='Habib Nidal',
-            defaults={
-                'title': 'Computer Science Engineer | Python Fullstack Developer | Data Analyst',
-                'bio': 'I\'m a passionate Computer Science Engineer from Kerala with a deep interest in fullstack development, App developing and data analytics. I love contributing to innovative projects and aim to build robust and smart solutions.',
-                'email': 'habibnidal2003@gmail.com',
-                'phone': '+917306020083',
-                'linkedin_url': 'https://www.linkedin.com/in/habibnidal',
-                'github_url': 'https://github.com/Habibnidal',
-            }
-        )
-        
-        # Create Education
-        educations_data = [
-            {
-                'degree': 'B.Tech - Computer Science',
-                'institution': 'College of Engineering Trikaripur',
-                'start_year': 2021,
-                'end_year': 2025,
-                'order': 1
-            },
-            {
-                'degree': 'HSE',
-                'institution': 'St Michaels AIHSS Kannur',
-                'start_year': 2019,
-                'end_year': 2021,
-                'order': 2
-            },
-            {
-                'degree': 'SSLC',
-                'institution': 'St Michaels AIHSS Kannur',
-                'start_year': 2019,
-                'end_year': None,
-                'order': 3
-            },
-        ]
-        
-        for edu_data in educations_data:
-            Education.objects.get_or_create(
-                degree=edu_data['degree'],
-                institution=edu_data['institution'],
-                defaults=edu_data
-            )
-        
-        # Create Skill Categories and Skills
-        skill_categories_data = [
-            {
-                'name': 'Languages',
-                'skills': ['Python', 'C', 'JavaScript'],
-                'order': 1
-            },
-            {
-                'name': 'Web Technologies',
-                'skills': ['HTML', 'CSS', 'JavaScript', 'Flutter'],
-                'order': 2
-            },
-            {
-                'name': 'Database',
-                'skills': ['SQL', 'SQLAlchemy', 'Oracle'],
-                'order': 3
-            },
-            {
-                'name': 'Tools',
-                'skills': ['VS Code', 'PyCharm', 'SQLplus', 'Canva', 'Excel', 'Word', 'Power BI'],
-                'order': 4
-            },
-            {
-                'name': 'Libraries',
-                'skills': ['NumPy', 'Pandas', 'React'],
-                'order': 5
-            },
-            {
-                'name': 'Frameworks',
-                'skills': ['Django', 'Flask', 'Tailwind CSS'],
-                'order': 6
-            },
-        ]
-        
-        for cat_data in skill_categories_data:
-            category, created = SkillCategory.objects.get_or_create(
-                name=cat_data['name'],
-                defaults={'order': cat_data['order']}
-            )
-            
-            for skill_name in cat_data['skills']:
-                Skill.objects.get_or_create(
-                    category=category,
-                    name=skill_name,
-                    defaults={'order': 0}
-                )
-        
-        # Create Projects
-        projects_data = [
-            {
-                'title': 'College Space Parking Management System',
-                'description': 'Developed using HTML, CSS, JS, PHP and MySQL. Handled frontend and presentation duties.',
-                'technologies': 'HTML, CSS, JavaScript, PHP, MySQL',
-                'github_link': 'https://github.com/Habibnidal/College-Parking-Management',
-                'live_link': '',
-                'order': 1
-            },
-            {
-                'title': 'Wearable Emergency Alert System',
-                'description': 'Uses Raspberry Pi, GPS, Microphone and Flutter frontend with Flask backend. Created for emergency live monitoring.',
-                'technologies': 'Raspberry Pi, GPS, Flutter, Flask, Python',
-                'github_link': 'https://github.com/Habibnidal/WEAS',
-                'live_link': '',
-                'order': 2
-            },
-            {
-                'title': 'Shopping App for Dresses',
-                'description': 'Designed a complete e-commerce web and mobile app with HTML, CSS, JavaScript, Flask, Flutter, deployed on Render',
-                'technologies': 'HTML, CSS, JavaScript, Flask, Flutter',
-                'github_link': '',
-                'live_link': 'https://digidress.onrender.com',
-                'order': 3
-            },
-        ]
-        
-        for proj_data in projects_data:
-            Project.objects.get_or_create(
-                title=proj_data['title'],
-                defaults=proj_data
-            )
-        
-        # Create Certifications
-        certifications_data = [
-            {
-                'title': 'YIP(7.O) District winner for project WEAS',
-                'issuer': 'YIP',
-                'order': 1
-            },
-            {
-                'title': 'Data Mining in python - MES Perinthalmanna Techfest',
-                'issuer': 'MES Perinthalmanna',
-                'order': 2
-            },
-            {
-                'title': 'Temperature & Mask Scan System - National Techfest',
-                'issuer': 'National Techfest',
-                'order': 3
-            },
-            {
-                'title': 'Volunteer - INQUA Techfest',
-                'issuer': 'INQUA Techfest',
-                'order': 4
-            },
-            {
-                'title': 'Volunteer - Reviens 4.0 IEEE',
-                'issuer': 'IEEE',
-                'order': 5
-            },
-        ]
-        
-        for cert_data in certifications_data:
-            Certification.objects.get_or_create(
-                title=cert_data['title'],
-                defaults=cert_data
-            )
-        
-        return HttpResponse('✅ Data populated successfully! Your portfolio should now display correctly. You can delete this endpoint after setup.', status=200)
+        report = seed.load(seed.read_seed())
+        created = sum(counts['created'] for counts in report.values())
+        updated = sum(counts['updated'] for counts in report.values())
+        return HttpResponse(f'✅ Data populated successfully ({created} rows created, {updated} updated)! Your portfolio should now display correctly. You can delete this endpoint after setup.', status=200)
         
     except Exception as e:
         return HttpResponse(f'Error: {str(e)}', status=500)
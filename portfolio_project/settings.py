@@ -13,7 +13,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-9dqy9(zndo_yyx%#=%!h3omk4lnkk7*v*wf2@*o3hkv5_ll4up'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Hashed static file names are only used with DEBUG off (DJANGO_DEBUG=0).
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ["*"]
 
@@ -29,8 +30,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'portfolio.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'portfolio.middleware.StaticFilesMiddleware',
+    'portfolio.middleware.SplitSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -74,6 +77,56 @@ else:
         }
     }
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The portfolio cache holds rendered pages and content version counters.
+# Choose a backend with PORTFOLIO_CACHE_BACKEND:
+#   locmem - per process, fine for a single worker or local development
+#   file   - shared by every worker on one host (default)
+#   redis  - shared across hosts, set PORTFOLIO_CACHE_LOCATION to the redis URL
+PORTFOLIO_CACHE_BACKEND = os.environ.get('PORTFOLIO_CACHE_BACKEND', 'file')
+PORTFOLIO_CACHE_ALIAS = 'portfolio'
+
+# Prefixing keys with the deployed commit makes a new release start with an
+# empty page cache instead of serving HTML rendered by the previous templates.
+PORTFOLIO_RELEASE = os.environ.get('PORTFOLIO_RELEASE', os.environ.get('RENDER_GIT_COMMIT', ''))[:12]
+
+PORTFOLIO_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portfolio',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PORTFOLIO_CACHE_LOCATION', str(BASE_DIR / 'var' / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('PORTFOLIO_CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    PORTFOLIO_CACHE_ALIAS: {
+        **PORTFOLIO_CACHE_BACKENDS[PORTFOLIO_CACHE_BACKEND],
+        'KEY_PREFIX': PORTFOLIO_RELEASE,
+        'TIMEOUT': None,
+    },
+}
+
+# Seconds a rendered page is kept. Keys are versioned, so this only bounds how
+# long pages for superseded content versions linger in the cache.
+PORTFOLIO_PAGE_CACHE_TIMEOUT = int(os.environ.get('PORTFOLIO_PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Page and fragment hit/miss counters are kept in each process's memory. Set
+# to 1 to add them up in the portfolio cache instead, so `warm_cache --stats`
+# sees every worker; that is a cache write on every page lookup.
+PORTFOLIO_SHARED_CACHE_STATS = os.environ.get('PORTFOLIO_SHARED_CACHE_STATS', '0') == '1'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -95,8 +148,137 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies plus .gz/.br variants, which
+# portfolio.middleware.StaticFilesMiddleware serves from STATIC_ROOT.
+# Media storage, chosen with PORTFOLIO_MEDIA_STORAGE:
+#   filesystem - files under MEDIA_ROOT, named after the upload (default)
+#   cas        - content-addressed blobs under MEDIA_ROOT: identical uploads
+#                are stored once and URLs carry the content hash
+#   s3         - the same blobs in an S3-compatible bucket (needs boto3),
+#                set PORTFOLIO_S3_BUCKET and optionally PORTFOLIO_S3_ENDPOINT_URL
+#                and PORTFOLIO_MEDIA_BASE_URL (the bucket's public URL)
+# Run ``manage.py gc_media`` to remove blobs nothing refers to any more.
+PORTFOLIO_MEDIA_STORAGE = os.environ.get('PORTFOLIO_MEDIA_STORAGE', 'filesystem')
+PORTFOLIO_MEDIA_STORAGES = {
+    'filesystem': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'cas': {
+        'BACKEND': 'portfolio.storage.ContentAddressedStorage',
+    },
+    's3': {
+        'BACKEND': 'portfolio.storage.ContentAddressedStorage',
+        'OPTIONS': {
+            'backend': 's3',
+            'bucket': os.environ.get('PORTFOLIO_S3_BUCKET', ''),
+            'endpoint_url': os.environ.get('PORTFOLIO_S3_ENDPOINT_URL') or None,
+            'base_url': os.environ.get('PORTFOLIO_MEDIA_BASE_URL') or None,
+        },
+    },
+}
+
+STORAGES = {
+    'default': PORTFOLIO_MEDIA_STORAGES[PORTFOLIO_MEDIA_STORAGE],
+    'staticfiles': {
+        'BACKEND': 'portfolio.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+PORTFOLIO_STATIC_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Serve MEDIA_ROOT from Django (portfolio.media.serve) even with DEBUG off.
+# Turn this off when a web server or CDN in front of Django serves media.
+PORTFOLIO_SERVE_MEDIA = os.environ.get('PORTFOLIO_SERVE_MEDIA', '1') == '1'
+
+# Uploads are never overwritten in place (a new upload gets a new name, or
+# with content-addressed storage a name derived from its hash, and image
+# derivatives carry a hash of their bytes), so media responses can be
+# cached for good.
+PORTFOLIO_MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Route the home page and contact form to their async views. Only useful
+# when served over ASGI (see gunicorn.conf.py); under WSGI Django would run
+# them in an event loop per request.
+PORTFOLIO_ASYNC_VIEWS = os.environ.get('PORTFOLIO_ASYNC_VIEWS', '0') == '1'
+
+# Request instrumentation (portfolio.middleware.PerformanceMiddleware).
+# Server-Timing shows DB, render and total time in the browser's dev tools;
+# it is sent in DEBUG, and in production only when turned on here, since it
+# tells every visitor (and shared caches) the query counts and timings.
+# /metrics needs "Authorization: Bearer <token>" when a token is set and is
+# only served in DEBUG otherwise. Requests slower than the threshold (ms, 0
+# turns it off) are logged with their SQL to the "portfolio.slow" logger.
+PORTFOLIO_SERVER_TIMING = os.environ.get('PORTFOLIO_SERVER_TIMING', '0') == '1'
+PORTFOLIO_METRICS_TOKEN = os.environ.get('PORTFOLIO_METRICS_TOKEN', '')
+PORTFOLIO_SLOW_REQUEST_MS = int(os.environ.get('PORTFOLIO_SLOW_REQUEST_MS', '0'))
+
+# JSON API (/api/portfolio/). Clients revalidate with the strong ETag after a
+# minute; the origin header lets other sites embed the content.
+PORTFOLIO_API_CACHE_CONTROL = 'public, max-age=60'
+PORTFOLIO_API_CORS_ORIGIN = os.environ.get('PORTFOLIO_API_CORS_ORIGIN', '*')
+
+# Write-behind contact form (portfolio.outbox). When on, submissions are
+# appended to a local SQLite outbox and moved into ContactMessage in batches
+# by a flusher thread in each worker, every FLUSH_INTERVAL seconds or as soon
+# as a batch is full. Above MAX_PENDING queued submissions the form answers
+# 503. The outbox must be on a local disk shared by the workers of one host.
+PORTFOLIO_CONTACT_WRITE_BEHIND = os.environ.get('PORTFOLIO_CONTACT_WRITE_BEHIND', '0') == '1'
+PORTFOLIO_OUTBOX_PATH = os.environ.get('PORTFOLIO_OUTBOX_PATH', str(BASE_DIR / 'var' / 'outbox.sqlite3'))
+PORTFOLIO_OUTBOX_BATCH_SIZE = 500
+PORTFOLIO_OUTBOX_FLUSH_INTERVAL = float(os.environ.get('PORTFOLIO_OUTBOX_FLUSH_INTERVAL', '1'))
+PORTFOLIO_OUTBOX_MAX_PENDING = int(os.environ.get('PORTFOLIO_OUTBOX_MAX_PENDING', '10000'))
+
+# Contact form screening (portfolio.ratelimit), done before the ORM is used.
+# Rates are "N/s", "N/m", "N/h" or "N/d": bursts of N, refilled over that
+# period. Bucket and duplicate state is per process with the local backend;
+# use "cache" to share it through the portfolio cache (Redis across hosts).
+# Set PORTFOLIO_TRUSTED_PROXIES to the number of proxies that append to
+# X-Forwarded-For in front of the app (1 on Render) so clients are told apart.
+PORTFOLIO_CONTACT_SPAM_CHECKS = os.environ.get('PORTFOLIO_CONTACT_SPAM_CHECKS', '1') == '1'
+PORTFOLIO_RATELIMIT_BACKEND = os.environ.get('PORTFOLIO_RATELIMIT_BACKEND', 'local')
+PORTFOLIO_CONTACT_IP_RATE = os.environ.get('PORTFOLIO_CONTACT_IP_RATE', '5/m')
+PORTFOLIO_CONTACT_GLOBAL_RATE = os.environ.get('PORTFOLIO_CONTACT_GLOBAL_RATE', '20/s')
+PORTFOLIO_CONTACT_MIN_SECONDS = 3
+PORTFOLIO_CONTACT_TOKEN_MAX_AGE = 86400
+PORTFOLIO_CONTACT_DUPLICATE_SECONDS = 3600
+PORTFOLIO_TRUSTED_PROXIES = int(os.environ.get('PORTFOLIO_TRUSTED_PROXIES', '0'))
+
+# Page-view and outbound-click analytics (portfolio.analytics). Beacons are
+# counted in memory and written every FLUSH_INTERVAL seconds as one upsert
+# per daily counter table; at most MAX_KEYS distinct counters are buffered
+# per worker. IP_RATE limits the beacons one client can send.
+PORTFOLIO_ANALYTICS = os.environ.get('PORTFOLIO_ANALYTICS', '1') == '1'
+PORTFOLIO_ANALYTICS_FLUSH_INTERVAL = float(os.environ.get('PORTFOLIO_ANALYTICS_FLUSH_INTERVAL', '10'))
+PORTFOLIO_ANALYTICS_MAX_KEYS = 10000
+PORTFOLIO_ANALYTICS_IP_RATE = '120/m'
+
+# Sessions and flash messages. Only the admin (PORTFOLIO_DB_SESSION_PATHS)
+# keeps database sessions; everywhere else sessions live in a signed cookie
+# (or set PORTFOLIO_PUBLIC_SESSION_ENGINE to the cache backend), and flash
+# messages always do, so public traffic never writes to django_session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+PORTFOLIO_DB_SESSION_PATHS = ['/admin/']
+PORTFOLIO_PUBLIC_SESSION_ENGINE = os.environ.get('PORTFOLIO_PUBLIC_SESSION_ENGINE', 'django.contrib.sessions.backends.signed_cookies')
+PORTFOLIO_PUBLIC_SESSION_COOKIE_NAME = 'portfolio_session'
+
+# Anonymous home page. When on, the home page carries no CSRF token, flash
+# messages or cookies, so it is sent as ``public`` and can be kept by shared
+# caches and CDNs for HOME_MAX_AGE seconds. static/js/contact.js fetches the
+# token and any flash messages from /contact/token/ and submits the form as
+# JSON.
+PORTFOLIO_ANONYMOUS_HOME = os.environ.get('PORTFOLIO_ANONYMOUS_HOME', '0') == '1'
+PORTFOLIO_HOME_MAX_AGE = int(os.environ.get('PORTFOLIO_HOME_MAX_AGE', '60'))
+
+# Contact messages older than this many days are moved out of the database
+# into gzipped JSON Lines segments by ``manage.py archive_messages``. Keep the
+# directory private (outside MEDIA_ROOT) and backed up.
+PORTFOLIO_MESSAGE_RETENTION_DAYS = int(os.environ.get('PORTFOLIO_MESSAGE_RETENTION_DAYS', '180'))
+PORTFOLIO_ARCHIVE_DIR = os.environ.get('PORTFOLIO_ARCHIVE_DIR', str(BASE_DIR / 'var' / 'archive'))
+
+# Widths (in pixels) of the WebP/AVIF derivatives generated for uploaded images.
+PORTFOLIO_IMAGE_WIDTHS = [320, 640, 960, 1280, 1920]
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
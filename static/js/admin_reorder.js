@@ -0,0 +1,76 @@
+// Drag-and-drop ordering for ReorderableAdmin change lists.
+//
+// Rows of the result list can be dragged while the list is in its default
+// order (not sorted by a column). "Save order" posts the ids of the rows on
+// this page, in their new order, to the admin's reorder/ view, which
+// rewrites as few order values as it can, then reloads the list.
+(function () {
+  var url = document.currentScript && document.currentScript.dataset.url;
+  var body = document.querySelector('#result_list tbody');
+  if (!url || !body || !window.fetch || new URLSearchParams(location.search).has('o')) {
+    return;
+  }
+  var rows = Array.prototype.slice.call(body.querySelectorAll('tr'));
+  if (rows.length < 2) {
+    return;
+  }
+  var dragged = null;
+  var button = document.createElement('button');
+  button.type = 'button';
+  button.className = 'button';
+  button.textContent = 'Save order';
+  button.hidden = true;
+  document.getElementById('result_list').before(button);
+
+  function id(row) {
+    var checkbox = row.querySelector('input.action-select');
+    return checkbox && checkbox.value;
+  }
+
+  rows.forEach(function (row) {
+    if (!id(row)) {
+      return;
+    }
+    row.draggable = true;
+    row.style.cursor = 'move';
+    row.addEventListener('dragstart', function (event) {
+      dragged = row;
+      event.dataTransfer.effectAllowed = 'move';
+    });
+    row.addEventListener('dragover', function (event) {
+      if (!dragged || dragged === row) {
+        return;
+      }
+      event.preventDefault();
+      var box = row.getBoundingClientRect();
+      row.parentNode.insertBefore(dragged, event.clientY < box.top + box.height / 2 ? row : row.nextSibling);
+    });
+    row.addEventListener('dragend', function () {
+      dragged = null;
+      button.hidden = false;
+    });
+  });
+
+  button.addEventListener('click', function () {
+    var order = Array.prototype.map.call(body.querySelectorAll('tr'), id).filter(Boolean);
+    button.disabled = true;
+    fetch(url, {
+      method: 'POST',
+      body: JSON.stringify({order: order}),
+      credentials: 'same-origin',
+      headers: {'Content-Type': 'application/json', 'X-CSRFToken': document.querySelector('#changelist-form [name="csrfmiddlewaretoken"]').value},
+    })
+      .then(function (response) {
+        return response.json().then(function (data) {
+          if (!response.ok) {
+            throw new Error(data.error);
+          }
+          location.reload();
+        });
+      })
+      .catch(function (error) {
+        alert('The order could not be saved. ' + (error.message || ''));
+        button.disabled = false;
+      });
+  });
+})();
@@ -0,0 +1,36 @@
+// Page-view and outbound-click beacons for portfolio.analytics.
+//
+// Sends "view" once per page load, and the data-track value of a project
+// link, project video (on its first play) or certificate when it is opened.
+// sendBeacon does not hold up navigation and its response is ignored.
+(function () {
+  var url = document.currentScript && document.currentScript.dataset.url;
+  if (!url || !navigator.sendBeacon) {
+    return;
+  }
+  var played = new WeakSet();
+
+  function send(event) {
+    navigator.sendBeacon(url, event);
+  }
+
+  function opened(event) {
+    var link = event.target.closest('a[data-track]');
+    if (link) {
+      send(link.dataset.track);
+    }
+  }
+
+  send('view');
+  // auxclick catches links opened with the middle button.
+  document.addEventListener('click', opened);
+  document.addEventListener('auxclick', opened);
+  // "play" does not bubble, so listen while it is captured.
+  document.addEventListener('play', function (event) {
+    var video = event.target;
+    if (video.dataset && video.dataset.track && !played.has(video)) {
+      played.add(video);
+      send(video.dataset.track);
+    }
+  }, true);
+})();
@@ -0,0 +1,84 @@
+// Contact form without a page reload.
+//
+// The home page may be served from a shared cache (PORTFOLIO_ANONYMOUS_HOME),
+// in which case it carries no CSRF or form token and no flash messages. They
+// come from the form's data-token-url endpoint: the tokens are fetched the
+// first time the visitor touches the form, and flash messages left by a plain
+// (non-script) submission are fetched on load when the flash cookie is set.
+(function () {
+  var form = document.querySelector('.contact-form');
+  if (!form || !window.fetch) {
+    return;
+  }
+  var tokenInput = form.querySelector('input[name="csrfmiddlewaretoken"]');
+  var formTokenInput = form.querySelector('input[name="form_token"]');
+  var alerts = form.querySelector('.contact-alerts');
+  var tokenRequest = null;
+
+  function showAlert(level, text) {
+    var alert = document.createElement('div');
+    alert.className = 'alert alert-' + (level === 'error' ? 'danger' : level) + ' alert-dismissible fade show';
+    alert.setAttribute('role', 'alert');
+    alert.textContent = text;
+    var close = document.createElement('button');
+    close.type = 'button';
+    close.className = 'btn-close';
+    close.setAttribute('data-bs-dismiss', 'alert');
+    alert.appendChild(close);
+    alerts.replaceChildren(alert);
+  }
+
+  function fetchToken() {
+    if (!tokenRequest) {
+      tokenRequest = fetch(form.dataset.tokenUrl, {credentials: 'same-origin'})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          tokenInput.value = data.csrf_token;
+          if (!formTokenInput.value) {
+            formTokenInput.value = data.form_token;
+          }
+          data.messages.forEach(function (message) { showAlert(message.level, message.message); });
+          return data.csrf_token;
+        });
+    }
+    return tokenRequest;
+  }
+
+  function token() {
+    return tokenInput.value ? Promise.resolve(tokenInput.value) : fetchToken();
+  }
+
+  if (document.cookie.split('; ').indexOf('portfolio_flash=1') !== -1) {
+    fetchToken();
+  }
+  form.addEventListener('focusin', token, {once: true});
+
+  form.addEventListener('submit', function (event) {
+    event.preventDefault();
+    var button = form.querySelector('button[type="submit"]');
+    button.disabled = true;
+    token()
+      .then(function (csrfToken) {
+        return fetch(form.action, {
+          method: 'POST',
+          body: new FormData(form),
+          credentials: 'same-origin',
+          headers: {'Accept': 'application/json', 'X-CSRFToken': csrfToken},
+        });
+      })
+      .then(function (response) {
+        return response.json().then(function (data) {
+          showAlert(data.level, data.message);
+          if (response.ok) {
+            form.reset();
+          }
+        });
+      })
+      .catch(function () {
+        showAlert('error', 'Your message could not be sent. Please try again.');
+      })
+      .then(function () {
+        button.disabled = false;
+      });
+  });
+})();